@@ -0,0 +1 @@
+# Test configuration: the tests import the application as `src`, from this folder (as main.py does).
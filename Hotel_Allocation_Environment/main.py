@@ -4,9 +4,10 @@ import pandas as pd
 plt.switch_backend('Agg') # to make Matplotlib work in a non-interactive environment like Streamlit.
 
 # External objects and functions
-from src.Guests_Hotels_Dictionaries.Guests import guests_dict_original
-from src.Guests_Hotels_Dictionaries.Hotels import hotels_dict_original
+from src.Dataset_Registry import get_dataset
 from src.Hotel_Manager_class import HotelManager
+from src.Result_Cache import get_result_cache
+from src.Instrumentation import get_instrumentation
 from src.Data_Visualization.run_all_visualization import plot_execution_times, statistics_comparison
 
 # Main program: Streamlit App
@@ -23,23 +24,40 @@ if __name__ == "__main__":
             - **Availability**: from the most roomy hotel, down to the hotel with fewer rooms.
             
             The last three methods take into account also the personal preferences of each customer, and allocate them accordingly.
+            For comparison, the **Optimal** method computes the allocation with the highest total satisfaction among preferred hotels, subject to the available rooms: it shows how far the greedy methods are from the best possible result.
+            The **Stable** method matches guests and hotels by deferred acceptance: hotels prefer the guests paying the most, and no guest and hotel would both rather be together than with their match.
             Each customer occupies exactly one room, and each stay lasts only one night. The total revenue per hotel is given by the unit price of the room discounted by the fraction of the discount to which the corresponding customer is entitled.
             Some data visualization is there to help you to better understand the different allocation methods, and to compare them.
             
             _Use the sidebar to view the allocation returned from the method you'd like to explore, or run all methods for comparison!_  
             """)
     # Create an instance of the HotelManager class: it can access all allocation methods
-    manager = HotelManager(guests_dict_original, hotels_dict_original) 
-    
     # Sidebar options (dropdown menu from which the user can choose what allocation method to use)
     # Store the selection in allocation_method
     st.sidebar.title("Choose Allocation Method")
     allocation_method = st.sidebar.selectbox("Select Method", 
-                                             ["Random", "Reservation", "Price", "Availability", "Run All"])
+                                             ["Random", "Reservation", "Price", "Availability", "Optimal", "Stable", "Run All"])
+    seed = st.sidebar.number_input("Random seed", min_value=0, value=0, step=1) # same seed, same random allocation
+    parallel = st.sidebar.checkbox("Run All in parallel", value=True) # one process per method
+    draws = st.sidebar.number_input("Random: Monte Carlo draws", min_value=0, value=0, step=100) # 0: single draw only
+    instrument = st.sidebar.checkbox("Instrumentation (time per phase)", value=False)
+    trace_memory = st.sidebar.checkbox("Trace memory peaks (slower)", value=False, disabled=not instrument)
+    
+    # Opt-in instrumentation: while it is off, the instrumented code paths record nothing
+    instrumentation = get_instrumentation()
+    if instrument:
+        instrumentation.enable(trace_memory)
+    else:
+        instrumentation.disable()
+    
+    # The dataset is loaded on first use and kept by the registry across reruns (importing the modules does not load anything).
+    # Results are cached by dataset fingerprint, method and seed: revisiting a method on the same data is instant.
+    dataset = get_dataset()
+    manager = HotelManager.from_data(dataset.data, seed=int(seed), cache=get_result_cache())
     
     if st.sidebar.button("Run Allocation"):
         if allocation_method == "Run All":
-            manager.run_all_methods() # function from Hotel_Manager class to run all methods
+            manager.run_all_methods(parallel=parallel) # function from Hotel_Manager class to run all methods
             st.write("All methods executed. Check the visualizations below.")
 
             # Display the statistics in a table format: create a DataFrame for statistics
@@ -65,7 +83,9 @@ if __name__ == "__main__":
                 "Random": manager.run_random_allocation,
                 "Reservation": manager.run_reservation_allocation,
                 "Price": manager.run_price_allocation,
-                "Availability": manager.run_availability_allocation
+                "Availability": manager.run_availability_allocation,
+                "Optimal": manager.run_optimal_allocation,
+                "Stable": manager.run_stable_allocation
             }
             if allocation_method in method_mapping: # additional check
                 result = method_mapping[allocation_method]() # store result of the corresponding function
@@ -73,7 +93,7 @@ if __name__ == "__main__":
                 # Allocation report
                 st.subheader(f"{allocation_method} Allocation Report")
                 allocation_report = result.get('allocation_report', None) # extracts the allocation_report of the selected method
-                st.dataframe(allocation_report)  # Directly display the DataFrame.
+                st.dataframe(allocation_report, column_config={'Revenue ($)': st.column_config.NumberColumn(format="$%.2f")})  # Directly display the DataFrame (revenue stays numeric, formatted here).
                 
                 # Overall statistics
                 st.subheader(f"{allocation_method} Statistics")
@@ -82,14 +102,31 @@ if __name__ == "__main__":
                 st.write(f"Occupied Hotels Count: {result['statistics']['occupied_hotels_count']}")
                 st.write(f"Average Revenue: {result['statistics']['average_revenue']}")
                 
-                # Visualizations
+                # Distribution of the random statistics over many seeded draws
+                if allocation_method == "Random" and draws > 0:
+                    st.subheader(f"Random Statistics over {int(draws)} Draws")
+                    st.table(pd.DataFrame.from_dict(manager.run_random_monte_carlo(int(draws)), orient='index'))
+                
+                # Visualizations: PNGs rendered on request, cached between reruns
                 st.subheader(f"{allocation_method} Allocation Visualizations")
-                plots = result.get('plots', [])
+                plots = manager.plot(allocation_method)
                 if plots:
-                    for fig in plots:
-                        st.pyplot(fig)
+                    for png in plots:
+                        st.image(png)
                 else:
                     st.write("No visualizations available for this method.") # additional check
-                    
-                    
-        
+
+    # Instrumentation panel: time (and memory peak) of each phase of each method, accumulated over the runs
+    if instrument:
+        st.subheader("Instrumentation")
+        breakdown = instrumentation.to_frame()
+        if len(breakdown) > 0:
+            st.dataframe(breakdown)
+            phases = breakdown[breakdown['phase'] != 'total']
+            st.bar_chart(phases.pivot_table(index='method', columns='phase', values='seconds', aggfunc='sum'))
+            st.table(pd.DataFrame.from_dict(instrumentation.to_dict()['counters'], orient='index'))
+            st.download_button("Download JSON", instrumentation.to_json(), file_name="instrumentation.json")
+        else:
+            st.write("Nothing recorded yet: run an allocation.")
+        if st.button("Reset instrumentation"):
+            instrumentation.reset()
@@ -1,13 +1,9 @@
-import pandas as pd
-from src.Guests_Hotels_Dictionaries.Guests import guests_dict_original
-from src.Guests_Hotels_Dictionaries.Hotels import hotels_dict_original
-from src.Data_Visualization.individual_visualization import (
-    plot_revenue_distribution,
-    plot_guest_satisfaction_distribution,
-    plot_guests_per_hotel,
-    group_hotels_by_rooms,
-    plot_revenue_by_room_category
-)
+import numpy as np
+from src.Columnar_Core.Allocation_Data import AllocationData
+from src.Columnar_Core.Allocation_Result import build_allocation_result
+from src.Columnar_Core.Preference_Rank import preference_positions, satisfaction_scores
+from src.Columnar_Core.Ranked_Allocation import hotel_rank, ranked_allocation
+from src.Instrumentation import phase
 
 def availability_allocation(guests_dict_original, hotels_dict_original):
     """
@@ -18,123 +14,57 @@ def availability_allocation(guests_dict_original, hotels_dict_original):
      - Allocation report (dictionary): for each hotel, number of rooms occupied, rooms available, total revenue, list of guests allocated.
      - Unassigned guests (count and list).
      - Overall statistics (dictionary): count of assigned guests, avg satisfaction, couhnt of occupied hotels, avg revenue.
+    Hotels with the same number of available rooms are offered in dataset order.
     """
-    # Make copies of the dictionaries to prevent the function from modifying the originals
-    guests_dict = guests_dict_original.copy()  # Copy the guest dictionary
-    hotels_dict = {k: v.copy() for k, v in hotels_dict_original.items()}  # Deep copy of the hotels dictionary
+    data = AllocationData.from_dicts(guests_dict_original, hotels_dict_original)
     
-    # Sort hotels by available rooms in descending order (starting from most roomy)
-    hotels_df = pd.DataFrame(hotels_dict).T  
-    sorted_hotels = hotels_df.sort_values(by='available_rooms', ascending=False).index  
+    # Rank hotels by available rooms in descending order (starting from most roomy) with hotel_rank; stable: hotels
+    # with the same number of rooms are offered in dataset order, where the former pandas quicksort left it unspecified.
+    # Allocate guests in reservation order with the kernel shared with the other ranked method: preferred hotels first
+    # (in availability order), otherwise the most roomy hotel with rooms left (satisfaction penalty of 0.1)
+    result = availability_allocation_columnar(data)
     
-    # Store statistics: result of the allocation, initialize hotel occupancy, revenue per guest, satisfaction score per guest.
-    allocation = {}
-    hotel_occupancy = {hotel_id: {'occupied_rooms': 0, 'guests': []} for hotel_id in hotels_dict}
-    guest_revenues = {}  
-    guest_satisfaction = {}  
-    
-    # Process guests in ID order (reservation order): sort by guest_id, retrieve preferences list and discount rate.
-    for guest_id, guest_info in sorted(guests_dict.items()): 
-        preferences = guest_info['preferences'] 
-        discount = guest_info.get('discount', 0) 
-        allocated = False
-        
-        # Considering sorted hotels in order of price, allocate each guest to a preferred hotel with available rooms
-        # If a match is found, the room is allocated, hotel stats are updated, and guest satisfaction is calculated.
-        for hotel_id in sorted_hotels:
-            if hotel_id in preferences and hotels_dict[hotel_id]['available_rooms'] > 0:
-                
-                allocation[guest_id] = hotel_id
-                hotels_dict[hotel_id]['available_rooms'] -= 1
-                hotel_occupancy[hotel_id]['occupied_rooms'] += 1
-                hotel_occupancy[hotel_id]['guests'].append(guest_id)  # Track guests allocated to this hotel
-                
-                # Revenue of the hotel for this guest
-                discounted_price = hotels_dict[hotel_id]['price'] * (1 - discount)
-                guest_revenues[guest_id] = discounted_price  # Store revenue per guest
-                
-                guest_satisfaction[guest_id] = round((len(preferences) - preferences.index(hotel_id)) / len(preferences), 2)  # Higher score for better match
-
-                allocated = True
-                break  # Stop and move to the next guest once allocated
-   
-        # If no hotel in preferences has available rooms, allocate based on availability order.
-        # In this case, guests' satisfaction scores suffer a penalty for being allocated outside preferences.
-        if not allocated:
-            for hotel_id in sorted_hotels:
-                if hotels_dict[hotel_id]['available_rooms'] > 0:
-                    # Allocate the guest to the hotel with the most available rooms
-                    allocation[guest_id] = hotel_id
-                    hotels_dict[hotel_id]['available_rooms'] -= 1
-                    hotel_occupancy[hotel_id]['occupied_rooms'] += 1
-                    hotel_occupancy[hotel_id]['guests'].append(guest_id)
-                    guest_satisfaction[guest_id] = 0.1
-
-                    allocated = True
-                    break
-        
-        # Guests not allocated any room receive a satisfaction score of 0       
-        if not allocated:
-            guest_satisfaction[guest_id] = 0  
-            guest_revenues[guest_id] = 0
-
-    # Stats for assigned unassigned guests: count and list.
-    unassigned_count = len([guest_id for guest_id in guests_dict if guest_id not in allocation]) 
-    unassigned_guests = [guest_id for guest_id in guests_dict if guest_id not in allocation]  
-    total_assigned_guests = len(allocation)  
-
-    # Stats for hotel report (calculated for each hotel after the allocation process)
-    availability_allocation_report = {}
-
-    for hotel_id, data in hotels_dict.items():
-        occupied_rooms = hotel_occupancy[hotel_id]['occupied_rooms']
-        guests = hotel_occupancy[hotel_id]['guests']
-        final_revenue = sum(guest_revenues.get(guest_id, 0) for guest_id in guests)
-        
-        availability_allocation_report[hotel_id] = {
-            'rooms_occupied': occupied_rooms,
-            'rooms_available': data['available_rooms'],
-            'number_of_guests_accommodated': len(guests),
-            'revenue': round(final_revenue, 2),
-            'guests': guests
-        }
-    
-    # Total and average revenue of the allocation method
-    total_revenues = sum(details['revenue'] for details in availability_allocation_report.values())
-    occupied_hotels_count = sum(1 for details in availability_allocation_report.values() if details['number_of_guests_accommodated'] > 0)
-    average_revenue = round(total_revenues / occupied_hotels_count, 2) if occupied_hotels_count > 0 else 0  # Avoid division by zero
-    
-    # Satisfaction score
-    total_satisfaction_score = sum(guest_satisfaction.values())
-    average_satisfaction_score = round(total_satisfaction_score / len(guests_dict), 2)  # Include unassigned guests to penalize the score
+    # Allocation dictionary (guest_id -> hotel_id), in reservation order
+    assignment = result['assignment']
+    assigned = data.reservation_order[assignment[data.reservation_order] >= 0]
+    result['allocation'] = dict(zip(data.guest_dictionary.decode(assigned).tolist(), data.hotel_dictionary.decode(assignment[assigned]).tolist()))
+    return result
 
-    statistics = {
-        'assigned_guests_count': total_assigned_guests,
-        'average_satisfaction_score': average_satisfaction_score,
-        'occupied_hotels_count': occupied_hotels_count,
-        'average_revenue': average_revenue
-    }
-    
-    df_grouped = group_hotels_by_rooms(availability_allocation_report, hotels_dict_original)
+def availability_allocation_columnar(data, rank=None):
+    """
+    Same allocation as availability_allocation, computed on the columnar data model (src/Columnar_Core).
+    ## Parameters: 
+     - AllocationData object: hotels, guests and preferences arrays.
+     - rank (optional): hotel codes in allocation order (by default, computed from the data).
+    ## Returns:
+     - Same keys as availability_allocation, with 'assignment' (hotel code of each guest, -1 if unassigned) 
+       and 'guest_satisfaction' (score of each guest) arrays instead of the allocation dictionary.
+    """
+    # Hotels ranked by available rooms in descending order (starting from most roomy)
+    rank = hotel_rank(data.rooms, descending=True) if rank is None else rank
+    assignment, rooms_left = ranked_allocation(data, rank)
+    return availability_allocation_result(data, assignment, rooms_left)
 
-    # Generate visualizations
-    fig1 = plot_revenue_distribution(availability_allocation_report)
-    fig2 = plot_guest_satisfaction_distribution(guest_satisfaction)
-    fig3 = plot_guests_per_hotel(availability_allocation_report)
-    fig4 = plot_revenue_by_room_category(df_grouped)
-    
-    # Return results for allocation, guests, and hotels
-    return {
-        'allocation': allocation,
-        'unassigned_guests': unassigned_guests,
-        'unassigned_count': unassigned_count,
-        'allocation_report': availability_allocation_report,
-        'statistics': statistics,
-        'plots': [fig1, fig2, fig3, fig4]
-    }
+def availability_allocation_result(data, assignment, rooms_left):
+    """
+    Report, statistics and per-guest arrays of an availability allocation, from its assignment
+    (also used by the incremental allocator, which maintains the assignment itself).
+    """
+    with phase('statistics'):
+        # Satisfaction from the preference rank lookup, with a penalty of 0.1 outside the preferences.
+        # Revenue is recorded for the guests allocated to one of their preferred hotels.
+        positions = preference_positions(data, assignment)
+        guest_satisfaction = satisfaction_scores(data, assignment, outside_score=0.1, positions=positions)
+        preferred = np.flatnonzero(positions >= 0)
+        guest_revenues = np.zeros(data.num_guests)
+        guest_revenues[preferred] = data.price[assignment[preferred]] * (1 - data.discount[preferred])
+    result = build_allocation_result(data, rooms_left, assignment, data.reservation_order, guest_satisfaction, guest_revenues)
     
-# Store the function
-availability_allocation_result = availability_allocation(guests_dict_original, hotels_dict_original)
+    result.update({
+        'assignment': assignment,
+        'guest_satisfaction': guest_satisfaction
+    })
+    return result
 
 # Needed to pass the report to the main file
 def printed_availability_allocation_report(availability_allocation_result):
@@ -0,0 +1,335 @@
+from bisect import bisect_left, bisect_right, insort
+import numpy as np
+
+from src.Allocation_Methods.Availability_Allocation import availability_allocation_result
+from src.Allocation_Methods.Price_Allocation import price_allocation_result
+from src.Allocation_Methods.Reservation_Allocation import reservation_allocation_columnar, reservation_allocation_result
+from src.Columnar_Core.Allocation_Data import AllocationData
+from src.Columnar_Core.Ranked_Allocation import hotel_rank, ranked_allocation
+
+"""
+Incremental allocator for the strategies that serve guests in reservation order (reservation, price, availability).
+After the first full run, a change (cancellation, rooms added or removed, late booking, price change) only repairs
+the guests it affects, and the allocation is always the one a full rerun on the changed data would give.
+
+Each of these strategies gives every guest the first hotel of a personal list that still has rooms when the guest
+is served: the preferred hotels (re-ordered by hotel rank for price and availability), followed for price and
+availability by every hotel in rank order (the fallback). So:
+- a room freed in hotel h at guest k (cancellation, move, added room) goes to the first guest after k who lists h
+  before their current hotel (or is unassigned); that guest frees their old room in turn, and so on along the chain;
+- a room taken in a full hotel h (late booking, removed room) pushes out the last guest of h, who is served again
+  and may push out the last guest of their new hotel, and so on.
+Both chains only move forward in reservation order. For the reservation strategy they stop after a few steps;
+for price and availability, a room freed in a cheap (or roomy) hotel can move many fallback guests one hotel up.
+Every repair therefore has a work budget (guests and hotels examined): past it, the strategy is re-run instead,
+so a change never costs much more than a full rerun.
+The occupants of each hotel are kept sorted by guest ID (= reservation order), so the rooms a hotel had left when a
+guest was served are a binary search away.
+A change that alters the hotel rank (a price change for price, a room change for availability) re-runs the strategy.
+"""
+
+STRATEGIES = ('reservation', 'price', 'availability')
+NOT_LISTED = float('inf')
+
+
+class RepairTooLong(Exception):
+    """A repair exceeded its work budget: the strategy is re-run instead."""
+
+
+class IncrementalAllocation:
+    def __init__(self, data, strategy='reservation', work_limit=None):
+        """
+        Runs the strategy once on data and keeps the state needed to repair it.
+
+        Parameters:
+        data (AllocationData): the dataset.
+        strategy (str): 'reservation', 'price' or 'availability'.
+        work_limit (int, optional): work budget of a repair, in guests and hotels examined
+        (default: a tenth of the number of guests, at least 1000).
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"strategy must be one of {STRATEGIES}, not {strategy!r}")
+        self.strategy = strategy
+        self.ranked = strategy != 'reservation' # price and availability: ranked preferences and fallback
+        self.hotel_ids = data.hotel_ids.tolist()
+        self.hotel_codes = {hotel_id: code for code, hotel_id in enumerate(self.hotel_ids)}
+        self.work_limit = work_limit
+        self.reruns = 0 # number of changes that were applied with a full rerun
+        self._build(data)
+
+    # --- state -----------------------------------------------------------------------------------------------------
+
+    def _rank(self):
+        if self.strategy == 'price':
+            return hotel_rank(self.price)
+        if self.strategy == 'availability':
+            return hotel_rank(self.capacity, descending=True)
+        return np.arange(len(self.capacity))
+
+    def _build(self, data):
+        """(Re)builds the whole state from a full run of the strategy on data."""
+        self.capacity = data.rooms.tolist()
+        self.price = data.price.tolist()
+        self.rank = self._rank().tolist()
+        self.rank_position = [0] * len(self.rank)
+        for position, hotel in enumerate(self.rank):
+            self.rank_position[hotel] = position
+
+        if self.ranked:
+            assignment, _ = ranked_allocation(data, np.array(self.rank))
+        else:
+            assignment = reservation_allocation_columnar(data)['assignment']
+        assignment = assignment.tolist()
+
+        offsets, pref_hotels = data.pref_offsets.tolist(), data.pref_hotels.tolist()
+        self.guest_ids = data.guest_ids.tolist() # guest codes of the next result (None: cancelled)
+        self.guest_codes = {guest_id: code for code, guest_id in enumerate(self.guest_ids)}
+        self.discount = {}
+        self.preferences = {} # guest ID -> hotel codes in priority order (-1: unknown hotel)
+        self.choices = {} # guest ID -> known preferred hotels, in the order the strategy tries them
+        self.assigned = {}
+        self.occupants = [[] for _ in self.hotel_ids] # guest IDs of each hotel, sorted (= reservation order)
+        self.listers = [[] for _ in self.hotel_ids] # guest IDs listing each hotel, sorted
+        self.outside = [] # ranked strategies: guest IDs not in one of their preferred hotels, sorted
+        self._budget = self.work_limit if self.work_limit is not None else max(1000, data.num_guests // 10)
+        self._work = 0
+
+        for guest in data.reservation_order.tolist():
+            guest_id = self.guest_ids[guest]
+            self.discount[guest_id] = float(data.discount[guest])
+            self._add_guest(guest_id, pref_hotels[offsets[guest]:offsets[guest + 1]], append=True)
+            self._place(guest_id, assignment[guest], append=True)
+
+    def _add_guest(self, guest_id, preferences, append=False):
+        self.preferences[guest_id] = preferences
+        choices = [hotel for hotel in preferences if hotel >= 0]
+        if self.ranked:
+            choices.sort(key=self.rank_position.__getitem__) # stable: duplicates keep their order
+        self.choices[guest_id] = choices
+        for hotel in set(choices):
+            self._insert(self.listers[hotel], guest_id, append)
+
+    def _remove_guest(self, guest_id):
+        for hotel in set(self.choices[guest_id]):
+            self._delete(self.listers[hotel], guest_id)
+        del self.preferences[guest_id], self.choices[guest_id], self.discount[guest_id]
+
+    @staticmethod
+    def _insert(sorted_ids, guest_id, append=False):
+        if append: # initial build: guests come in reservation order
+            sorted_ids.append(guest_id)
+        else:
+            insort(sorted_ids, guest_id)
+
+    @staticmethod
+    def _delete(sorted_ids, guest_id):
+        del sorted_ids[bisect_left(sorted_ids, guest_id)]
+
+    def _place(self, guest_id, hotel, append=False):
+        self.assigned[guest_id] = hotel
+        if hotel >= 0:
+            self._insert(self.occupants[hotel], guest_id, append)
+        if self.ranked and (hotel < 0 or hotel not in self.choices[guest_id]):
+            self._insert(self.outside, guest_id, append)
+
+    def _unplace(self, guest_id):
+        hotel = self.assigned.pop(guest_id)
+        if hotel >= 0:
+            self._delete(self.occupants[hotel], guest_id)
+        if self.ranked and (hotel < 0 or hotel not in self.choices[guest_id]):
+            self._delete(self.outside, guest_id)
+        return hotel
+
+    # --- allocation rules ------------------------------------------------------------------------------------------
+
+    def _spend(self, work=1):
+        self._work += work
+        if self._work > self._budget:
+            raise RepairTooLong()
+
+    def _rooms_at(self, hotel, guest_id):
+        """Rooms left in hotel when guest_id is served (the guest must not be among its occupants)."""
+        return self.capacity[hotel] - bisect_left(self.occupants[hotel], guest_id)
+
+    def _decide(self, guest_id):
+        """Hotel the strategy gives to a guest (not placed yet), given the guests served before them (-1: none)."""
+        for hotel in self.choices[guest_id]:
+            if self._rooms_at(hotel, guest_id) > 0:
+                return hotel
+        if self.ranked:
+            # The hotels ranked before the fallback hotel of the previous guest outside their preferences were full
+            # when that guest was served, so they are full now: the search starts from there
+            index = bisect_left(self.outside, guest_id)
+            start = self._fallback_position(self.outside[index - 1]) if index > 0 else 0
+            if start == NOT_LISTED:
+                return -1
+            for position in range(start, len(self.rank)):
+                self._spend()
+                hotel = self.rank[position]
+                if self._rooms_at(hotel, guest_id) > 0:
+                    return hotel
+        return -1
+
+    def _list_position(self, guest_id, hotel):
+        """Position of a hotel in the personal list of a guest (NOT_LISTED if the guest never takes it)."""
+        if hotel < 0:
+            return NOT_LISTED
+        choices = self.choices[guest_id]
+        if hotel in choices:
+            return choices.index(hotel)
+        return len(choices) + self.rank_position[hotel] if self.ranked else NOT_LISTED
+
+    def _fallback_position(self, guest_id):
+        """Rank position of the hotel of a guest outside their preferences (NOT_LISTED if unassigned)."""
+        hotel = self.assigned[guest_id]
+        return self.rank_position[hotel] if hotel >= 0 else NOT_LISTED
+
+    def _first_wanter(self, hotel, after):
+        """First guest after `after` (None: from the start) who would take a free room of hotel."""
+        found = None
+        # Guests listing the hotel among their preferences, and holding a worse hotel (or none)
+        listers = self.listers[hotel]
+        for index in range(0 if after is None else bisect_right(listers, after), len(listers)):
+            guest_id = listers[index] # no slicing: the lists can hold most of the guests
+            self._spend()
+            if (self._list_position(guest_id, hotel) < self._list_position(guest_id, self.assigned[guest_id])
+                    and self._rooms_at(hotel, guest_id) > 0):
+                found = guest_id
+                break
+        if self.ranked:
+            # Guests outside their preferences take the first hotel in rank order with rooms left, and hotels only
+            # fill up as guests are served: their rank positions never decrease in reservation order. The first one
+            # holding a hotel ranked after this one (or none) is found with a binary search.
+            self._spend()
+            start = 0 if after is None else bisect_right(self.outside, after)
+            index = bisect_right(self.outside, self.rank_position[hotel], lo=start, key=self._fallback_position)
+            # Rooms left only decrease in reservation order: if that guest finds no room, no later guest does
+            if (index < len(self.outside) and (found is None or self.outside[index] < found)
+                    and self._rooms_at(hotel, self.outside[index]) > 0):
+                found = self.outside[index]
+        return found
+
+    def _free_room(self, hotel, after=None):
+        """
+        A room of hotel became free for the guests after `after`: moves guests along the vacancy chain.
+        Returns False if nobody takes the room.
+        """
+        moved = False
+        while True:
+            guest_id = self._first_wanter(hotel, after)
+            if guest_id is None:
+                return moved
+            moved = True
+            previous = self._unplace(guest_id)
+            self._place(guest_id, hotel)
+            if previous < 0:
+                return moved
+            hotel, after = previous, guest_id
+
+    def _overflowing(self, hotel):
+        return len(self.occupants[hotel]) > max(self.capacity[hotel], 0)
+
+    def _resolve_overflow(self, hotel):
+        """Hotel has more occupants than rooms: its last guests are served again, along the push-out chain."""
+        while self._overflowing(hotel):
+            current = hotel
+            while current >= 0 and self._overflowing(current):
+                guest_id = self.occupants[current][-1]
+                self._unplace(guest_id)
+                current = self._decide(guest_id)
+                self._place(guest_id, current)
+
+    def _rerun(self):
+        # Only the data (guests, preferences, rooms, prices) is needed: an interrupted repair leaves nothing behind
+        self.reruns += 1
+        self._build(self.data())
+
+    def _repair(self, repair, *args):
+        """Runs a repair within the work budget, or re-runs the strategy if it takes too long."""
+        self._work = 0
+        try:
+            repair(*args)
+        except RepairTooLong:
+            self._rerun()
+
+    # --- changes ---------------------------------------------------------------------------------------------------
+
+    def cancel(self, guest_id):
+        """Removes a guest (cancellation); their room goes along the vacancy chain."""
+        hotel = self._unplace(guest_id)
+        self._remove_guest(guest_id)
+        self.guest_ids[self.guest_codes.pop(guest_id)] = None
+        if hotel >= 0:
+            self._repair(self._free_room, hotel, guest_id)
+
+    def book(self, guest_id, preferences, discount=0):
+        """
+        Adds a late booking. Its place in reservation order is given by its ID, as for every guest.
+
+        Parameters:
+        guest_id (str): ID of the new guest (must not exist yet).
+        preferences (list): hotel IDs in priority order.
+        discount (float): discount of the guest.
+        """
+        if guest_id in self.guest_codes:
+            raise ValueError(f"Guest {guest_id} already exists")
+        self.guest_codes[guest_id] = len(self.guest_ids)
+        self.guest_ids.append(guest_id)
+        self.discount[guest_id] = float(discount)
+        self._add_guest(guest_id, [self.hotel_codes.get(hotel_id, -1) for hotel_id in preferences])
+        self._repair(self._place_new_guest, guest_id)
+
+    def _place_new_guest(self, guest_id):
+        hotel = self._decide(guest_id)
+        self._place(guest_id, hotel)
+        if hotel >= 0:
+            self._resolve_overflow(hotel)
+
+    def _add_free_rooms(self, hotel, rooms):
+        # Only the rooms that are actually free (beyond the current occupants) can be taken
+        for _ in range(min(rooms, max(0, self.capacity[hotel] - len(self.occupants[hotel])))):
+            if not self._free_room(hotel): # nobody wants the first new room: nobody wants the next ones
+                break
+
+    def add_rooms(self, hotel_id, rooms):
+        """Adds rooms to a hotel (or removes them, with a negative number: a hotel cannot have fewer than 0 rooms)."""
+        hotel = self.hotel_codes[hotel_id]
+        if self.capacity[hotel] + rooms < 0:
+            raise ValueError(f"Hotel {hotel_id} has {self.capacity[hotel]} rooms: cannot remove {-rooms}")
+        self.capacity[hotel] += rooms
+        if self.strategy == 'availability' and self._rank().tolist() != self.rank:
+            self._rerun() # the hotel moved in the availability order
+        elif rooms > 0:
+            self._repair(self._add_free_rooms, hotel, rooms)
+        else:
+            self._repair(self._resolve_overflow, hotel)
+
+    def set_price(self, hotel_id, price):
+        """Changes the price of a hotel (only the price strategy re-allocates, if the hotel moves in price order)."""
+        self.price[self.hotel_codes[hotel_id]] = price
+        if self.strategy == 'price' and self._rank().tolist() != self.rank:
+            self._rerun()
+
+    # --- results ---------------------------------------------------------------------------------------------------
+
+    def hotel_of(self, guest_id):
+        """Hotel ID of a guest (None if unassigned)."""
+        hotel = self.assigned[guest_id]
+        return self.hotel_ids[hotel] if hotel >= 0 else None
+
+    def data(self):
+        """The current dataset: remaining guests in their original order, then late bookings."""
+        guest_ids = [guest_id for guest_id in self.guest_ids if guest_id is not None]
+        lengths = [len(self.preferences[guest_id]) for guest_id in guest_ids]
+        return AllocationData(guest_ids, [self.discount[guest_id] for guest_id in guest_ids], self.hotel_ids,
+                              self.capacity, self.price, np.concatenate(([0], np.cumsum(lengths, dtype=np.int64))),
+                              [hotel for guest_id in guest_ids for hotel in self.preferences[guest_id]])
+
+    def result(self):
+        """Report, statistics and per-guest arrays of the current allocation, as the columnar method returns them."""
+        data = self.data()
+        assignment = np.array([self.assigned[guest_id] for guest_id in data.guest_ids.tolist()], dtype=np.int32)
+        rooms_left = np.array(self.capacity, dtype=np.int64) - np.array([len(guests) for guests in self.occupants], dtype=np.int64)
+        result_function = {'reservation': reservation_allocation_result, 'price': price_allocation_result,
+                           'availability': availability_allocation_result}[self.strategy]
+        return result_function(data, assignment, rooms_left)
@@ -0,0 +1,153 @@
+import numpy as np
+from src.Columnar_Core.Allocation_Data import AllocationData
+from src.Columnar_Core.Allocation_Result import build_allocation_result
+from src.Columnar_Core.Preference_Rank import preference_positions, preference_scores, satisfaction_scores
+from src.Instrumentation import phase
+
+"""
+Concept:
+- The other methods are greedy: guests are served one at a time and keep their hotel. This method finds the allocation
+  with the highest total satisfaction (or total revenue) over all guests at once, subject to the hotel capacities,
+  as a reference to measure how far the greedy methods are from the best possible allocation.
+- Guests are only allocated to one of their preferred hotels (no fallback to a non-preferred hotel), or stay unassigned.
+Formulation (a linear program, i.e. a min-cost flow from guests to hotels):
+- one variable x per (guest, preferred hotel) pair of the preferences sheet, between 0 and 1: the number of variables
+  is the number of preference rows, never guests x hotels;
+- each guest takes at most one room: sum of x over the guest's pairs <= 1;
+- each hotel hosts at most its available rooms: sum of x over the hotel's pairs <= rooms;
+- maximize sum of weight * x, where the weight of a pair is the satisfaction score of the guest in that hotel
+  ('satisfaction') or the price they would pay, price * (1 - discount) ('revenue').
+The constraint matrix is the incidence matrix of a bipartite graph (totally unimodular), so the simplex method returns
+an integral solution: every x is 0 or 1, and the allocation is exactly optimal (not a rounded approximation).
+Satisfaction and revenue of each guest are then computed as in the greedy methods.
+"""
+
+OBJECTIVES = ('satisfaction', 'revenue')
+
+def optimal_allocation(guests_dict_original, hotels_dict_original, objective='satisfaction'):
+    """
+    ## Parameters:
+     - Dictionary containing guests information: guest_id, discount, preferences list.
+     - Dictionary containing hotels information: hotel_id, available_rooms, price.
+     - objective: 'satisfaction' (maximize the total satisfaction score) or 'revenue' (maximize the total revenue).
+    ## Returns a dictionary:
+     - Allocation: guest_id -> hotel, price paid and discount, in reservation order.
+     - Unassigned guests (count and list).
+     - Allocation report: for each hotel, number of rooms occupied, rooms available, total revenue, list of guests allocated.
+     - Overall statistics: count of assigned guests, avg satisfaction, count of occupied hotels, avg revenue.
+    """
+    data = AllocationData.from_dicts(guests_dict_original, hotels_dict_original)
+    result = optimal_allocation_columnar(data, objective)
+
+    assignment = result['assignment']
+    assigned = data.reservation_order[assignment[data.reservation_order] >= 0]
+    result['allocation'] = {
+        guest_id: {'hotel': hotel_id, 'price': price, 'discount': discount}
+        for guest_id, hotel_id, price, discount in zip(data.guest_dictionary.decode(assigned).tolist(), data.hotel_dictionary.decode(assignment[assigned]).tolist(),
+                                                       result['guest_revenues'][assigned].tolist(), data.discount[assigned].tolist())
+    }
+    return result
+
+def optimal_allocation_columnar(data, objective='satisfaction'):
+    """
+    Same allocation as optimal_allocation, computed on the columnar data model (src/Columnar_Core).
+    ## Parameters:
+     - AllocationData object: hotels, guests and preferences arrays.
+     - objective: 'satisfaction' or 'revenue'.
+    ## Returns:
+     - Same keys as optimal_allocation, with 'assignment' (hotel code of each guest, -1 if unassigned),
+       'guest_satisfaction' and 'guest_revenues' arrays instead of the allocation dictionary,
+       and 'objective_value' (total satisfaction or revenue of the allocation).
+    """
+    with phase('allocation loop'):
+        guests, hotels, weights = preference_edges(data, objective)
+        chosen = solve_assignment(guests, hotels, weights, data.num_guests, data.rooms)
+
+        assignment = np.full(data.num_guests, -1, dtype=np.int32)
+        assignment[guests[chosen]] = hotels[chosen]
+        rooms_left = data.rooms - np.bincount(hotels[chosen], minlength=data.num_hotels)
+    return optimal_allocation_result(data, assignment, rooms_left, objective)
+
+def preference_edges(data, objective='satisfaction'):
+    """
+    (guest, hotel) pairs of the preference lists and their weight in the objective.
+    Unknown hotels, hotels without rooms and repeated hotels (kept at their first position) are left out.
+
+    Returns:
+    tuple: (guest codes, hotel codes, weights) arrays, one entry per pair.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"objective must be one of {OBJECTIVES}, not {objective!r}")
+    rank = data.preference_rank # one entry per distinct known (guest, hotel) pair, with its position
+    guests, hotels = np.divmod(rank.keys, data.num_hotels)
+    positions = rank.positions
+    available = data.rooms[hotels] > 0
+    guests, hotels, positions = guests[available], hotels[available], positions[available]
+
+    if objective == 'satisfaction':
+        # Scores are hundredths (rounded to 2 decimals): integer weights keep the solver exact
+        weights = np.round(preference_scores(data.pref_lengths[guests], positions) * 100)
+    else:
+        weights = data.price[hotels] * (1 - data.discount[guests])
+    return guests, hotels, weights
+
+def solve_assignment(guests, hotels, weights, num_guests, rooms):
+    """
+    Maximum-weight allocation of guests to hotels over the given pairs (see the formulation above),
+    solved as a sparse linear program with the HiGHS dual simplex (scipy.optimize.linprog).
+
+    Parameters:
+    guests, hotels, weights (array): the candidate (guest, hotel) pairs and their weight.
+    num_guests (int): number of guests (guest codes are below it).
+    rooms (array): available rooms of each hotel.
+
+    Returns:
+    array: boolean mask of the chosen pairs.
+    """
+    from scipy.optimize import linprog
+    from scipy.sparse import csr_array
+
+    num_pairs = len(weights)
+    if num_pairs == 0:
+        return np.zeros(0, dtype=bool)
+    # One row per guest, then one row per hotel; each pair (column) appears in its guest row and its hotel row
+    rows = np.concatenate((guests, num_guests + hotels))
+    columns = np.tile(np.arange(num_pairs), 2)
+    constraints = csr_array((np.ones(2 * num_pairs), (rows, columns)), shape=(num_guests + len(rooms), num_pairs))
+    bounds = np.concatenate((np.ones(num_guests), rooms))
+
+    # Simplex returns a vertex of the polytope, which is integral here (see above): x is 0 or 1 up to tolerances
+    solution = linprog(-weights, A_ub=constraints, b_ub=bounds, bounds=(0, 1), method='highs-ds')
+    if solution.status != 0:
+        raise RuntimeError(f"Optimal allocation failed: {solution.message}")
+    chosen = solution.x > 0.5
+    if (np.abs(solution.x - chosen) > 1e-6).any():
+        raise RuntimeError("Optimal allocation failed: the solver returned a fractional solution")
+    return chosen
+
+def optimal_allocation_result(data, assignment, rooms_left, objective='satisfaction'):
+    """Report, statistics and per-guest arrays of an optimal allocation, from its assignment."""
+    with phase('statistics'):
+        # Every assigned guest is in one of their preferred hotels: satisfaction from the preference rank lookup
+        positions = preference_positions(data, assignment)
+        guest_satisfaction = satisfaction_scores(data, assignment, positions=positions)
+        assigned = np.flatnonzero(assignment >= 0)
+        guest_revenues = np.zeros(data.num_guests)
+        guest_revenues[assigned] = data.price[assignment[assigned]] * (1 - data.discount[assigned])
+
+    result = build_allocation_result(data, rooms_left, assignment, data.reservation_order,
+                                     guest_satisfaction, guest_revenues)
+    objective_values = guest_satisfaction if objective == 'satisfaction' else guest_revenues
+    result.update({
+        'assignment': assignment,
+        'guest_satisfaction': guest_satisfaction,
+        'guest_revenues': guest_revenues,
+        'objective': objective,
+        'objective_value': round(float(objective_values.sum()), 2)
+    })
+    return result
+
+# Needed to pass the report to the main file
+def printed_optimal_allocation_report(optimal_allocation_result):
+    # Return the allocation report directly (as the other methods do)
+    return optimal_allocation_result.get('allocation_report', None)
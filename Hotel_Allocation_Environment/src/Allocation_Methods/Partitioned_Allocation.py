@@ -0,0 +1,173 @@
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from src.Allocation_Methods.Availability_Allocation import availability_allocation_result
+from src.Allocation_Methods.Price_Allocation import price_allocation_result
+from src.Allocation_Methods.Reservation_Allocation import reservation_allocation_result, reservation_assignment
+from src.Columnar_Core.Allocation_Data import AllocationData
+from src.Columnar_Core.Capacity_Index import CapacityIndex
+from src.Columnar_Core.Preference_Components import preference_components
+from src.Columnar_Core.Ranked_Allocation import hotel_rank, ranked_allocation
+from src.Columnar_Core.Shared_Data import SharedAllocationData, attach_shared_data
+from src.Instrumentation import phase
+
+"""
+Partitioned allocation: the preference graph is split into its connected components (Preference_Components.py),
+the components are grouped into one shard per worker (largest first, each to the least loaded shard), and the shards
+are allocated in parallel worker processes (the dataset is published once in shared memory, Shared_Data.py, and each
+worker receives the codes of its shard only). The shard assignments are merged into one assignment, from which the
+usual report and statistics are built (on the whole dataset, so sums keep the order of the sequential methods).
+- 'reservation': guests only ever take hotels of their preference list, so the components do not interact and the
+  result is exactly the one of reservation_allocation_columnar.
+- 'price' / 'availability': their fallback (first hotel in rank order with rooms left, over all hotels) crosses
+  components. It is deferred: each shard allocates the preferred hotels only, then the guests left without one get
+  the fallback hotels, in reservation order, in one sequential pass over the rooms left. Every guest who can get a
+  preferred hotel gets one before any fallback room is given ("preferred first"), whereas the sequential methods
+  interleave the fallback with the preferred allocations; results can differ when a fallback guest takes the last
+  room of a hotel that a later guest prefers.
+"""
+
+METHODS = ('reservation', 'price', 'availability')
+
+
+def assign_shards(component_sizes, num_shards):
+    """
+    Groups components into shards of similar total size (largest component first, to the least loaded shard).
+
+    Returns:
+    array: shard of each component.
+    """
+    shard_of_component = np.zeros(len(component_sizes), dtype=np.int64)
+    loads = [(0, shard) for shard in range(num_shards)]
+    for component in np.argsort(-np.asarray(component_sizes), kind='stable').tolist():
+        load, shard = heapq.heappop(loads)
+        shard_of_component[component] = shard
+        heapq.heappush(loads, (load + int(component_sizes[component]), shard))
+    return shard_of_component
+
+
+def shard_data(data, guests, hotels, guest_positions):
+    """
+    Sub-dataset of some guests and the hotels of their components, with local codes.
+    Guest IDs are the global guest codes, and the reservation order is the global one restricted to the shard.
+
+    Parameters:
+    data (AllocationData): the whole dataset.
+    guests, hotels (array): global codes of the guests and hotels of the shard, in increasing order.
+    guest_positions (array): position of each guest of the shard in the global reservation order.
+    """
+    local_hotel = np.full(data.num_hotels, -1, dtype=np.int32)
+    local_hotel[hotels] = np.arange(len(hotels))
+    lengths = data.pref_lengths[guests]
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+    # Preference entries of the shard's guests, gathered in guest order
+    entries = np.repeat(data.pref_offsets[guests] - offsets[:-1], lengths) + np.arange(offsets[-1])
+    pref_hotels = data.pref_hotels[entries]
+    pref_hotels = np.where(pref_hotels >= 0, local_hotel[np.maximum(pref_hotels, 0)], -1)
+    return AllocationData(guests, data.discount[guests], hotels, data.rooms[hotels], data.price[hotels],
+                          offsets, pref_hotels,
+                          reservation_order=np.argsort(guest_positions, kind='stable'))
+
+
+def allocate_shard(shard, method='reservation'):
+    """
+    Allocates one shard (preferred hotels only for 'price' and 'availability').
+    Returns the (assignment, rooms_left) arrays of the shard, in local codes.
+    """
+    if method == 'reservation':
+        return reservation_assignment(shard)
+    rank = hotel_rank(shard.price) if method == 'price' else hotel_rank(shard.rooms, descending=True)
+    return ranked_allocation(shard, rank, fallback=False)
+
+
+def allocate_shared_shard(spec, guests, hotels, guest_positions, method='reservation'):
+    """
+    Worker: builds its shard from the dataset published in shared memory (attach_shared_data) and allocates it.
+    Only the codes of the shard are sent to the worker, not the shard itself.
+    """
+    return allocate_shard(shard_data(attach_shared_data(spec), guests, hotels, guest_positions), method)
+
+
+def deferred_fallback(data, assignment, rooms_left, rank):
+    """
+    Fallback pass of the price and availability methods: the guests without a hotel, in reservation order, get the
+    first hotel in rank order with rooms left. Updates assignment and returns the rooms left.
+    """
+    capacity = CapacityIndex(rooms_left, rank)
+    unassigned = data.reservation_order[assignment[data.reservation_order] < 0]
+    for guest in unassigned.tolist():
+        hotel = capacity.first_available()
+        if hotel < 0:
+            break
+        capacity.take(hotel)
+        assignment[guest] = hotel
+    return capacity.rooms_left()
+
+
+def partitioned_allocation(data, method='reservation', max_workers=None):
+    """
+    Allocation of the components of the preference graph in parallel (see above).
+
+    Parameters:
+    data (AllocationData): the dataset.
+    method (str): 'reservation', 'price' or 'availability'.
+    max_workers (int, optional): worker processes, and number of shards (default: one per CPU; 1 runs in this process).
+
+    Returns:
+    dict: same keys as the columnar method, plus 'components' (number of components of the preference graph with
+    guests, size in guests of the largest one, and number of shards).
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}, not {method!r}")
+
+    with phase('partitioning'):
+        guest_component, hotel_component, num_components = preference_components(data)
+        # Work of a component: its guests and their preference entries
+        component_sizes = np.bincount(guest_component[guest_component >= 0], minlength=num_components)
+        component_entries = np.bincount(guest_component[guest_component >= 0],
+                                        weights=data.pref_lengths[guest_component >= 0], minlength=num_components)
+        num_shards = max(1, min(max_workers or os.cpu_count() or 1, int(np.count_nonzero(component_sizes))))
+        shard_of_component = assign_shards(component_sizes + component_entries, num_shards)
+        guest_shard = np.where(guest_component >= 0, shard_of_component[np.maximum(guest_component, 0)], -1)
+        hotel_shard = shard_of_component[hotel_component]
+
+        reservation_position = np.empty(data.num_guests, dtype=np.int64)
+        reservation_position[data.reservation_order] = np.arange(data.num_guests)
+        shard_codes = [(np.flatnonzero(guest_shard == shard), np.flatnonzero(hotel_shard == shard))
+                       for shard in range(num_shards)]
+
+    with phase('allocation loop'):
+        if num_shards <= 1:
+            outcomes = [allocate_shard(shard_data(data, guests, hotels, reservation_position[guests]), method)
+                        for guests, hotels in shard_codes]
+        else:
+            with SharedAllocationData(data) as shared, ProcessPoolExecutor(num_shards) as pool:
+                guests, hotels = zip(*shard_codes)
+                outcomes = list(pool.map(allocate_shared_shard, [shared.spec] * num_shards, guests, hotels,
+                                         [reservation_position[shard_guests] for shard_guests in guests],
+                                         [method] * num_shards))
+
+    # Merge: local codes back to global codes
+    assignment = np.full(data.num_guests, -1, dtype=np.int32)
+    rooms_left = data.rooms.copy()
+    for (guests, hotels), (shard_assignment, shard_rooms_left) in zip(shard_codes, outcomes):
+        assigned = shard_assignment >= 0
+        assignment[guests[assigned]] = hotels[shard_assignment[assigned]]
+        rooms_left[hotels] = shard_rooms_left
+
+    if method == 'reservation':
+        result = reservation_allocation_result(data, assignment, rooms_left)
+    else:
+        rank = hotel_rank(data.price) if method == 'price' else hotel_rank(data.rooms, descending=True)
+        with phase('fallback'):
+            rooms_left = deferred_fallback(data, assignment, rooms_left, rank)
+        result_function = price_allocation_result if method == 'price' else availability_allocation_result
+        result = result_function(data, assignment, rooms_left)
+
+    result['components'] = {
+        'count': int(np.count_nonzero(component_sizes)),
+        'largest_guests': int(component_sizes.max()) if num_components > 0 else 0,
+        'shards': num_shards
+    }
+    return result
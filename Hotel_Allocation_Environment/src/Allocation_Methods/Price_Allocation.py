@@ -1,13 +1,9 @@
-import pandas as pd
-from src.Guests_Hotels_Dictionaries.Guests import guests_dict_original
-from src.Guests_Hotels_Dictionaries.Hotels import hotels_dict_original
-from src.Data_Visualization.individual_visualization import (
-    plot_revenue_distribution,
-    plot_guest_satisfaction_distribution,
-    plot_guests_per_hotel,
-    group_hotels_by_price,
-    plot_guests_by_price_category
-)
+import numpy as np
+from src.Columnar_Core.Allocation_Data import AllocationData
+from src.Columnar_Core.Allocation_Result import build_allocation_result
+from src.Columnar_Core.Preference_Rank import preference_positions, satisfaction_scores
+from src.Columnar_Core.Ranked_Allocation import hotel_rank, ranked_allocation
+from src.Instrumentation import phase
 
 """
 Concept:
@@ -29,123 +25,55 @@ def price_allocation(guests_dict_original, hotels_dict_original):
      - Allocation report (dictionary): for each hotel, number of rooms occupied, rooms available, total revenue, list of guests allocated.
      - Unassigned guests (count and list).
      - Overall statistics (dictionary): count of assigned guests, avg satisfaction, couhnt of occupied hotels, avg revenue.
+    Hotels with the same price are offered in dataset order.
     """   
-    # Make copies of the dictionaries to prevent modifying the originals
-    guests_dict = guests_dict_original.copy()  # Copy the guest dictionary
-    hotels_dict = {k: v.copy() for k, v in hotels_dict_original.items()}  # Deep copy of the hotels dictionary
+    data = AllocationData.from_dicts(guests_dict_original, hotels_dict_original)
     
-    # 1: sort hotels by price using pandas
-    hotels_df = pd.DataFrame(hotels_dict).T  # Transpose to flip the dictionary
-    sorted_hotels = hotels_df.sort_values(by='price').index
+    # 1: rank hotels by price (hotel_rank, stable: hotels with the same price are offered in dataset order,
+    #    where the former pandas quicksort left their order unspecified)
+    # 2: allocate guests in reservation order with the kernel shared with the availability method (see Concept above)
+    result = price_allocation_columnar(data)
     
-    # Store statistics
-    allocation = {}
-    hotel_occupancy = {hotel_id: {'occupied_rooms': 0, 'guests': []} for hotel_id in hotels_dict}
-    guest_revenues = {} # revenue per guest
-    guest_satisfaction = {}  # satisfaction score for each guest
-    
-    # Step 2: Process guests in ID order
-    for guest_id, guest_info in sorted(guests_dict.items()): # sort guests by their ids: reservation order
-        preferences = guest_info['preferences'] # retrieve the preferences for each guest
-        discount = guest_info.get('discount', 0) # retrieve discount rate for each guest
-        allocated = False
-        
-        for hotel_id in sorted_hotels:
-            #Check that the hotel encountered in order of price is in preferences
-            if hotel_id in preferences and hotels_dict[hotel_id]['available_rooms'] > 0:
-                # Allocate room
-                allocation[guest_id] = hotel_id
-                hotels_dict[hotel_id]['available_rooms'] -= 1
-                hotel_occupancy[hotel_id]['occupied_rooms'] += 1
-                hotel_occupancy[hotel_id]['guests'].append(guest_id) # Track which guests were allocated to this hotel
-                    
-                # Revenue of the hotel for this guest
-                discounted_price = hotels_dict[hotel_id]['price'] * (1 - discount)
-                guest_revenues[guest_id] = discounted_price # store revenue per guest
-                    
-                # Satisfaction score
-                guest_satisfaction[guest_id] = round((len(preferences) - preferences.index(hotel_id)) / len(preferences), 2)  # Higher score for better match
-
-                allocated = True
-                break  # Stop and move to the next guest once allocated
-        
-        # If no hotel in preferences has available rooms, I allocate based on price
-        if not allocated:
-            for hotel_id in sorted_hotels:
-                if hotels_dict[hotel_id]['available_rooms'] > 0:
-                    # Allocate the guest to the cheapest available hotel
-                    allocation[guest_id] = hotel_id
-                    hotels_dict[hotel_id]['available_rooms'] -= 1
-                    hotel_occupancy[hotel_id]['occupied_rooms'] += 1
-                    hotel_occupancy[hotel_id]['guests'].append(guest_id)
-                    guest_satisfaction[guest_id] = 0.1 # Penalty for being allocated to a hotel outside the preferences
-
-                    allocated = True
-                    break
-                
-        if not allocated:
-            guest_satisfaction[guest_id] = 0  # No allocation = 0 satisfaction
-            guest_revenues[guest_id] = 0
-
-    # Stats for unassigned guests
-    unassigned_count = len([guest_id for guest_id in guests_dict if guest_id not in allocation]) #count how many guests were not assigned
-    unassigned_guests = [guest_id for guest_id in guests_dict if guest_id not in allocation] # list to order the ids of unassigned guests (one can see them also from the print)
-
-    # Hotel report
-    price_allocation_report = {}
-
-    for hotel_id, data in hotels_dict.items():
-        occupied_rooms = hotel_occupancy[hotel_id]['occupied_rooms']
-        guests = hotel_occupancy[hotel_id]['guests']
-        final_revenue = sum(guest_revenues.get(guest_id, 0) for guest_id in guests)
-        
-        price_allocation_report[hotel_id] = {
-            'rooms_occupied': occupied_rooms,
-            'rooms_available': data['available_rooms'],
-            'number_of_guests_accommodated': len(guests),
-            'revenue': round(final_revenue, 2),
-            'guests': guests
-        } 
-    
-    total_assigned_guests = len(allocation)  # Number of guests assigned to hotels
-
-    # Now I have all the details I need to compute total and average revenue
-    # Total and overall average revenue
-    total_revenues = sum(details['revenue'] for details in price_allocation_report.values())
-    occupied_hotels_count = sum(1 for details in price_allocation_report.values() if details['number_of_guests_accommodated'] > 0)
-    average_revenue = round(total_revenues / occupied_hotels_count, 2) if occupied_hotels_count > 0 else 0 # don't divide by 0
-    
-    # Satisfaction score
-    total_satisfaction_score = sum(guest_satisfaction.values())
-    average_satisfaction_score = round(total_satisfaction_score / len(guests_dict), 2) # I include unassigned guest to penalize the final score
+    # Allocation dictionary (guest_id -> hotel_id), in reservation order
+    assignment = result['assignment']
+    assigned = data.reservation_order[assignment[data.reservation_order] >= 0]
+    result['allocation'] = dict(zip(data.guest_dictionary.decode(assigned).tolist(), data.hotel_dictionary.decode(assignment[assigned]).tolist()))
+    return result
 
-    statistics = {
-        'assigned_guests_count': total_assigned_guests,
-        'average_satisfaction_score': average_satisfaction_score,
-        'occupied_hotels_count': occupied_hotels_count,
-        'average_revenue': average_revenue
-    }
-    
-    df_grouped = group_hotels_by_price(price_allocation_report, hotels_dict_original)
-
-    # Generate visualizations
-    fig1 = plot_revenue_distribution(price_allocation_report)
-    fig2 = plot_guest_satisfaction_distribution(guest_satisfaction)
-    fig3 = plot_guests_per_hotel(price_allocation_report)
-    fig4 = plot_guests_by_price_category(df_grouped)
+def price_allocation_columnar(data, rank=None):
+    """
+    Same allocation as price_allocation, computed on the columnar data model (src/Columnar_Core).
+    ## Parameters: 
+     - AllocationData object: hotels, guests and preferences arrays.
+     - rank (optional): hotel codes in allocation order (by default, computed from the data).
+    ## Returns:
+     - Same keys as price_allocation, with 'assignment' (hotel code of each guest, -1 if unassigned) 
+       and 'guest_satisfaction' (score of each guest) arrays instead of the allocation dictionary.
+    """
+    rank = hotel_rank(data.price) if rank is None else rank
+    assignment, rooms_left = ranked_allocation(data, rank)
+    return price_allocation_result(data, assignment, rooms_left)
 
-    # return the results for allocation, guests and hotels.
-    return{
-        'allocation': allocation,
-        'unassigned_guests': unassigned_guests,
-        'unassigned_count': unassigned_count,
-        'allocation_report': price_allocation_report,
-        'statistics': statistics,
-        'plots': [fig1, fig2, fig3, fig4]
-    }    
+def price_allocation_result(data, assignment, rooms_left):
+    """
+    Report, statistics and per-guest arrays of a price allocation, from its assignment
+    (also used by the incremental allocator, which maintains the assignment itself).
+    """
+    with phase('statistics'):
+        # Satisfaction from the preference rank lookup, with a penalty of 0.1 outside the preferences.
+        # Revenue is recorded for the guests allocated to one of their preferred hotels.
+        positions = preference_positions(data, assignment)
+        guest_satisfaction = satisfaction_scores(data, assignment, outside_score=0.1, positions=positions)
+        preferred = np.flatnonzero(positions >= 0)
+        guest_revenues = np.zeros(data.num_guests)
+        guest_revenues[preferred] = data.price[assignment[preferred]] * (1 - data.discount[preferred])
+    result = build_allocation_result(data, rooms_left, assignment, data.reservation_order, guest_satisfaction, guest_revenues)
     
-price_allocation_result = price_allocation(guests_dict_original, hotels_dict_original)
-
+    result.update({
+        'assignment': assignment,
+        'guest_satisfaction': guest_satisfaction
+    })
+    return result
 
 ## Needed to pass the report to the main file
 def printed_price_allocation_report(price_allocation_result):
@@ -1,142 +1,132 @@
 import numpy as np
-import random
-import seaborn as sns
-from src.Guests_Hotels_Dictionaries.Guests import guests_dict_original
-from src.Guests_Hotels_Dictionaries.Hotels import hotels_dict_original
-from src.Data_Visualization.individual_visualization import (
-    plot_revenue_distribution,
-    plot_guest_satisfaction_distribution,
-    plot_guests_per_hotel,
-)
-                
+from src.Columnar_Core.Allocation_Data import AllocationData
+from src.Columnar_Core.Allocation_Result import build_allocation_result
+from src.Columnar_Core.Preference_Rank import satisfaction_scores
+from src.Columnar_Core.Room_Sampler import RoomSampler
+from src.Instrumentation import phase
 
-def random_allocation(guests_dict_original, hotels_dict_original, verbose = False):
+"""
+Modes of the random allocation (guests are always served in a random order):
+- 'sampler' (default): each guest draws a hotel among the ones with rooms left, with an O(1) swap-remove sampler
+  (by='hotel': every hotel with rooms is equally likely, as in the original method; by='room': every free room is).
+- 'vectorized': all free rooms are expanded into slots and shuffled, and the i-th guest gets the i-th slot,
+  with array operations only. Every free room is equally likely, so this mode only supports by='room'.
+The seed feeds a numpy.random.Generator: the same seed gives the same allocation.
+"""
+
+def random_allocation(guests_dict_original, hotels_dict_original, verbose = False, mode = 'sampler', by = None, seed = None):
     """
     ## Parameters: 
      - Dictionary containing guests information: guest_id, discount, preferences list.
      - Dictionary containing hotels information: hotel_id, available_rooms, price.
-     - verbose = False: I do not want line 36 to be printed in the main.py.
+     - verbose = False: I do not want the "No more rooms available." message to be printed in the main.py.
+     - mode, by, seed: see the modes above.
     ## Returns a dictionary:
      - Allocation: for each hotel, number of rooms occupied, rooms available, total revenue, number and list of guests allocated.
      - Allocation report: includes values of 0 in occupied rooms, revenue and guests for non-allocated hotels.
      - Overall statistics: count of assigned guests, avg satisfaction, couhnt of occupied hotels, avg revenue.
     """   
-    # Make copies of the dictionaries to prevent modifying the originals
-    guests_dict = guests_dict_original.copy()  
-    hotels_dict = {k: v.copy() for k, v in hotels_dict_original.items()}  
-    
-    # 1: shuffle the list of guest IDs for randoma allocation (Numpy)
-    # 2: Dictionary to store allocation and satisfaction details
-    guest_ids = list(guests_dict.keys())
-    np.random.shuffle(guest_ids)
-    allocation = {}    
-    guest_satisfaction = {}
-    
-    # 3: Allocate each guest to a room as long as there are available rooms
-    for guest_id in guest_ids:
-        guest_id_str = str(guest_id) # ensure it is a string
-        available_hotels = [hotel_id for hotel_id, hotel_data in hotels_dict.items()
-                            if hotel_data['available_rooms'] > 0] # get the list of hotels with available rooms
-        if not available_hotels:
-            if verbose:
-                print("No more rooms available.")
-            break 
+    data = AllocationData.from_dicts(guests_dict_original, hotels_dict_original)
+    result = random_allocation_columnar(data, verbose, mode, by, seed)
     
-        hotel_id = random.choice(available_hotels) # Select a random hotel from the available hotels list 
-        guest_discount = guests_dict[guest_id]['discount'] # Get the guest's discount and hotel's final room price
-        room_price = hotels_dict[hotel_id]['price']
-        revenue = round(room_price * (1 - guest_discount), 2)
-        preferences = guests_dict[guest_id]['preferences']  # Guest's list of preferred hotels
-        
-        # Satisfaction score
-        satisfaction_score = (
-            round((len(preferences) - preferences.index(hotel_id)) / len(preferences), 2)
-            if hotel_id in preferences else 0 # default score for hotels outside the preference list
-        ) 
+    # Allocation: hotels in the order they received their first guest, with the discount of that guest
+    assignment, guest_order = result['assignment'], result['guest_order']
+    served = guest_order[assignment[guest_order] >= 0]
+    hotels, first = np.unique(assignment[served], return_index=True)
+    allocation = {}
+    first = np.sort(first)
+    first_hotels = assignment[served[first]]
+    for position, hotel, hotel_id in zip(first.tolist(), first_hotels.tolist(), data.hotel_dictionary.decode(first_hotels).tolist()):
+        details = result['allocation_report'].details(hotel)
+        allocation[hotel_id] = {
+            'occupied_rooms': details['rooms_occupied'], 
+            'available_rooms': details['rooms_available'],
+            'discount_applied': float(data.discount[served[position]]),
+            'revenue': details['revenue'],
+            'number_of_guests_accommodated': details['number_of_guests_accommodated'],
+            'guests': details['guests'],
+        }
+    result['allocation'] = allocation
+    return result
 
-        hotels_dict[hotel_id]['available_rooms'] -= 1 # update the number of available rooms in the hotel allocated
-        
-        # Store the allocation: if the hotel is 'new' to the allocation dictionary, start with 1 occupied room.
-        if hotel_id not in allocation:
-            allocation[hotel_id] = {
-                'occupied_rooms': 1, 
-                'available_rooms': hotels_dict[hotel_id]['available_rooms'],
-                'discount_applied': guest_discount,
-                'revenue': revenue,
-                'number_of_guests_accommodated': 1,
-                'guests': [guest_id_str],
-            }
-
-        else: # If the hotel is already in allocation: increment occupied rooms, revenue, and guests. Update number of available rooms.
-            allocation[hotel_id]['occupied_rooms'] += 1 
-            allocation[hotel_id]['available_rooms'] = hotels_dict[hotel_id]['available_rooms']
-            allocation[hotel_id]['revenue'] += revenue    
-            allocation[hotel_id]['number_of_guests_accommodated'] += 1            
-            allocation[hotel_id]['guests'].append(guest_id_str) 
-    
-        # track satisfaction for the guest
-        guest_satisfaction[guest_id_str] = satisfaction_score
-
-    # Hotel status
-    random_allocation_report = {}
-    for hotel_id, data in hotels_dict.items():
-        if hotel_id in allocation:
-            details = allocation[hotel_id]
-            random_allocation_report[hotel_id] = {
-                'rooms_occupied': details['occupied_rooms'],
-                'rooms_available': details['available_rooms'],
-                'number_of_guests_accommodated': details['number_of_guests_accommodated'],
-                'revenue': details['revenue'],  
-                'guests': details['guests'],
-            }
-        else:
-            # Initialize with default values for hotels with no allocation
-            random_allocation_report[hotel_id] = {
-                'rooms_occupied': 0,
-                'rooms_available': data['available_rooms'],
-                'number_of_guests_accommodated': 0,
-                'revenue': 0,  
-                'guests': [],
-            }
+def random_allocation_columnar(data, verbose = False, mode = 'sampler', by = None, seed = None):
+    """
+    Random allocation on the columnar data model (src/Columnar_Core).
+    ## Parameters: 
+     - AllocationData object: hotels, guests and preferences arrays.
+     - verbose = False: print a message when rooms run out.
+     - mode: 'sampler' or 'vectorized'; by: 'hotel' or 'room' (default: 'hotel' for the sampler, 'room' when vectorized);
+       seed: seed of the random generator (None: different allocation at every run).
+    ## Returns a dictionary:
+     - Allocation report and overall statistics, as in random_allocation.
+     - 'assignment' (hotel code of each guest, -1 if unassigned) and 'guest_satisfaction' (score of each guest) arrays.
+     - 'guest_order': the random order in which guests were served.
+    """
+    rng = np.random.default_rng(seed)
+    with phase('allocation loop'):
+        guest_order, assignment, served_count, rooms_left = draw_random_assignment(data, rng, mode, by, verbose)
     
-    # Overall statistics 
-    total_guests = len(guest_satisfaction)
-    total_revenues = sum(details['revenue'] for details in allocation.values()) # default value of 0 if revenue missing (no guests assigned to a hotel)
-    occupied_hotels_count = sum(1 for details in allocation.values() if details['number_of_guests_accommodated'] > 0)
-    average_revenue = round(total_revenues / occupied_hotels_count, 2) if occupied_hotels_count > 0 else 0
-    total_satisfaction_score = sum(guest_satisfaction.values())
-    average_satisfaction_score = round(total_satisfaction_score / total_guests, 2) if total_guests > 0 else 0
-        
-    #allocation['average_satisfaction'] = average_satisfaction_score # add the value to the allocation
+    with phase('statistics'):
+        # Guests served before the rooms ran out (only they are scored)
+        processed = np.zeros(data.num_guests, dtype=bool)
+        processed[guest_order[:served_count]] = True
+        assigned = np.flatnonzero(assignment >= 0)
     
-    statistics = {
-        'assigned_guests_count': total_guests,
-        'average_satisfaction_score': average_satisfaction_score,
-        'occupied_hotels_count': occupied_hotels_count,
-        'average_revenue': average_revenue,
-    }
+        guest_revenues = np.zeros(data.num_guests)
+        guest_revenues[assigned] = np.round(data.price[assignment[assigned]] * (1 - data.discount[assigned]), 2)
+        guest_satisfaction = satisfaction_scores(data, assignment, outside_score=0) # 0 for hotels outside the preferences
     
-    # Generate visualizations
-    fig1 = plot_revenue_distribution(allocation)
-    fig2 = plot_guest_satisfaction_distribution(guest_satisfaction)
-    fig3 = plot_guests_per_hotel(allocation)
-
+    result = build_allocation_result(data, rooms_left, assignment, guest_order, guest_satisfaction, guest_revenues,
+                                     scored=processed, round_revenue=False)
 
     return {
-        'allocation': allocation,
-        'allocation_report': random_allocation_report,
-        'statistics': statistics,
-        'plots': [fig1, fig2, fig3]
+        'assignment': assignment,
+        'guest_order': guest_order,
+        'guest_satisfaction': guest_satisfaction,
+        'allocation_report': result['allocation_report'],
+        'statistics': result['statistics']
 }
 
+def draw_random_assignment(data, rng, mode = 'sampler', by = None, verbose = False):
+    """
+    One random draw: the order in which guests are served and the hotel each one gets (see the modes above).
+    Also used by the Monte Carlo mode (src/Allocation_Methods/Random_Monte_Carlo.py), which only keeps the statistics.
+    ## Returns:
+     - (guest_order, assignment, served_count, rooms_left): the guests served before the rooms ran out are
+       guest_order[:served_count].
+    """
+    guest_order = rng.permutation(data.num_guests)
+    assignment = np.full(data.num_guests, -1, dtype=np.int32)
+    
+    if mode == 'sampler':
+        sampler = RoomSampler(data.rooms, rng, by=by or 'hotel')
+        guest_list = guest_order.tolist()
+        for served_count, guest_id in enumerate(guest_list):
+            hotel = sampler.draw()
+            if hotel < 0:
+                if verbose:
+                    print("No more rooms available.")
+                break
+            assignment[guest_id] = hotel
+        else:
+            served_count = len(guest_list)
+        rooms_left = sampler.rooms_left()
+    elif mode == 'vectorized':
+        if by not in (None, 'room'):
+            raise ValueError("The vectorized mode draws uniformly over rooms: use by='room' or the sampler mode")
+        slots = rng.permutation(np.repeat(np.arange(data.num_hotels), np.maximum(data.rooms, 0)))
+        served_count = min(data.num_guests, len(slots))
+        assignment[guest_order[:served_count]] = slots[:served_count]
+        rooms_left = data.rooms - np.bincount(slots[:served_count], minlength=data.num_hotels)
+        if verbose and served_count < data.num_guests:
+            print("No more rooms available.")
+    else:
+        raise ValueError(f"Unknown mode: {mode!r}")
+    return guest_order, assignment, served_count, rooms_left
 
-# Store the random_allocation function
-random_allocation_result = random_allocation(guests_dict_original, hotels_dict_original)
 
 # Needed to pass the report to the main file
 def print_random_allocation_report(random_allocation_result):
     # Directly return the allocation_report dictionary instead of creating a string
     allocation_report = random_allocation_result.get('allocation_report', None)
     return allocation_report  # Just return the allocation report (as a dictionary)
-
-print_random_allocation_report(random_allocation_result)
\ No newline at end of file
@@ -0,0 +1,200 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+import numpy as np
+from src.Allocation_Methods.Random_Allocation import draw_random_assignment
+from src.Columnar_Core.Preference_Rank import preference_scores
+from src.Columnar_Core.Room_Sampler import RoomSampler
+
+"""
+Monte Carlo mode of the random allocation: instead of one draw, N seeded draws and the distribution of every metric
+of 'statistics' (mean, standard deviation, percentiles and confidence interval of the mean).
+- Draw i uses the i-th child of numpy.random.SeedSequence(seed): it is the allocation that
+  random_allocation_columnar(data, mode=mode, by=by, seed=seed_sequence.spawn(draws)[i]) returns, and its statistics
+  are exactly the ones of that allocation. The same seed and number of draws give the same samples.
+- Draws only keep the assignment; statistics are computed for a whole batch of draws at once, with array operations
+  over a (draws x guests) matrix, without building the hotel reports.
+- 'sampler' draws are vectorized across the draws of a batch: the RoomSampler steps (one per served guest) are
+  replayed for all the draws at once, on a (draws x candidates) matrix, with the uniforms each draw's sampler would
+  use. 'vectorized' draws are array operations themselves.
+- With several CPUs, batches are spread over worker processes (the dataset is shared, see Shared_Data.py).
+"""
+
+STATISTICS = ('assigned_guests_count', 'average_satisfaction_score', 'occupied_hotels_count', 'average_revenue')
+PERCENTILES = (5, 25, 50, 75, 95)
+BATCH_ELEMENTS = 4_000_000 # guests x draws per batch (size of the batch matrices)
+
+def draw_seeds(draws, seed=None):
+    """Seeds of the draws: children of SeedSequence(seed) (fresh entropy if seed is None)."""
+    return np.random.SeedSequence(seed).spawn(draws)
+
+def batch_statistics(data, orders, assignments, served_counts):
+    """
+    Statistics of a batch of random draws, as random_allocation_columnar computes them for one draw
+    (sums are taken in the same order, so the values are exactly the same).
+
+    Parameters:
+    data (AllocationData): the dataset.
+    orders (array): draws x guests, order in which guests were served in each draw.
+    assignments (array): draws x guests, hotel code of each guest (-1 if unassigned).
+    served_counts (array): number of guests served in each draw (the first ones of its order).
+
+    Returns:
+    dict: metric name -> array with the value of each draw.
+    """
+    num_draws, num_hotels = len(orders), data.num_hotels
+    served = np.arange(data.num_guests) < np.asarray(served_counts)[:, None] # in serving order
+    hotels = np.take_along_axis(assignments, orders, axis=1) # hotel of each guest, in serving order
+    assigned = hotels >= 0
+    served_hotels = np.where(assigned, hotels, 0)
+
+    # Satisfaction: score of the hotel in the guest's preferences, 0 outside them; summed in serving order
+    positions = data.preference_rank.position(orders.ravel(), hotels.ravel()).reshape(orders.shape)
+    lengths = data.pref_lengths[orders]
+    preferred = positions >= 0
+    scores = np.zeros(orders.shape)
+    scores[preferred] = preference_scores(lengths[preferred], positions[preferred])
+    total_satisfaction = np.cumsum(np.where(served, scores, 0.0), axis=1)[:, -1] if data.num_guests > 0 else np.zeros(num_draws)
+
+    # Revenue of each hotel, summed in serving order (bincount adds its weights in input order), then over hotels
+    revenues = np.where(assigned, np.round(data.price[served_hotels] * (1 - data.discount[orders]), 2), 0.0)
+    bins = (np.arange(num_draws)[:, None] * num_hotels + served_hotels)[assigned]
+    hotel_revenue = np.bincount(bins, weights=revenues[assigned], minlength=num_draws * num_hotels).reshape(num_draws, num_hotels)
+    occupied = np.bincount(bins, minlength=num_draws * num_hotels).reshape(num_draws, num_hotels)
+    total_revenues = np.cumsum(hotel_revenue, axis=1)[:, -1] if num_hotels > 0 else np.zeros(num_draws)
+
+    assigned_count = assigned.sum(axis=1)
+    scored_count = np.asarray(served_counts)
+    occupied_count = np.count_nonzero(occupied, axis=1)
+    return {
+        'assigned_guests_count': assigned_count,
+        'average_satisfaction_score': np.array([round(total / count, 2) if count > 0 else 0
+                                                for total, count in zip(total_satisfaction.tolist(), scored_count.tolist())]),
+        'occupied_hotels_count': occupied_count,
+        'average_revenue': np.array([round(total / count, 2) if count > 0 else 0
+                                     for total, count in zip(total_revenues.tolist(), occupied_count.tolist())])
+    }
+
+def sampler_batch(data, seeds, by='hotel'):
+    """
+    Draws of the sampler mode for a batch of seeds, all at once: the same allocations as draw_random_assignment
+    with mode='sampler', step by step for every draw (each step is a few array operations over the draws).
+
+    Returns:
+    tuple: (orders, assignments, served_counts), one row per draw.
+    """
+    by = by or 'hotel'
+    if by not in ('hotel', 'room'):
+        raise ValueError(f"by must be 'hotel' or 'room', not {by!r}")
+    num_draws, rows = len(seeds), np.arange(len(seeds))
+    rngs = [np.random.default_rng(seed) for seed in seeds]
+    orders = np.array([rng.permutation(data.num_guests) for rng in rngs]).reshape(num_draws, data.num_guests)
+    rooms = np.maximum(data.rooms, 0)
+    initial = np.flatnonzero(rooms > 0) if by == 'hotel' else np.repeat(np.arange(data.num_hotels), rooms)
+    steps = min(data.num_guests, int(rooms.sum())) # one room per served guest, until guests or rooms run out
+
+    # Uniforms in the order RoomSampler uses them: drawn in blocks, taken from the end of each block
+    block_size = RoomSampler.BLOCK_SIZE
+    uniforms = np.empty((num_draws, steps))
+    for row, rng in enumerate(rngs):
+        for start in range(0, steps, block_size):
+            uniforms[row, start:start + block_size] = rng.random(block_size)[::-1][:steps - start]
+
+    # Swap-remove lists of all draws: candidates[draw, :count[draw]]
+    candidates = np.tile(initial, (num_draws, 1))
+    count = np.full(num_draws, len(initial))
+    rooms_left = np.tile(rooms, (num_draws, 1))
+    drawn = np.empty((num_draws, steps), dtype=np.int32)
+    for step in range(steps):
+        position = (uniforms[:, step] * count).astype(np.int64)
+        hotels = candidates[rows, position]
+        drawn[:, step] = hotels
+        if by == 'hotel':
+            rooms_left[rows, hotels] -= 1
+            leaving = rooms_left[rows, hotels] <= 0 # full hotels leave the list
+        else:
+            leaving = np.ones(num_draws, dtype=bool) # the drawn room leaves the list
+        candidates[rows[leaving], position[leaving]] = candidates[rows[leaving], count[leaving] - 1]
+        count[leaving] -= 1
+
+    assignments = np.full((num_draws, data.num_guests), -1, dtype=np.int32)
+    np.put_along_axis(assignments, orders[:, :steps], drawn, axis=1)
+    return orders, assignments, np.full(num_draws, steps)
+
+def draw_statistics(data, seeds, mode='sampler', by=None):
+    """Runs the draws of the given seeds and returns their statistics (see batch_statistics), batch by batch."""
+    width = max(data.num_guests, int(np.maximum(data.rooms, 0).sum()) if mode == 'sampler' and by == 'room' else data.num_hotels)
+    batch_size = max(1, BATCH_ELEMENTS // max(1, width))
+    samples = {name: [] for name in STATISTICS}
+    for start in range(0, len(seeds), batch_size):
+        batch = seeds[start:start + batch_size]
+        if mode == 'sampler':
+            orders, assignments, served_counts = sampler_batch(data, batch, by)
+        else:
+            draws = [draw_random_assignment(data, np.random.default_rng(seed), mode, by) for seed in batch]
+            orders, assignments, served_counts = (np.array(column) for column in list(zip(*draws))[:3])
+        statistics = batch_statistics(data, orders, assignments, served_counts)
+        for name in STATISTICS:
+            samples[name].append(statistics[name])
+    return {name: np.concatenate(values) if values else np.zeros(0) for name, values in samples.items()}
+
+def run_shared_draws(spec, seeds, mode='sampler', by=None):
+    """Worker: runs draws on a dataset published in shared memory (see Shared_Data.py)."""
+    from src.Columnar_Core.Shared_Data import attach_shared_data
+    return draw_statistics(attach_shared_data(spec), seeds, mode, by)
+
+def summarize(samples, confidence=0.95, percentiles=PERCENTILES):
+    """
+    Distribution of each metric over the draws.
+
+    Returns:
+    dict: metric name -> {'mean', 'std', 'min', 'max', 'p5', ..., 'ci_low', 'ci_high'}, where [ci_low, ci_high]
+    is the confidence interval of the mean (normal approximation).
+    """
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    summary = {}
+    for name, values in samples.items():
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            continue
+        mean = float(values.mean())
+        std = float(values.std(ddof=1)) if len(values) > 1 else 0.0
+        half_width = z * std / np.sqrt(len(values))
+        summary[name] = {'mean': mean, 'std': std, 'min': float(values.min()), 'max': float(values.max())}
+        summary[name].update({f"p{percentile:g}": float(value)
+                              for percentile, value in zip(percentiles, np.percentile(values, percentiles))})
+        summary[name].update({'ci_low': float(mean - half_width), 'ci_high': float(mean + half_width)})
+    return summary
+
+def random_monte_carlo(data, draws=1000, seed=None, mode='sampler', by=None, max_workers=None, confidence=0.95):
+    """
+    Monte Carlo mode of the random allocation (see above).
+
+    Parameters:
+    data (AllocationData): the dataset.
+    draws (int): number of random allocations.
+    seed (int, optional): seed of the whole run (None: different draws at every run).
+    mode, by: as in random_allocation_columnar.
+    max_workers (int, optional): worker processes (default: one per CPU; 1 runs in this process).
+    confidence (float): level of the confidence interval of the mean.
+
+    Returns:
+    dict: 'draws', 'seed', 'samples' (metric name -> value of each draw) and 'summary' (see summarize).
+    """
+    seeds = draw_seeds(draws, seed)
+    workers = min(max_workers or os.cpu_count() or 1, draws)
+    if workers <= 1:
+        samples = draw_statistics(data, seeds, mode, by)
+    else:
+        from src.Columnar_Core.Shared_Data import SharedAllocationData
+        chunks = [list(chunk) for chunk in np.array_split(np.array(seeds, dtype=object), workers * 4) if len(chunk) > 0]
+        with SharedAllocationData(data) as shared, ProcessPoolExecutor(workers) as pool:
+            parts = list(pool.map(run_shared_draws, [shared.spec] * len(chunks), chunks,
+                                  [mode] * len(chunks), [by] * len(chunks)))
+        samples = {name: np.concatenate([part[name] for part in parts]) for name in STATISTICS}
+    return {
+        'draws': draws,
+        'seed': seed,
+        'samples': samples,
+        'summary': summarize(samples, confidence)
+    }
@@ -1,10 +1,8 @@
-from src.Guests_Hotels_Dictionaries.Guests import guests_dict_original
-from src.Guests_Hotels_Dictionaries.Hotels import hotels_dict_original
-from src.Data_Visualization.individual_visualization import (
-    plot_revenue_distribution,
-    plot_guest_satisfaction_distribution,
-    plot_guests_per_hotel,
-)
+import numpy as np
+from src.Columnar_Core.Allocation_Data import AllocationData
+from src.Columnar_Core.Allocation_Result import build_allocation_result
+from src.Columnar_Core.Preference_Rank import satisfaction_scores
+from src.Instrumentation import phase
 
 def reservation_allocation(guests_dict_original, hotels_dict_original):
     """
@@ -17,117 +15,78 @@ def reservation_allocation(guests_dict_original, hotels_dict_original):
      - Allocation report: 0 for non-occupied hotels.
      - Overall statistics: count of assigned guests, avg satisfaction, couhnt of occupied hotels, avg revenue.
     """   
-    # Make copies of the dictionaries to prevent modifying the originals
-    guests_dict = guests_dict_original.copy()  
-    hotels_dict = {k: v.copy() for k, v in hotels_dict_original.items()}  
-    allocation = {} 
-
-    # Initialize hotel status
-    hotel_status = { 
-        hotel_id: {
-            'rooms_occupied': 0,
-            'remaining_rooms': hotels_dict[hotel_id]['available_rooms'],
-            'guests_accommodated': 0,
-            'revenue': 0,
-            }
-        for hotel_id in hotels_dict.keys()
-    }
-    
-    customer_satisfaction = {} # individual satisfaction scores
-    total_satisfaction = 0 # initialize total satisfaction to calculate average
-    unassigned_guests = [] # list with unassigned guests
+    data = AllocationData.from_dicts(guests_dict_original, hotels_dict_original)
+    result = reservation_allocation_columnar(data)
     
-    # Iterate over guests in order of reservation (over ids): get preferences and discount
-    for guest_id, guest_data in sorted(guests_dict.items()):
-        preferences = guest_data['preferences']
-        discount = guest_data['discount']
-        allocated = False
-        
-        # Allocation based on preferences
-        for hotel in preferences:
-            available_rooms = hotels_dict.get(hotel, {}).get('available_rooms', 0)
-            
-            if available_rooms > 0: # Available rooms: allocate the guest. If not, it skips to the next hotel in the preference list.
-                allocation[guest_id] = {
-                    'hotel': hotel,
-                    'price': hotels_dict[hotel]["price"] * (1 - discount / 100),
-                    'discount': discount,
-                }
-                
-                # Update hotel status and dictionary on available rooms
-                hotels_dict[hotel]['available_rooms'] -= 1
-                hotel_status[hotel]['rooms_occupied'] += 1
-                hotel_status[hotel]['remaining_rooms'] -= 1
-                hotel_status[hotel]['guests_accommodated'] += 1
-                hotel_status[hotel]['revenue'] += allocation[guest_id]['price']
-                                
-                # Calculate guest satisfaction
-                satisfaction_score = round((len(preferences) - preferences.index(hotel)) / len(preferences), 2)  # Higher score for better match
-                customer_satisfaction[guest_id] = satisfaction_score
-                total_satisfaction += satisfaction_score
-                
-                allocated = True
-                break
-            
-        if not allocated: # If no available rooms in preferred hotel: mark as unassigned guest
-            customer_satisfaction[guest_id] = 0
-            unassigned_guests.append(guest_id)
+    # Allocation dictionary (guest_id -> hotel, price paid, discount), in reservation order
+    assignment = result['assignment']
+    assigned = data.reservation_order[assignment[data.reservation_order] >= 0]
+    result['allocation'] = {
+        guest_id: {'hotel': hotel_id, 'price': price, 'discount': discount}
+        for guest_id, hotel_id, price, discount in zip(data.guest_dictionary.decode(assigned).tolist(), data.hotel_dictionary.decode(assignment[assigned]).tolist(),
+                                                       result['guest_revenues'][assigned].tolist(), data.discount[assigned].tolist())
+    }
+    return result
 
-    
-    # Unassigned guests count
-    unassigned_count = len(unassigned_guests) #count how many guests were not assigned
-    
-    # Hotel report
-    reservation_allocation_report = {}
+def reservation_allocation_columnar(data):
+    """
+    Same allocation as reservation_allocation, computed on the columnar data model (src/Columnar_Core).
+    ## Parameters: 
+     - AllocationData object: hotels, guests and preferences arrays.
+    ## Returns:
+     - Same keys as reservation_allocation, with 'assignment' (hotel code of each guest, -1 if unassigned),
+       'guest_satisfaction' and 'guest_revenues' (score and price paid by each guest) arrays instead of the allocation dictionary.
+    """
+    assignment, rooms_left = reservation_assignment(data)
+    return reservation_allocation_result(data, assignment, rooms_left)
 
-    for hotel_id, data in hotels_dict.items():
-        guests = [guest_id for guest_id, allocation_info in allocation.items() if allocation_info['hotel'] == hotel_id]
-        final_revenue = sum(allocation[guest_id]['price'] for guest_id in guests)
-        
-        reservation_allocation_report[hotel_id] = {
-            'rooms_occupied': hotel_status[hotel_id]['rooms_occupied'],
-            'rooms_available': data['available_rooms'],
-            'number_of_guests_accommodated': len(guests),
-            'revenue': round(final_revenue, 2),
-            'guests': guests
-        } 
-    
-    # Calculate total number of guests assigned
-    total_assigned_guests = len(allocation)  
-    
-    # Total and overall average revenue
-    total_revenues = sum(details['revenue'] for details in reservation_allocation_report.values())
-    occupied_hotels_count = sum(1 for details in reservation_allocation_report.values() if details['number_of_guests_accommodated'] > 0)
-    average_revenue = round(total_revenues / occupied_hotels_count, 2) if occupied_hotels_count > 0 else 0 # don't divide by 0
+def reservation_assignment(data):
+    """
+    Allocation loop of the reservation method (also run on each component by the partitioned allocation).
+    Returns the (assignment, rooms_left) arrays: hotel code of each guest (-1 if unassigned), rooms left in each hotel.
+    """
+    with phase('allocation loop'):
+        # Python lists: scalar access is much faster than on NumPy arrays inside the loop
+        offsets, pref_hotels = data.pref_offsets.tolist(), data.pref_hotels.tolist()
+        rooms = data.rooms.tolist()
+        assignment = [-1] * data.num_guests
     
-    # Avg satisfaction score
-    average_satisfaction_score = round(total_satisfaction / len(guests_dict), 2) # I include unassigned guest to penalize the final score
+        # Iterate over guests in order of reservation: first preferred hotel with available rooms.
+        # If no preferred hotel has rooms, the guest stays unassigned.
+        for guest_id in data.reservation_order.tolist():
+            for entry in range(offsets[guest_id], offsets[guest_id + 1]):
+                hotel = pref_hotels[entry]
+                if hotel >= 0 and rooms[hotel] > 0:
+                    assignment[guest_id] = hotel
+                    rooms[hotel] -= 1
+                    break
+        return np.array(assignment, dtype=np.int32), np.array(rooms, dtype=np.int64)
 
-    statistics = {
-        'assigned_guests_count': total_assigned_guests,
-        'average_satisfaction_score': average_satisfaction_score,
-        'occupied_hotels_count': occupied_hotels_count,
-        'average_revenue': average_revenue
-    }
+def reservation_allocation_result(data, assignment, rooms_left):
+    """
+    Report, statistics and per-guest arrays of a reservation allocation, from its assignment
+    (also used by the incremental allocator, which maintains the assignment itself).
+    """
+    with phase('statistics'):
+        # Satisfaction from the preference rank lookup (unassigned guests score 0), price discounted for each assigned guest
+        customer_satisfaction = satisfaction_scores(data, assignment)
+        assigned = np.flatnonzero(assignment >= 0)
+        guest_revenues = np.zeros(data.num_guests)
+        guest_revenues[assigned] = data.price[assignment[assigned]] * (1 - data.discount[assigned] / 100)
     
-    # Generate visualizations
-    fig1 = plot_revenue_distribution(reservation_allocation_report)
-    fig2 = plot_guest_satisfaction_distribution(customer_satisfaction)
-    fig3 = plot_guests_per_hotel(reservation_allocation_report)
-
-    return{
-        'allocation': allocation,
-        'unassigned_guests': unassigned_guests,
-        'unassigned_count': unassigned_count,
-        'assigned_guests_count': total_assigned_guests,
-        'allocation_report': reservation_allocation_report,
-        'statistics': statistics,
-        'plots': [fig1, fig2, fig3]
-    } 
-
-# Store the function
-reservation_allocation_result = reservation_allocation(guests_dict_original, hotels_dict_original)
-
+    result = build_allocation_result(data, rooms_left, assignment, data.reservation_order,
+                                     customer_satisfaction, guest_revenues)
+    # Unassigned guests in reservation order
+    unassigned = data.reservation_order[assignment[data.reservation_order] < 0]
+    result['unassigned_guests'] = data.guest_dictionary.decode(unassigned).tolist()
+    
+    result.update({
+        'assignment': assignment,
+        'guest_satisfaction': customer_satisfaction,
+        'guest_revenues': guest_revenues,
+        'assigned_guests_count': result['statistics']['assigned_guests_count']
+    })
+    return result
 
 # Needed to pass the report to the main file
 def printed_reservation_allocation_report(reservation_allocation_result):
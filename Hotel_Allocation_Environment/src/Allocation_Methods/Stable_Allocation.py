@@ -0,0 +1,158 @@
+import heapq
+import numpy as np
+from src.Columnar_Core.Allocation_Data import AllocationData
+from src.Columnar_Core.Allocation_Result import build_allocation_result
+from src.Columnar_Core.Preference_Rank import satisfaction_scores
+from src.Instrumentation import phase
+
+"""
+Concept:
+- Stable matching with hotel capacities (the hospitals/residents problem), by guest-proposing deferred acceptance:
+  each free guest proposes to the next hotel of their preference list; a hotel keeps the best proposals up to its
+  number of rooms and rejects the others, possibly dropping a guest it held before, who then proposes further down
+  their list. Acceptances are only final at the end.
+- Hotels rank guests by a key: 'revenue' (the discounted price the guest would pay, price * (1 - discount): within a
+  hotel the price is the same, so the guest with the lowest discount first) or 'reservation' (reservation order).
+  Ties are broken by reservation order.
+- The result is stable: no guest and hotel would both rather be together than with their current match (a guest
+  prefers any hotel of their list to being unassigned, a hotel any guest to an empty room). Among stable outcomes,
+  it is the best one for every guest.
+- Guests are only allocated to their preferred hotels. Satisfaction and revenue are computed as in the reservation
+  method (score by position in the preference list), with the revenue price * (1 - discount).
+Complexity: every proposal moves a guest's pointer one step down their list, so there are at most as many proposals
+as preference entries; each is answered with one operation on the hotel's heap of held guests (worst on top).
+"""
+
+HOTEL_RANKINGS = ('revenue', 'reservation')
+
+def stable_allocation(guests_dict_original, hotels_dict_original, hotel_ranking='revenue'):
+    """
+    ## Parameters:
+     - Dictionary containing guests information: guest_id, discount, preferences list.
+     - Dictionary containing hotels information: hotel_id, available_rooms, price.
+     - hotel_ranking: how hotels rank guests, 'revenue' or 'reservation' (see Concept above).
+    ## Returns a dictionary:
+     - Allocation: guest_id -> hotel, price paid and discount, in reservation order.
+     - Unassigned guests (count and list).
+     - Allocation report: for each hotel, number of rooms occupied, rooms available, total revenue, list of guests allocated.
+     - Overall statistics: count of assigned guests, avg satisfaction, count of occupied hotels, avg revenue.
+    """
+    data = AllocationData.from_dicts(guests_dict_original, hotels_dict_original)
+    result = stable_allocation_columnar(data, hotel_ranking)
+
+    assignment = result['assignment']
+    assigned = data.reservation_order[assignment[data.reservation_order] >= 0]
+    result['allocation'] = {
+        guest_id: {'hotel': hotel_id, 'price': price, 'discount': discount}
+        for guest_id, hotel_id, price, discount in zip(data.guest_dictionary.decode(assigned).tolist(), data.hotel_dictionary.decode(assignment[assigned]).tolist(),
+                                                       result['guest_revenues'][assigned].tolist(), data.discount[assigned].tolist())
+    }
+    return result
+
+def stable_allocation_columnar(data, hotel_ranking='revenue'):
+    """
+    Same allocation as stable_allocation, computed on the columnar data model (src/Columnar_Core).
+    ## Parameters:
+     - AllocationData object: hotels, guests and preferences arrays.
+     - hotel_ranking: 'revenue', 'reservation', or an array with a key per guest (higher key, better guest for every hotel).
+    ## Returns:
+     - Same keys as stable_allocation, with 'assignment' (hotel code of each guest, -1 if unassigned),
+       'guest_satisfaction' and 'guest_revenues' arrays instead of the allocation dictionary.
+    """
+    with phase('sorting'):
+        priority = guest_priority(data, hotel_ranking)
+    with phase('allocation loop'):
+        assignment = deferred_acceptance(data, priority)
+        rooms_left = data.rooms - np.bincount(assignment[assignment >= 0], minlength=data.num_hotels)
+    return stable_allocation_result(data, assignment, rooms_left)
+
+def guest_priority(data, hotel_ranking='revenue'):
+    """
+    Position of each guest in the ranking shared by all hotels (0 = best guest).
+
+    Parameters:
+    data (AllocationData): the dataset.
+    hotel_ranking: 'revenue', 'reservation', or an array with a key per guest (higher is better).
+
+    Returns:
+    array: rank of each guest.
+    """
+    reservation_rank = np.empty(data.num_guests, dtype=np.int64)
+    reservation_rank[data.reservation_order] = np.arange(data.num_guests)
+    if isinstance(hotel_ranking, str):
+        if hotel_ranking not in HOTEL_RANKINGS:
+            raise ValueError(f"hotel_ranking must be one of {HOTEL_RANKINGS} or an array, not {hotel_ranking!r}")
+        key = -data.discount if hotel_ranking == 'revenue' else np.zeros(data.num_guests)
+    else:
+        key = np.asarray(hotel_ranking, dtype=np.float64)
+        if key.shape != (data.num_guests,):
+            raise ValueError("hotel_ranking must have one key per guest")
+    order = np.lexsort((reservation_rank, -key)) # highest key first, then reservation order
+    priority = np.empty(data.num_guests, dtype=np.int64)
+    priority[order] = np.arange(data.num_guests)
+    return priority
+
+def deferred_acceptance(data, priority):
+    """
+    Guest-proposing deferred acceptance with hotel capacities (see Concept above).
+
+    Parameters:
+    data (AllocationData): the dataset.
+    priority (array): rank of each guest for the hotels (0 = best), see guest_priority.
+
+    Returns:
+    array: hotel code assigned to each guest, -1 if unassigned.
+    """
+    # Python lists: scalar access is much faster than on NumPy arrays inside the loop
+    offsets, pref_hotels = data.pref_offsets.tolist(), data.pref_hotels.tolist()
+    rooms = data.rooms.tolist()
+    priority = priority.tolist()
+    next_entry = offsets[:-1] # proposal pointer of each guest: next entry of their preference list
+    held = [[] for _ in rooms] # per hotel: heap of (-priority, guest), the worst held guest on top
+    assignment = [-1] * data.num_guests
+
+    # Free guests propose in reservation order; a rejected or dropped guest proposes again right away
+    for guest in data.reservation_order.tolist():
+        while guest >= 0:
+            entry, end = next_entry[guest], offsets[guest + 1]
+            while entry < end and (pref_hotels[entry] < 0 or rooms[pref_hotels[entry]] <= 0):
+                entry += 1 # unknown hotels and hotels without rooms reject every proposal
+            if entry == end:
+                next_entry[guest] = entry
+                break # list exhausted: the guest stays unassigned
+            hotel = pref_hotels[entry]
+            next_entry[guest] = entry + 1
+            heap = held[hotel]
+            if len(heap) < rooms[hotel]:
+                heapq.heappush(heap, (-priority[guest], guest))
+                assignment[guest] = hotel
+                guest = -1
+            elif -heap[0][0] > priority[guest]: # the hotel prefers this guest to the worst one it holds
+                dropped = heapq.heapreplace(heap, (-priority[guest], guest))[1]
+                assignment[guest] = hotel
+                assignment[dropped] = -1
+                guest = dropped
+            # else: rejected, the guest proposes to their next hotel
+    return np.array(assignment, dtype=np.int32)
+
+def stable_allocation_result(data, assignment, rooms_left):
+    """Report, statistics and per-guest arrays of a stable allocation, from its assignment."""
+    with phase('statistics'):
+        guest_satisfaction = satisfaction_scores(data, assignment)
+        assigned = np.flatnonzero(assignment >= 0)
+        guest_revenues = np.zeros(data.num_guests)
+        guest_revenues[assigned] = data.price[assignment[assigned]] * (1 - data.discount[assigned])
+
+    result = build_allocation_result(data, rooms_left, assignment, data.reservation_order,
+                                     guest_satisfaction, guest_revenues)
+    result.update({
+        'assignment': assignment,
+        'guest_satisfaction': guest_satisfaction,
+        'guest_revenues': guest_revenues
+    })
+    return result
+
+# Needed to pass the report to the main file
+def printed_stable_allocation_report(stable_allocation_result):
+    # Return the allocation report directly (as the other methods do)
+    return stable_allocation_result.get('allocation_report', None)
@@ -0,0 +1,296 @@
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from src.Columnar_Core.Allocation_Result import HotelReport, round_cents
+from src.Columnar_Core.Id_Dictionary import IdDictionary
+
+"""
+Streaming version of the reservation allocation, for guest files that do not fit in memory.
+Guests are read in batches, in the order of the source, together with their preference rows; only the hotel inventory
+(rooms left and revenue of each hotel) and running totals are kept, so memory is O(hotels + batch size).
+Each batch of assignments is handed to a sink (e.g. TableWriter(path, 'csv').write) and yielded by run().
+
+Rules are those of reservation_allocation: each guest gets the first preferred hotel with rooms left, or stays
+unassigned; the revenue of a guest is price * (1 - discount / 100) and their satisfaction is based on the position of
+the hotel in their preference list. If the source lists guests in reservation order (sorted by guest ID, the order
+reservation_allocation uses), the assignments, the hotel report and the statistics are those of reservation_allocation.
+Guest IDs are compared as strings, character by character (as sorted() does): guest_10 comes before guest_2. Sources
+listed in another order, such as the files of src/Data_generation.py (guest_1, guest_2, ..., guest_10), must be sorted
+once with sort_guest_files before they are streamed (check_order=True detects unsorted sources).
+
+Source layout (read_guest_batches): the preference rows of each guest are contiguous and in the same guest order as
+the guests file, as written by src/Data_generation.py (guests without preferences simply have no rows, and every
+preference row belongs to a guest of the guests file).
+"""
+
+class StreamingReservation:
+    def __init__(self, hotels_df):
+        """
+        Parameters:
+        hotels_df (DataFrame): columns 'hotel', 'rooms', 'price' (the inventory, kept in memory).
+        """
+        self.hotel_ids = hotels_df['hotel'].to_numpy(dtype=object)
+        self.hotel_dictionary = IdDictionary(self.hotel_ids)
+        self.initial_rooms = hotels_df['rooms'].to_numpy(dtype=np.int64)
+        self.rooms = self.initial_rooms.tolist()
+        self.price = hotels_df['price'].to_numpy(dtype=np.float64).tolist()
+        self.hotel_revenue = [0.0] * len(self.rooms)
+        self.guests_count = 0
+        self.assigned_guests_count = 0
+        self.total_satisfaction_score = 0.0
+        self._scores = {} # (length of the preference list, position) -> satisfaction score
+        self._last_guest_id = None
+
+    def process(self, guests_df, preferences_df, check_order=False):
+        """
+        Allocates one batch of guests, in the order of guests_df.
+
+        Parameters:
+        guests_df (DataFrame): columns 'guest', 'discount'.
+        preferences_df (DataFrame): columns 'guest', 'hotel', 'priority': the preference rows of these guests.
+        check_order (bool): raise a ValueError if the guests are not sorted by ID (reservation order).
+
+        Returns:
+        DataFrame: one row per guest: 'guest', 'hotel' (None if unassigned), 'price' paid and 'satisfaction'.
+        """
+        guest_ids = guests_df['guest'].to_numpy(dtype=object)
+        discount = guests_df['discount'].to_numpy(dtype=np.float64).tolist()
+        if check_order:
+            ordered = guest_ids if self._last_guest_id is None else np.concatenate(([self._last_guest_id], guest_ids))
+            if not np.all(ordered[:-1] < ordered[1:]):
+                raise ValueError("Guests are not in reservation order (sorted by guest ID)")
+        if len(guest_ids) > 0:
+            self._last_guest_id = guest_ids[-1]
+
+        # Preference lists of the batch in CSR layout, in priority order (rows of unknown guests are ignored)
+        pref_guests = pd.Index(guest_ids, dtype=object).get_indexer(pd.Index(preferences_df['guest'], dtype=object))
+        known = pref_guests >= 0
+        pref_guests = pref_guests[known]
+        pref_hotels = self.hotel_dictionary.encode(preferences_df['hotel'].to_numpy(dtype=object))[known]
+        order = np.lexsort((preferences_df['priority'].to_numpy()[known], pref_guests))
+        offsets = np.concatenate(([0], np.cumsum(np.bincount(pref_guests, minlength=len(guest_ids))))).tolist()
+        pref_hotels = pref_hotels[order].tolist()
+
+        rooms, price, hotel_revenue, scores = self.rooms, self.price, self.hotel_revenue, self._scores
+        hotels, paid, satisfaction = [], [], []
+        for guest in range(len(guest_ids)):
+            hotel, revenue, score = None, 0.0, 0.0
+            start, end = offsets[guest], offsets[guest + 1]
+            for entry in range(start, end):
+                code = pref_hotels[entry]
+                if code >= 0 and rooms[code] > 0:
+                    rooms[code] -= 1
+                    hotel = code
+                    revenue = price[code] * (1 - discount[guest] / 100)
+                    hotel_revenue[code] += revenue
+                    key = (end - start, entry - start)
+                    if key not in scores:
+                        scores[key] = round((key[0] - key[1]) / key[0], 2)
+                    score = scores[key]
+                    self.assigned_guests_count += 1
+                    break
+            self.total_satisfaction_score += score # summed in reservation order, as reservation_allocation does
+            hotels.append(hotel)
+            paid.append(revenue)
+            satisfaction.append(score)
+        self.guests_count += len(guest_ids)
+
+        return pd.DataFrame({
+            'guest': guest_ids,
+            'hotel': [self.hotel_ids[hotel] if hotel is not None else None for hotel in hotels],
+            'price': paid,
+            'satisfaction': satisfaction
+        })
+
+    def run(self, batches, sink=None, check_order=False):
+        """
+        Allocates a stream of batches.
+
+        Parameters:
+        batches (iterable): (guests_df, preferences_df) pairs, e.g. read_guest_batches(...).
+        sink (callable, optional): called with the assignments DataFrame of each batch (e.g. TableWriter.write).
+        check_order (bool): see process.
+
+        Yields:
+        DataFrame: the assignments of each batch (see process).
+        """
+        for guests_df, preferences_df in batches:
+            assignments = self.process(guests_df, preferences_df, check_order)
+            if sink is not None:
+                sink(assignments)
+            yield assignments
+
+    def allocation_report(self):
+        """Hotel report of the guests processed so far (guest lists are not kept: they went to the sink)."""
+        rooms_left = np.array(self.rooms, dtype=np.int64)
+        return HotelReport(self.hotel_dictionary, self.initial_rooms - rooms_left, rooms_left, round_cents(self.hotel_revenue))
+
+    def statistics(self):
+        """Overall statistics of the guests processed so far (same definitions as reservation_allocation)."""
+        return {
+            'assigned_guests_count': self.assigned_guests_count,
+            'average_satisfaction_score': round(self.total_satisfaction_score / self.guests_count, 2) if self.guests_count > 0 else 0,
+            **self.allocation_report().statistics()
+        }
+
+
+def read_guest_batches(guests_path, preferences_path, batch_size=100_000):
+    """
+    Reads the guests file in batches, each with the preference rows of its guests (see the source layout above).
+    Only one chunk of each file is in memory at a time. A ValueError is raised when the preference rows do not follow
+    the layout (rows left over at the end, e.g. of unknown guests, are only detected once the guests file is read).
+
+    Yields:
+    tuple: (guests DataFrame, preferences DataFrame) of each batch.
+    """
+    from src.Data_loading import read_chunks
+    preference_chunks = read_chunks(preferences_path, batch_size)
+    pending = pd.DataFrame(columns=['guest', 'hotel', 'priority'])
+    exhausted = False
+
+    for guests_df in read_chunks(guests_path, batch_size):
+        guest_index = pd.Index(guests_df['guest'], dtype=object)
+        parts = []
+        while True:
+            # Rows of this batch: the leading rows whose guest is in the batch, in non-decreasing batch position
+            positions = guest_index.get_indexer(pd.Index(pending['guest'], dtype=object))
+            inside = (positions >= 0) & (positions >= np.maximum.accumulate(np.maximum(positions, 0)))
+            taken = len(pending) if inside.all() else int(np.argmin(inside))
+            parts.append(pending.iloc[:taken])
+            pending = pending.iloc[taken:]
+            if len(pending) > 0 or exhausted:
+                break
+            try:
+                pending = next(preference_chunks)
+            except StopIteration:
+                exhausted = True
+        if len(pending) > 0 and positions[taken] >= 0:
+            raise ValueError("Preference rows are not grouped in the order of the guests file")
+        parts = [part for part in parts if len(part) > 0]
+        yield guests_df, pd.concat(parts, ignore_index=True) if parts else pending.iloc[:0]
+
+    if len(pending) > 0 or any(len(chunk) > 0 for chunk in preference_chunks):
+        raise ValueError("Preference rows left after the last guest: unknown guests or rows out of order")
+
+
+def guest_positions(guests_df, preferences_df):
+    """Position in guests_df of the guest of each preference row (-1 if the guest is not in guests_df)."""
+    return pd.Index(guests_df['guest'], dtype=object).get_indexer(pd.Index(preferences_df['guest'], dtype=object))
+
+
+def sort_batch(guests_df, preferences_df):
+    """
+    A batch with its guests sorted by ID (reservation order); the preference rows follow their guests, each guest's
+    rows keeping their order.
+    """
+    order = np.argsort(guests_df['guest'].to_numpy(dtype=object), kind='stable')
+    sorted_position = np.empty(len(order), dtype=np.int64)
+    sorted_position[order] = np.arange(len(order))
+    pref_guests = guest_positions(guests_df, preferences_df)
+    return (guests_df.iloc[order].reset_index(drop=True),
+            preferences_df.iloc[np.argsort(sorted_position[pref_guests], kind='stable')].reset_index(drop=True))
+
+
+def merge_sorted_runs(runs, batch_size=100_000):
+    """
+    Merges runs sorted by guest ID into batches in reservation order. Each round takes, from every run, the guests
+    up to the smallest last ID among the runs' current blocks: no guest still unread can come before them.
+    Runs are read in blocks of batch_size / number of runs guests, so about batch_size guests (and their preference
+    rows) are in memory at a time, however many runs there are, and batches have at most batch_size guests.
+
+    Parameters:
+    runs (list): (guests path, preferences path) of each run, in the source layout and sorted by guest ID.
+    batch_size (int): guests per merged batch.
+
+    Yields:
+    tuple: (guests DataFrame, preferences DataFrame) of each merged batch.
+    """
+    block_size = max(1, batch_size // max(1, len(runs)))
+    buffers = [[read_guest_batches(guests_path, preferences_path, block_size), None, None] for guests_path, preferences_path in runs]
+    while True:
+        for buffer in buffers: # refill the emptied buffers (None: run exhausted)
+            while buffer[0] is not None and (buffer[1] is None or len(buffer[1]) == 0):
+                buffer[1:] = next(buffer[0], (None, None))
+                if buffer[1] is None:
+                    buffer[0] = None
+        buffers = [buffer for buffer in buffers if buffer[0] is not None]
+        if not buffers:
+            return
+
+        cutoff = min(buffer[1]['guest'].iloc[-1] for buffer in buffers)
+        guest_parts, preference_parts = [], []
+        for buffer in buffers:
+            guests_df, preferences_df = buffer[1], buffer[2]
+            taken = int(np.searchsorted(guests_df['guest'].to_numpy(dtype=object), cutoff, side='right'))
+            # Preference rows are grouped in guest order: the rows of the taken guests come first
+            rows = int(np.count_nonzero(guest_positions(guests_df, preferences_df) < taken))
+            guest_parts.append(guests_df.iloc[:taken])
+            preference_parts.append(preferences_df.iloc[:rows])
+            buffer[1:] = guests_df.iloc[taken:], preferences_df.iloc[rows:]
+        guests_df, preferences_df = sort_batch(pd.concat(guest_parts, ignore_index=True),
+                                               pd.concat(preference_parts, ignore_index=True))
+        # More runs than batch_size guests: blocks of one guest each, split again into batches of batch_size guests
+        positions = guest_positions(guests_df, preferences_df)
+        for start in range(0, len(guests_df), batch_size):
+            rows = (positions >= start) & (positions < start + batch_size)
+            yield guests_df.iloc[start:start + batch_size], preferences_df[rows]
+
+
+def sort_guest_files(guests_path, preferences_path, sorted_guests_path, sorted_preferences_path, batch_size=100_000):
+    """
+    Writes the guests and preferences files in reservation order (sorted by guest ID), for streaming.
+    External merge sort: each batch of the source is sorted and written to a temporary run, then the runs are merged
+    (merge_sorted_runs): about batch_size guests are in memory at a time, in either pass.
+
+    Parameters:
+    guests_path, preferences_path (str): source files, in the source layout (see read_guest_batches).
+    sorted_guests_path, sorted_preferences_path (str): output files (.parquet or .csv).
+    batch_size (int): guests per batch.
+    """
+    from src.Data_generation import TableWriter
+    file_format = 'csv' if os.path.splitext(sorted_guests_path)[1].lower() == '.csv' else 'parquet'
+    with tempfile.TemporaryDirectory() as run_dir:
+        runs = []
+        for index, batch in enumerate(read_guest_batches(guests_path, preferences_path, batch_size)):
+            paths = tuple(os.path.join(run_dir, f"{name}_{index}.{file_format}") for name in ('guests', 'preferences'))
+            for path, df in zip(paths, sort_batch(*batch)):
+                with TableWriter(path, file_format) as writer:
+                    writer.write(df)
+            runs.append(paths)
+
+        with TableWriter(sorted_guests_path, file_format) as guests_writer, \
+             TableWriter(sorted_preferences_path, file_format) as preferences_writer:
+            written = {'guests': False, 'preferences': False}
+            for guests_df, preferences_df in merge_sorted_runs(runs, batch_size):
+                for name, writer, df in (('guests', guests_writer, guests_df), ('preferences', preferences_writer, preferences_df)):
+                    if len(df) > 0: # empty frames have no column types (the Parquet schemas of a file must match)
+                        writer.write(df)
+                        written[name] = True
+            # Empty sources: the files are still written, with their columns
+            if not written['guests']:
+                guests_writer.write(pd.DataFrame(columns=['guest', 'discount']))
+            if not written['preferences']:
+                preferences_writer.write(pd.DataFrame(columns=['guest', 'hotel', 'priority']))
+
+
+def streaming_reservation_allocation(hotels_df, batches, sink=None, check_order=False):
+    """
+    Runs the streaming reservation allocation to the end.
+
+    Parameters:
+    hotels_df (DataFrame): columns 'hotel', 'rooms', 'price'.
+    batches (iterable): (guests_df, preferences_df) pairs, e.g. read_guest_batches(guests_path, preferences_path).
+    sink (callable, optional): receives the assignments DataFrame of each batch.
+    check_order (bool): raise a ValueError if the guests are not in reservation order.
+
+    Returns:
+    dict: 'allocation_report' (without guest lists) and 'statistics', as reservation_allocation.
+    """
+    allocator = StreamingReservation(hotels_df)
+    for _ in allocator.run(batches, sink, check_order):
+        pass
+    return {
+        'allocation_report': allocator.allocation_report(),
+        'statistics': allocator.statistics()
+    }
@@ -0,0 +1,201 @@
+import argparse
+import json
+import os
+import time
+
+"""
+Headless batch runner: runs allocation methods on a dataset and writes their results, without the Streamlit app.
+Only the compute core is imported (numpy and the columnar methods; scipy for the optimal method): no streamlit,
+matplotlib or seaborn, and no pandas once the columnar cache of the dataset exists (see load_allocation_data).
+pyarrow imports pandas itself when it builds the Parquet files: --format json starts and finishes fastest.
+For each method it writes, in the output folder:
+- <method>_assignments.parquet (or .json): one row per guest: guest, hotel (null if unassigned), satisfaction
+  and, for the methods that return it, revenue;
+- <method>_report.parquet (or .json): one row per hotel: rooms occupied and available, guests accommodated,
+  revenue and the list of guests;
+and statistics.json with the statistics and execution time of every method run.
+Parquet files are written with pyarrow; JSON tables are column-oriented ({column: [values]}).
+
+Usage (from Hotel_Allocation_Environment):
+    python -m src.Batch_Runner --methods Reservation,Price --data-dir Data_storing/synthetic --output-dir Data_storing/batch
+"""
+
+METHODS = ('Random', 'Reservation', 'Price', 'Availability', 'Optimal', 'Stable')
+FORMATS = ('parquet', 'json')
+
+
+def columnar_methods():
+    """Columnar version of each method, by name (imported on use, so that --help stays instant)."""
+    from src.Allocation_Methods.Availability_Allocation import availability_allocation_columnar
+    from src.Allocation_Methods.Optimal_Allocation import optimal_allocation_columnar
+    from src.Allocation_Methods.Price_Allocation import price_allocation_columnar
+    from src.Allocation_Methods.Random_Allocation import random_allocation_columnar
+    from src.Allocation_Methods.Reservation_Allocation import reservation_allocation_columnar
+    from src.Allocation_Methods.Stable_Allocation import stable_allocation_columnar
+    return {
+        'Random': random_allocation_columnar,
+        'Reservation': reservation_allocation_columnar,
+        'Price': price_allocation_columnar,
+        'Availability': availability_allocation_columnar,
+        'Optimal': optimal_allocation_columnar,
+        'Stable': stable_allocation_columnar
+    }
+
+
+def run_methods(data, method_names, seed=None):
+    """
+    Runs methods on a dataset, one after the other.
+
+    Parameters:
+    data (AllocationData): the dataset.
+    method_names (list): names among METHODS.
+    seed (int, optional): seed of the random method.
+
+    Returns:
+    dict: method name -> (result, execution time in seconds).
+    """
+    methods = columnar_methods()
+    outcomes = {}
+    for method_name in method_names:
+        kwargs = {'seed': seed} if method_name == 'Random' else {}
+        start_time = time.perf_counter()
+        result = methods[method_name](data, **kwargs)
+        outcomes[method_name] = (result, time.perf_counter() - start_time)
+    return outcomes
+
+
+def assignment_columns(data, result):
+    """Columns of the assignments table of a result (see above)."""
+    import numpy as np
+    assignment = np.asarray(result['assignment'])
+    assigned = assignment >= 0
+    hotels = np.full(len(assignment), None, dtype=object)
+    hotels[assigned] = data.hotel_dictionary.decode(assignment[assigned])
+    columns = {'guest': data.guest_ids, 'hotel': hotels, 'satisfaction': np.asarray(result['guest_satisfaction'])}
+    if 'guest_revenues' in result:
+        columns['revenue'] = np.asarray(result['guest_revenues'])
+    return columns
+
+
+def report_columns(report):
+    """Columns of the report table of a HotelReport; the guests column is the (offsets, guest IDs) pair."""
+    return {
+        'hotel': report.hotel_ids,
+        'rooms_occupied': report.rooms_occupied,
+        'rooms_available': report.rooms_available,
+        'number_of_guests_accommodated': report.rooms_occupied,
+        'revenue': report.revenue,
+        'guests': report.grouped_guests()
+    }
+
+
+def write_table(columns, path, file_format='parquet'):
+    """
+    Writes a table given as columns (arrays, or (offsets, values) pairs for list columns).
+
+    Parameters:
+    columns (dict): column name -> values.
+    path (str): output file.
+    file_format (str): 'parquet' (pyarrow) or 'json' (column-oriented).
+    """
+    if file_format == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        arrays = {}
+        for name, values in columns.items():
+            if isinstance(values, tuple):
+                offsets, items = values
+                arrays[name] = pa.ListArray.from_arrays(pa.array(offsets, type=pa.int32()), pa.array(items))
+            else:
+                arrays[name] = pa.array(values)
+        pq.write_table(pa.table(arrays), path)
+    elif file_format == 'json':
+        table = {}
+        for name, values in columns.items():
+            if isinstance(values, tuple):
+                offsets, items = values[0].tolist(), values[1].tolist()
+                table[name] = [items[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+            else:
+                table[name] = values.tolist()
+        with open(path, 'w') as json_file:
+            json.dump(table, json_file)
+    else:
+        raise ValueError(f"Unknown format: {file_format!r}")
+
+
+def write_outputs(data, outcomes, output_dir, file_format='parquet'):
+    """
+    Writes the assignments and report of every method and statistics.json (see above).
+    Returns the paths of the written files.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    summary = {
+        'dataset': {'fingerprint': data.fingerprint, 'num_guests': data.num_guests, 'num_hotels': data.num_hotels},
+        'methods': {}
+    }
+    for method_name, (result, elapsed_time) in outcomes.items():
+        for table, columns in (('assignments', assignment_columns(data, result)),
+                               ('report', report_columns(result['allocation_report']))):
+            path = os.path.join(output_dir, f"{method_name.lower()}_{table}.{file_format}")
+            write_table(columns, path, file_format)
+            paths.append(path)
+        summary['methods'][method_name] = {**result['statistics'], 'execution_time': elapsed_time}
+        if 'objective_value' in result:
+            summary['methods'][method_name]['objective_value'] = result['objective_value']
+
+    json_path = os.path.join(output_dir, "statistics.json")
+    with open(json_path, 'w') as json_file:
+        json.dump(summary, json_file, indent=2)
+    paths.append(json_path)
+    return paths
+
+
+def parse_methods(text):
+    """'Reservation,price' -> ['Reservation', 'Price'] (case-insensitive; 'all' for every method)."""
+    if text.strip().lower() == 'all':
+        return list(METHODS)
+    names = {name.lower(): name for name in METHODS}
+    methods = []
+    for name in text.split(','):
+        if name.strip().lower() not in names:
+            raise argparse.ArgumentTypeError(f"unknown method {name.strip()!r} (choose from {', '.join(METHODS)})")
+        methods.append(names[name.strip().lower()])
+    return methods
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Runs allocation methods on a dataset and writes their results.")
+    parser.add_argument('--methods', type=parse_methods, default=list(METHODS),
+                        help="comma-separated method names, or 'all' (default)")
+    parser.add_argument('--output-dir', required=True)
+    parser.add_argument('--format', choices=FORMATS, default='parquet', help="format of the assignments and report tables")
+    parser.add_argument('--data-dir', default=None, help="folder of the hotels, guests and preferences files")
+    parser.add_argument('--hotels', default=None, help="path of the hotels file")
+    parser.add_argument('--guests', default=None, help="path of the guests file")
+    parser.add_argument('--preferences', default=None, help="path of the preferences file")
+    parser.add_argument('--cache-dir', default=None)
+    parser.add_argument('--no-cache', action='store_true', help="parse the files without reading or writing the cache")
+    parser.add_argument('--seed', type=int, default=None, help="seed of the random method")
+    args = parser.parse_args(argv)
+    if args.format == 'parquet':
+        try:
+            import pyarrow # noqa: F401
+        except ImportError:
+            parser.error("Parquet output needs pyarrow: install it or use --format json")
+
+    from src.Data_loading import load_allocation_data
+    start_time = time.perf_counter()
+    data = load_allocation_data(args.hotels, args.guests, args.preferences, args.cache_dir,
+                                use_cache=not args.no_cache, data_dir=args.data_dir)
+    print(f"Loaded {data.num_guests} guests and {data.num_hotels} hotels in {time.perf_counter() - start_time:.3f} s")
+
+    outcomes = run_methods(data, args.methods, args.seed)
+    for method_name, (result, elapsed_time) in outcomes.items():
+        print(f"{method_name:<12} {elapsed_time:9.3f} s  {result['statistics']}")
+    for path in write_outputs(data, outcomes, args.output_dir, args.format):
+        print(f"Written {path}")
+
+
+if __name__ == "__main__":
+    main()
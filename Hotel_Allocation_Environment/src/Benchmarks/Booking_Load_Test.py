@@ -0,0 +1,172 @@
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+import numpy as np
+
+from src.Benchmarks.Scaling_Benchmark import synthetic_data
+from src.Booking_Engine import POLICIES, BookingEngine, serve
+
+"""
+Load test of the online booking engine (src/Booking_Engine.py): every guest of a dataset sends one booking request,
+in a shuffled order, from many concurrent clients at once:
+- 'threads': worker threads call engine.book directly (in-process API);
+- 'asyncio': client tasks send their requests to a local asyncio booking server (serve), one TCP connection each.
+All clients start together (barrier), so requests for the same hotels contend for the same shard locks; fewer
+shards (--shards 1 is a global lock) means more contention.
+Reports the throughput (requests per second) and the latency of the requests (p50, p99, max, in milliseconds),
+and checks the inventory afterwards: no hotel overbooked, and the rooms left match the bookings.
+
+Usage (from Hotel_Allocation_Environment):
+    python -m src.Benchmarks.Booking_Load_Test --guests 100000 --hotels 2000 --clients 32 --policy price
+"""
+
+MODES = ('threads', 'asyncio')
+
+
+def split_requests(guest_ids, clients, seed=0):
+    """Shuffled guest IDs, dealt round-robin to the clients (one list of requests per client)."""
+    order = np.random.default_rng(seed).permutation(len(guest_ids))
+    requests = np.asarray(guest_ids, dtype=object)[order].tolist()
+    return [requests[client::clients] for client in range(clients)]
+
+
+def run_threads(engine, requests_per_client):
+    """
+    Each client is a thread that sends its requests one after the other.
+    Returns (latencies in seconds, elapsed seconds).
+    """
+    latencies = [[] for _ in requests_per_client]
+    barrier = threading.Barrier(len(requests_per_client) + 1)
+
+    def client(index):
+        clock, book, client_latencies = time.perf_counter, engine.book, latencies[index]
+        barrier.wait()
+        for guest_id in requests_per_client[index]:
+            start = clock()
+            book(guest_id)
+            client_latencies.append(clock() - start)
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(len(requests_per_client))]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start_time = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return [latency for client_latencies in latencies for latency in client_latencies], time.perf_counter() - start_time
+
+
+async def run_asyncio(engine, requests_per_client):
+    """
+    Each client is a task with its own connection to a local booking server, sending one request at a time.
+    Returns (latencies in seconds, elapsed seconds).
+    """
+    server = await serve(engine)
+    port = server.sockets[0].getsockname()[1]
+    latencies = [[] for _ in requests_per_client]
+    connected = asyncio.Event()
+
+    async def client(index, reader, writer):
+        await connected.wait()
+        for guest_id in requests_per_client[index]:
+            start = time.perf_counter()
+            writer.write(json.dumps({'op': 'book', 'guest': guest_id}).encode() + b"\n")
+            await writer.drain()
+            await reader.readline()
+            latencies[index].append(time.perf_counter() - start)
+        writer.close()
+
+    connections = [await asyncio.open_connection('127.0.0.1', port) for _ in requests_per_client]
+    tasks = [asyncio.create_task(client(index, *connection)) for index, connection in enumerate(connections)]
+    start_time = time.perf_counter()
+    connected.set()
+    await asyncio.gather(*tasks)
+    elapsed_time = time.perf_counter() - start_time
+    server.close()
+    await server.wait_closed()
+    return [latency for client_latencies in latencies for latency in client_latencies], elapsed_time
+
+
+def check_inventory(engine):
+    """Consistency of the engine state: no negative room count, and rooms taken = bookings, for every hotel."""
+    assignment, rooms_left = engine.snapshot()
+    booked = np.bincount(assignment[assignment >= 0], minlength=engine.data.num_hotels)
+    return bool((rooms_left >= 0).all() and (engine.data.rooms - rooms_left == booked).all())
+
+
+def load_test(data, policy='reservation', mode='threads', clients=16, num_shards=64, seed=0):
+    """
+    Runs one load test on a new engine.
+
+    Returns:
+    dict: settings, throughput, latency percentiles (ms), bookings and the inventory check.
+    """
+    engine = BookingEngine(data, policy, num_shards)
+    requests_per_client = split_requests(data.guest_ids, clients, seed)
+    if mode == 'threads':
+        latencies, elapsed_time = run_threads(engine, requests_per_client)
+    elif mode == 'asyncio':
+        latencies, elapsed_time = asyncio.run(run_asyncio(engine, requests_per_client))
+    else:
+        raise ValueError(f"Unknown mode: {mode!r}")
+
+    latencies = np.array(latencies) * 1000
+    assignment, _ = engine.snapshot()
+    return {
+        'policy': policy,
+        'mode': mode,
+        'clients': clients,
+        'shards': num_shards,
+        'requests': len(latencies),
+        'seconds': elapsed_time,
+        'throughput': len(latencies) / elapsed_time if elapsed_time > 0 else 0,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'max_ms': float(latencies.max()),
+        'booked': int(np.count_nonzero(assignment >= 0)),
+        'inventory_ok': check_inventory(engine)
+    }
+
+
+def format_record(record):
+    return (f"{record['policy']:<12} {record['mode']:<8} {record['clients']:>4} clients {record['shards']:>4} shards  "
+            f"{record['throughput']:10.0f} req/s  p50 {record['p50_ms']:7.3f} ms  p99 {record['p99_ms']:7.3f} ms  "
+            f"max {record['max_ms']:8.3f} ms  booked {record['booked']}  inventory {'ok' if record['inventory_ok'] else 'BROKEN'}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test of the online booking engine.")
+    parser.add_argument('--guests', type=int, default=100_000, help="size of the synthetic dataset")
+    parser.add_argument('--hotels', type=int, default=2_000)
+    parser.add_argument('--data-dir', default=None, help="use the dataset of this folder instead of a synthetic one")
+    parser.add_argument('--policies', default=','.join(POLICIES), help="comma-separated policies")
+    parser.add_argument('--modes', default=','.join(MODES), help="'threads', 'asyncio' or both")
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--shards', default='1,64', help="comma-separated numbers of lock shards")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None, help="also write the records to this JSON file")
+    args = parser.parse_args(argv)
+
+    if args.data_dir:
+        from src.Data_loading import load_allocation_data
+        data = load_allocation_data(data_dir=args.data_dir)
+    else:
+        data = synthetic_data(args.guests, args.hotels, args.seed)
+    records = []
+    for policy in args.policies.split(','):
+        for mode in args.modes.split(','):
+            for num_shards in map(int, args.shards.split(',')):
+                records.append(load_test(data, policy, mode, args.clients, num_shards, args.seed))
+                print(format_record(records[-1]))
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as json_file:
+            json.dump(records, json_file, indent=2)
+        print(f"Written {args.output}")
+
+
+if __name__ == "__main__":
+    main()
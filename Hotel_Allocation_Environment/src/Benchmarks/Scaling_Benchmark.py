@@ -0,0 +1,237 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import time
+import tracemalloc
+from datetime import datetime, timezone
+import numpy as np
+
+from src.Allocation_Methods.Price_Allocation import price_allocation, price_allocation_columnar
+from src.Allocation_Methods.Random_Allocation import random_allocation, random_allocation_columnar
+from src.Allocation_Methods.Availability_Allocation import availability_allocation, availability_allocation_columnar
+from src.Allocation_Methods.Reservation_Allocation import reservation_allocation, reservation_allocation_columnar
+from src.Allocation_Methods.Optimal_Allocation import optimal_allocation, optimal_allocation_columnar
+from src.Allocation_Methods.Stable_Allocation import stable_allocation, stable_allocation_columnar
+from src.Columnar_Core.Allocation_Data import AllocationData
+
+"""
+Scaling benchmark of the allocation strategies (the four greedy ones, the optimal and the stable one), from the size
+of the current data (4k guests, 400 hotels) up to millions of guests and tens of thousands of hotels, on synthetic datasets.
+Each strategy is measured in two variants:
+- 'dict': the dictionary-based function (random_allocation, ...), as called by HotelManager on the dictionaries;
+- 'columnar': its columnar version (random_allocation_columnar, ...), on AllocationData.
+Timings use time.perf_counter over several repeats; the peak memory is measured with tracemalloc in one extra run
+(tracemalloc slows allocations down, so it is never active while timing).
+A strategy that exceeds the time budget at one size is not run at the larger sizes, and a run that fails
+(any exception, e.g. MemoryError) is recorded with its error and not run at the larger sizes, while the other strategies
+go on: the results show which strategy breaks first.
+
+Usage (from Hotel_Allocation_Environment):
+    python -m src.Benchmarks.Scaling_Benchmark --sizes 4000x400,400000x10000 --repeats 3
+Writes benchmark.json and scaling.png in the output folder (Data_storing/benchmarks by default).
+"""
+
+STRATEGIES = {
+    "Random": (random_allocation, random_allocation_columnar),
+    "Reservation": (reservation_allocation, reservation_allocation_columnar),
+    "Price": (price_allocation, price_allocation_columnar),
+    "Availability": (availability_allocation, availability_allocation_columnar),
+    "Optimal": (optimal_allocation, optimal_allocation_columnar),
+    "Stable": (stable_allocation, stable_allocation_columnar)
+}
+VARIANTS = ('dict', 'columnar')
+# (number of guests, number of hotels)
+DEFAULT_SIZES = [(4_000, 400), (40_000, 4_000), (400_000, 10_000), (1_000_000, 20_000), (4_000_000, 40_000)]
+DEFAULT_OUTPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                                  "Data_storing", "benchmarks")
+
+
+def synthetic_data(num_guests, num_hotels, seed=0):
+    """
+    Synthetic dataset with the shape of the real one: 1 to 10 preferences per guest, prices between 50 and 300,
+    discounts up to 25%, and about 0.8 rooms per guest (some guests stay unassigned).
+    """
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(1, 11, num_guests)
+    pref_offsets = np.concatenate(([0], np.cumsum(lengths)))
+    mean_rooms = max(1, round(0.8 * num_guests / num_hotels))
+    return AllocationData(np.array([f"guest_{i}" for i in range(1, num_guests + 1)], dtype=object),
+                          np.round(rng.random(num_guests) * 0.25, 2),
+                          np.array([f"hotel_{i}" for i in range(1, num_hotels + 1)], dtype=object),
+                          rng.integers(1, 2 * mean_rooms, num_hotels, endpoint=True),
+                          rng.integers(50, 300, num_hotels, endpoint=True),
+                          pref_offsets, rng.integers(0, num_hotels, pref_offsets[-1]).astype(np.int32))
+
+
+def to_dicts(data):
+    """Guests and hotels dictionaries of a dataset (input of the dictionary-based functions)."""
+    preferred_ids = data.hotel_ids[data.pref_hotels].tolist()
+    offsets = data.pref_offsets.tolist()
+    guests_dict = {guest_id: {'discount': discount, 'preferences': preferred_ids[offsets[guest]:offsets[guest + 1]]}
+                   for guest, (guest_id, discount) in enumerate(zip(data.guest_ids.tolist(), data.discount.tolist()))}
+    return guests_dict, data.hotels_dict()
+
+
+def measure(function, repeats):
+    """
+    Times function() repeats times with perf_counter, then runs it once more under tracemalloc.
+
+    Returns:
+    tuple: (list of times in seconds, peak memory in bytes, result of the last run).
+    """
+    times = []
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+        del result
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return times, peak, result
+
+
+def run_benchmark(sizes=DEFAULT_SIZES, strategies=tuple(STRATEGIES), variants=VARIANTS, repeats=3,
+                  max_seconds=60.0, dict_max_guests=1_000_000, seed=0, verbose=True):
+    """
+    Runs the benchmark.
+
+    Parameters:
+    sizes (list): (number of guests, number of hotels) of each dataset, from the smallest.
+    strategies (iterable): names of the strategies (keys of STRATEGIES).
+    variants (iterable): 'dict' and/or 'columnar'.
+    repeats (int): timed runs per measurement.
+    max_seconds (float): a strategy/variant slower than this (median) is skipped at the larger sizes.
+    dict_max_guests (int): the dict variant is skipped above this number of guests (the dictionaries alone
+    take several GB of memory at millions of guests).
+    seed (int): seed of the synthetic datasets and of the random allocation.
+    verbose (bool): print one line per measurement.
+
+    Returns:
+    list: one record (dict) per strategy, variant and size.
+    """
+    records = []
+    over_budget = set()
+    failed = set()
+    for num_guests, num_hotels in sizes:
+        data = synthetic_data(num_guests, num_hotels, seed)
+        dicts = to_dicts(data) if 'dict' in variants and num_guests <= dict_max_guests else None
+        for strategy in strategies:
+            for variant in variants:
+                record = {'strategy': strategy, 'variant': variant, 'num_guests': num_guests, 'num_hotels': num_hotels,
+                          'num_preferences': int(data.pref_offsets[-1]), 'repeats': repeats}
+                method, columnar_method = STRATEGIES[strategy]
+                kwargs = {'seed': seed} if strategy == 'Random' else {}
+                if (strategy, variant) in failed:
+                    record['skipped'] = "failed at a smaller size"
+                elif (strategy, variant) in over_budget:
+                    record['skipped'] = f"over the time budget ({max_seconds} s) at a smaller size"
+                elif variant == 'dict' and dicts is None:
+                    record['skipped'] = f"dict variant limited to {dict_max_guests} guests"
+                else:
+                    if variant == 'dict':
+                        function = lambda: method(*dicts, **kwargs)
+                    else:
+                        function = lambda: columnar_method(data, **kwargs)
+                    try:
+                        times, peak, result = measure(function, repeats)
+                    except Exception as error: # MemoryError, solver errors, ...: only this strategy and variant stop
+                        gc.collect()
+                        record['error'] = repr(error)
+                        failed.add((strategy, variant))
+                    else:
+                        record.update({
+                            'times': times,
+                            'best': min(times),
+                            'median': float(np.median(times)),
+                            'peak_memory_mb': peak / 2**20,
+                            'assigned_guests_count': result['statistics']['assigned_guests_count']
+                        })
+                        del result
+                        if record['median'] > max_seconds:
+                            over_budget.add((strategy, variant))
+                records.append(record)
+                if verbose:
+                    print(format_record(record))
+        del data, dicts
+    return records
+
+
+def format_record(record):
+    label = f"{record['strategy']:<12} {record['variant']:<8} {record['num_guests']:>10} guests {record['num_hotels']:>7} hotels"
+    if 'median' in record:
+        return f"{label}  median {record['median']:9.4f} s  best {record['best']:9.4f} s  peak {record['peak_memory_mb']:9.1f} MB"
+    return f"{label}  {record.get('error') or record.get('skipped')}"
+
+
+def environment():
+    """Machine and library versions, stored with the results."""
+    import pandas as pd
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def write_results(records, output_dir=DEFAULT_OUTPUT_DIR, chart=True):
+    """
+    Writes benchmark.json ({'environment', 'records'}) and, with chart, scaling.png in output_dir.
+    Returns the paths of the written files.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    json_path = os.path.join(output_dir, "benchmark.json")
+    with open(json_path, 'w') as json_file:
+        json.dump({'environment': environment(), 'records': records}, json_file, indent=2)
+    paths = [json_path]
+    if chart:
+        from src.Data_Visualization.run_all_visualization import plot_scaling
+        chart_path = os.path.join(output_dir, "scaling.png")
+        fig = plot_scaling(records)
+        fig.savefig(chart_path)
+        paths.append(chart_path)
+    return paths
+
+
+def parse_sizes(text):
+    """'4000x400,40000x4000' -> [(4000, 400), (40000, 4000)]"""
+    sizes = []
+    for size in text.split(','):
+        num_guests, num_hotels = size.lower().split('x')
+        sizes.append((int(num_guests), int(num_hotels)))
+    return sizes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scaling benchmark of the allocation strategies.")
+    parser.add_argument('--sizes', type=parse_sizes, default=DEFAULT_SIZES,
+                        help="comma-separated GUESTSxHOTELS sizes (default: 4000x400 up to 4000000x40000)")
+    parser.add_argument('--strategies', default=','.join(STRATEGIES), help="comma-separated strategy names")
+    parser.add_argument('--variants', default=','.join(VARIANTS), help="'dict', 'columnar' or both")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--max-seconds', type=float, default=60.0, help="time budget per run before skipping larger sizes")
+    parser.add_argument('--dict-max-guests', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument('--no-chart', action='store_true', help="only write the JSON file")
+    args = parser.parse_args(argv)
+
+    records = run_benchmark(args.sizes, args.strategies.split(','), args.variants.split(','), args.repeats,
+                            args.max_seconds, args.dict_max_guests, args.seed)
+    for path in write_results(records, args.output_dir, chart=not args.no_chart):
+        print(f"Written {path}")
+
+
+if __name__ == "__main__":
+    main()
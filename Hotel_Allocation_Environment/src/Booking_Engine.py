@@ -0,0 +1,192 @@
+import asyncio
+import json
+import threading
+from contextlib import ExitStack
+import numpy as np
+
+from src.Columnar_Core.Ranked_Allocation import hotel_rank, ranked_preferences
+
+"""
+Online booking engine: serves booking requests one guest at a time, from many threads or asyncio tasks at once,
+with the rules of the reservation, price and availability methods:
+- 'reservation': the first hotel of the guest's preference list with rooms left, else no booking;
+- 'price' / 'availability': the first preferred hotel with rooms left in price order (cheapest first) or in
+  availability order (most roomy first), else the first hotel with rooms left in that order.
+Requests served one at a time in reservation order give exactly the allocation of the batch method.
+
+Inventory: the room counts are one Python list, and each hotel is guarded by one of num_shards locks
+(hotel code % num_shards): two bookings only wait for each other when their hotels share a shard, and there is no
+global lock. A full hotel is skipped without taking its lock (reading a count is atomic); the count is checked again
+under the lock before it is decremented, so a hotel is never overbooked. Guests are guarded the same way (a guest
+holds at most one booking, and booking again returns it). Lock order is always guest, then fallback cursor, then
+hotel, so the engine cannot deadlock.
+The fallback ("first hotel in rank order with rooms left") keeps a cursor: the hotels before it are full.
+Only the fallback path takes the cursor lock; a cancellation moves the cursor back to the freed hotel.
+
+serve() exposes an engine on a local asyncio TCP server (one JSON object per line), e.g. for load tests
+(src/Benchmarks/Booking_Load_Test.py).
+"""
+
+POLICIES = ('reservation', 'price', 'availability')
+
+
+class BookingEngine:
+    def __init__(self, data, policy='reservation', num_shards=64):
+        """
+        Parameters:
+        data (AllocationData): guests (discount, preferences) and hotels (rooms, price); the engine works on its
+        own copy of the room counts.
+        policy (str): 'reservation', 'price' or 'availability' (see above).
+        num_shards (int): number of locks the hotels (and the guests) are spread over.
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}, not {policy!r}")
+        if num_shards < 1:
+            raise ValueError(f"num_shards must be at least 1, not {num_shards}")
+        self.data = data
+        self.policy = policy
+        self.num_shards = num_shards
+
+        if policy == 'reservation':
+            # Preference order, unknown hotels dropped
+            known = data.pref_hotels >= 0
+            entry_guest = np.repeat(np.arange(data.num_guests), data.pref_lengths)[known]
+            offsets = np.concatenate(([0], np.cumsum(np.bincount(entry_guest, minlength=data.num_guests))))
+            hotels = data.pref_hotels[known]
+            rank = np.zeros(0, dtype=np.int64) # no fallback
+        else:
+            rank = hotel_rank(data.price) if policy == 'price' else hotel_rank(data.rooms, descending=True)
+            offsets, hotels = ranked_preferences(data, rank)
+        # Python lists: scalar access is much faster than on NumPy arrays in the booking path
+        self._offsets, self._hotels = offsets.tolist(), hotels.tolist()
+        self._rank = rank.tolist()
+        self._rank_position = [0] * data.num_hotels
+        for position, hotel in enumerate(self._rank):
+            self._rank_position[hotel] = position
+        self._guest_codes = {guest_id: code for code, guest_id in enumerate(data.guest_ids.tolist())}
+        self._hotel_ids = data.hotel_ids.tolist()
+
+        self.rooms_left = data.rooms.tolist()
+        self.assignment = [-1] * data.num_guests
+        self._hotel_locks = [threading.Lock() for _ in range(num_shards)]
+        self._guest_locks = [threading.Lock() for _ in range(num_shards)]
+        self._cursor = 0 # rank positions before it are full
+        self._cursor_lock = threading.Lock()
+
+    def book(self, guest_id):
+        """
+        Books a room for a guest (a KeyError is raised for unknown guests).
+
+        Returns:
+        hotel_id of the booking (the existing one if the guest already has a booking), or None if no hotel of the
+        policy has rooms left.
+        """
+        guest = self._guest_codes[guest_id]
+        with self._guest_locks[guest % self.num_shards]:
+            hotel = self.assignment[guest]
+            if hotel < 0:
+                hotel = self._reserve(guest)
+                self.assignment[guest] = hotel
+        return self._hotel_ids[hotel] if hotel >= 0 else None
+
+    def cancel(self, guest_id):
+        """Cancels the booking of a guest and gives the room back. Returns the hotel_id freed, or None."""
+        guest = self._guest_codes[guest_id]
+        with self._guest_locks[guest % self.num_shards]:
+            hotel = self.assignment[guest]
+            if hotel < 0:
+                return None
+            with self._hotel_locks[hotel % self.num_shards]:
+                self.rooms_left[hotel] += 1
+            self.assignment[guest] = -1
+            if self._rank:
+                with self._cursor_lock:
+                    self._cursor = min(self._cursor, self._rank_position[hotel])
+        return self._hotel_ids[hotel]
+
+    async def book_async(self, guest_id):
+        """
+        book for asyncio tasks: runs in a worker thread (asyncio.to_thread), so that waiting for a lock held by
+        another thread never blocks the event loop.
+        """
+        return await asyncio.to_thread(self.book, guest_id)
+
+    async def cancel_async(self, guest_id):
+        """cancel for asyncio tasks, in a worker thread as book_async."""
+        return await asyncio.to_thread(self.cancel, guest_id)
+
+    def _take(self, hotel):
+        """Takes one room of a hotel if it has one left (atomic for the hotel's shard)."""
+        if self.rooms_left[hotel] <= 0: # full: skipped without locking
+            return False
+        with self._hotel_locks[hotel % self.num_shards]:
+            if self.rooms_left[hotel] > 0:
+                self.rooms_left[hotel] -= 1
+                return True
+        return False
+
+    def _reserve(self, guest):
+        """Hotel code taken for a guest following the policy, -1 if none."""
+        hotels = self._hotels
+        for entry in range(self._offsets[guest], self._offsets[guest + 1]):
+            if self._take(hotels[entry]):
+                return hotels[entry]
+        if not self._rank:
+            return -1
+        with self._cursor_lock:
+            position = self._cursor
+            while position < len(self._rank) and not self._take(self._rank[position]):
+                position += 1
+            self._cursor = position
+            return self._rank[position] if position < len(self._rank) else -1
+
+    def snapshot(self):
+        """
+        Consistent copy of the state (waits for the bookings in flight).
+
+        Returns:
+        tuple: (assignment, rooms_left) arrays, as returned by the allocation kernels.
+        """
+        with ExitStack() as stack:
+            for lock in self._guest_locks + self._hotel_locks:
+                stack.enter_context(lock)
+            return np.array(self.assignment, dtype=np.int32), np.array(self.rooms_left, dtype=np.int64)
+
+    def result(self):
+        """Report, statistics and per-guest arrays of the bookings so far, as returned by the batch method."""
+        from src.Allocation_Methods.Availability_Allocation import availability_allocation_result
+        from src.Allocation_Methods.Price_Allocation import price_allocation_result
+        from src.Allocation_Methods.Reservation_Allocation import reservation_allocation_result
+        result_function = {'reservation': reservation_allocation_result, 'price': price_allocation_result,
+                           'availability': availability_allocation_result}[self.policy]
+        return result_function(self.data, *self.snapshot())
+
+
+async def handle_connection(engine, reader, writer):
+    """
+    One client connection: each line is a JSON request {"op": "book" or "cancel", "guest": guest_id},
+    answered by one line {"guest": guest_id, "hotel": hotel_id or null} (or {"error": message}).
+    """
+    try:
+        while line := await reader.readline():
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("request must be a JSON object")
+                operations = {'book': engine.book_async, 'cancel': engine.cancel_async}
+                operation = operations[request.get('op', 'book')]
+                response = {'guest': request['guest'], 'hotel': await operation(request['guest'])}
+            except (KeyError, ValueError, TypeError, AttributeError) as error: # the client gets an answer, whatever it sent
+                response = {'error': repr(error)}
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+    finally:
+        writer.close()
+
+
+async def serve(engine, host='127.0.0.1', port=0):
+    """
+    Starts a local booking server for an engine (port 0: any free port).
+    Returns the asyncio server: its port is server.sockets[0].getsockname()[1].
+    """
+    return await asyncio.start_server(lambda reader, writer: handle_connection(engine, reader, writer), host, port)
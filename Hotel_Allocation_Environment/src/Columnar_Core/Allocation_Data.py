@@ -0,0 +1,217 @@
+import hashlib
+import os
+from functools import cached_property
+import numpy as np
+from src.Columnar_Core.Id_Dictionary import IdDictionary
+from src.Instrumentation import phase
+
+"""
+Columnar data model shared by all allocation methods.
+Instead of a dictionary per guest and per hotel, the data is stored in flat NumPy arrays:
+- hotels: available rooms and price, one entry per hotel;
+- guests: discount, one entry per guest;
+- preferences: CSR layout, i.e. the preferred hotels of guest g are pref_hotels[pref_offsets[g]:pref_offsets[g + 1]],
+  in priority order.
+Guest and hotel IDs are interned to integers: the code of a guest (or hotel) is its position in guest_ids (or hotel_ids).
+The IDs themselves are kept in compact dictionaries (IdDictionary: e.g. 'guest_1' as the prefix 'guest_' and the
+number 1), and only decoded to strings when guest_ids or hotel_ids are read (reports, exports).
+Preferred hotels that do not exist in the hotels dataset are stored as -1, so that they still count in the length
+of the preference list (as they do in the dictionary-based methods).
+pandas is not needed to intern IDs of the form prefix + number: a dataset loaded back with AllocationData.load and
+the allocation methods run without it.
+"""
+
+FIELDS = ('guest_ids', 'hotel_ids', 'discount', 'rooms', 'price', 'pref_offsets', 'pref_hotels', 'reservation_order')
+
+def encode_column(dictionary, column):
+    """
+    Codes of the IDs of a DataFrame column (-1 for unknown or missing IDs). IDs repeat across preference rows, so the
+    column is factorized first and only its distinct values are encoded.
+    """
+    values, distinct = column.factorize()
+    codes = dictionary.encode(np.asarray(distinct, dtype=object))
+    return np.where(values >= 0, codes[np.maximum(values, 0)] if len(codes) > 0 else -1, -1).astype(np.int32)
+
+
+class AllocationData:
+    def __init__(self, guest_ids, discount, hotel_ids, rooms, price, pref_offsets, pref_hotels, reservation_order=None):
+        """
+        Parameters:
+        guest_ids (array or IdDictionary): external guest IDs, in dataset order (position = guest code).
+        discount (array): discount fraction of each guest.
+        hotel_ids (array or IdDictionary): external hotel IDs, in dataset order (position = hotel code).
+        rooms (array): available rooms of each hotel.
+        price (array): unit price of a room in each hotel.
+        pref_offsets (array): CSR offsets, length number of guests + 1.
+        pref_hotels (array): hotel codes of all preference lists, concatenated in guest order (-1 for unknown hotels).
+        reservation_order (array, optional): guest codes sorted by ID, if already computed (e.g. shared by another process).
+        """
+        self.guest_dictionary = guest_ids if isinstance(guest_ids, IdDictionary) else IdDictionary(guest_ids)
+        self.discount = np.asarray(discount, dtype=np.float64)
+        self.hotel_dictionary = hotel_ids if isinstance(hotel_ids, IdDictionary) else IdDictionary(hotel_ids)
+        self.rooms = np.asarray(rooms, dtype=np.int64)
+        self.price = np.asarray(price, dtype=np.float64)
+        self.pref_offsets = np.asarray(pref_offsets, dtype=np.int64)
+        self.pref_hotels = np.asarray(pref_hotels, dtype=np.int32)
+        # Reservation order: guests sorted by ID, as sorted(guests_dict.items()) does in the dictionary-based methods
+        if reservation_order is None:
+            with phase('sorting'):
+                reservation_order = self.guest_dictionary.sort_order()
+        self.reservation_order = np.asarray(reservation_order, dtype=np.int64)
+
+    @property
+    def guest_ids(self):
+        """Guest IDs as an object array (decoded on every access: use guest_dictionary.decode for a subset)."""
+        return self.guest_dictionary.ids
+
+    @property
+    def hotel_ids(self):
+        """Hotel IDs as an object array (decoded on every access: use hotel_dictionary.decode for a subset)."""
+        return self.hotel_dictionary.ids
+
+    @property
+    def num_guests(self):
+        return len(self.guest_dictionary)
+
+    @property
+    def num_hotels(self):
+        return len(self.hotel_dictionary)
+
+    @property
+    def pref_lengths(self):
+        return np.diff(self.pref_offsets)
+
+    @property
+    def nbytes(self):
+        """Memory used by the numeric arrays (the ID arrays are not included)."""
+        return sum(array.nbytes for array in (self.discount, self.rooms, self.price,
+                                               self.pref_offsets, self.pref_hotels, self.reservation_order))
+
+    @cached_property
+    def fingerprint(self):
+        """SHA-256 of the whole dataset (IDs and arrays): identifies the data in caches."""
+        digest = hashlib.sha256()
+        for ids in (self.guest_ids, self.hotel_ids):
+            digest.update("\n".join(map(str, ids.tolist())).encode())
+        for array in (self.discount, self.rooms, self.price, self.pref_offsets, self.pref_hotels):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        return digest.hexdigest()
+
+    @cached_property
+    def preference_rank(self):
+        """(guest, hotel) -> position lookup (PreferenceRank), built on first use and reused by every method."""
+        from src.Columnar_Core.Preference_Rank import PreferenceRank
+        return PreferenceRank(self)
+
+    def preferences(self, guest):
+        """Hotel codes preferred by a guest (given by code), in priority order."""
+        return self.pref_hotels[self.pref_offsets[guest]:self.pref_offsets[guest + 1]]
+
+    def hotels_dict(self, rooms=None):
+        """Hotels as a dictionary (hotel_id -> {'available_rooms', 'price'}), e.g. for the visualization helpers."""
+        rooms = self.rooms if rooms is None else rooms
+        return {hotel_id: {'available_rooms': hotel_rooms, 'price': hotel_price}
+                for hotel_id, hotel_rooms, hotel_price in zip(self.hotel_ids.tolist(), rooms.tolist(), self.price.tolist())}
+
+    def hotel_codes(self, hotel_ids):
+        """Interns a sequence of hotel IDs: returns their codes, -1 for unknown hotels."""
+        return self.hotel_dictionary.encode(hotel_ids)
+
+    def guest_codes(self, guest_ids):
+        """Interns a sequence of guest IDs: returns their codes, -1 for unknown guests."""
+        return self.guest_dictionary.encode(guest_ids)
+
+    def to_arrays(self):
+        """
+        The dataset as arrays without Python objects (IDs in their compact form, see IdDictionary.to_arrays),
+        e.g. for .npz archives and shared memory. A TypeError is raised if the IDs cannot be stored.
+        """
+        arrays = {}
+        for field in FIELDS:
+            if field == 'guest_ids':
+                arrays.update(self.guest_dictionary.to_arrays(field))
+            elif field == 'hotel_ids':
+                arrays.update(self.hotel_dictionary.to_arrays(field))
+            else:
+                arrays[field] = getattr(self, field)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Reads back a dataset stored with to_arrays."""
+        return cls(**{field: IdDictionary.from_arrays(arrays, field) if field.endswith('_ids') else arrays[field]
+                      for field in FIELDS})
+
+    def save(self, path):
+        """Stores the dataset as a .npz archive (see to_arrays), read back by AllocationData.load without pandas."""
+        arrays = self.to_arrays()
+        tmp_path = path + ".tmp.npz" # write then rename, so that an interrupted run never leaves a broken file
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Reads a dataset stored with save."""
+        with np.load(path, allow_pickle=False) as archive:
+            return cls.from_arrays({name: archive[name] for name in archive.files})
+
+    @classmethod
+    def from_dataframes(cls, hotels_df, guests_df, preferences_df):
+        """
+        Builds the columnar data directly from the loaded datasets (no per-row Python loop).
+
+        Parameters:
+        hotels_df (DataFrame): columns 'hotel', 'rooms', 'price'.
+        guests_df (DataFrame): columns 'guest', 'discount'.
+        preferences_df (DataFrame): columns 'guest', 'hotel', 'priority'.
+
+        Returns:
+        AllocationData: the columnar dataset.
+        """
+        with phase('copying'):
+            guest_ids = IdDictionary(guests_df['guest'].to_numpy(dtype=object))
+            hotel_ids = IdDictionary(hotels_df['hotel'].to_numpy(dtype=object))
+
+            # Intern the preference rows and drop the ones of guests that are not in the guests dataset
+            pref_guests = encode_column(guest_ids, preferences_df['guest'])
+            pref_hotels = encode_column(hotel_ids, preferences_df['hotel'])
+            priority = preferences_df['priority'].to_numpy()
+            known = pref_guests >= 0
+            pref_guests, pref_hotels, priority = pref_guests[known], pref_hotels[known], priority[known]
+
+            # Group rows by guest, in priority order (stable, like sort_values(by=['guest', 'priority']))
+            order = np.lexsort((priority, pref_guests))
+            counts = np.bincount(pref_guests, minlength=len(guest_ids))
+            pref_offsets = np.concatenate(([0], np.cumsum(counts)))
+
+        return cls(guest_ids, guests_df['discount'].to_numpy(), hotel_ids,
+                   hotels_df['rooms'].to_numpy(), hotels_df['price'].to_numpy(),
+                   pref_offsets, pref_hotels[order])
+
+    @classmethod
+    def from_dicts(cls, guests_dict, hotels_dict):
+        """
+        Builds the columnar data from the guests and hotels dictionaries.
+
+        Parameters:
+        guests_dict (dict): guest_id -> {'discount', 'preferences'}.
+        hotels_dict (dict): hotel_id -> {'available_rooms', 'price'}.
+
+        Returns:
+        AllocationData: the columnar dataset.
+        """
+        with phase('copying'):
+            hotel_ids = list(hotels_dict.keys())
+            hotel_code = {hotel_id: code for code, hotel_id in enumerate(hotel_ids)}
+            guest_ids = list(guests_dict.keys())
+
+            lengths = [len(guest['preferences']) for guest in guests_dict.values()]
+            pref_offsets = np.concatenate(([0], np.cumsum(lengths, dtype=np.int64)))
+            pref_hotels = np.fromiter((hotel_code.get(hotel_id, -1)
+                                       for guest in guests_dict.values() for hotel_id in guest['preferences']),
+                                      dtype=np.int32, count=int(pref_offsets[-1]))
+
+        return cls(guest_ids, [guest.get('discount', 0) for guest in guests_dict.values()], hotel_ids,
+                   [hotel['available_rooms'] for hotel in hotels_dict.values()],
+                   [hotel['price'] for hotel in hotels_dict.values()],
+                   pref_offsets, pref_hotels)
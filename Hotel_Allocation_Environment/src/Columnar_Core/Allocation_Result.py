@@ -0,0 +1,241 @@
+from collections.abc import Mapping
+from functools import cached_property
+import numpy as np
+from src.Columnar_Core.Id_Dictionary import IdDictionary
+from src.Instrumentation import phase
+
+"""
+Helpers shared by the columnar allocation methods: conversion of an assignment array (guest code -> hotel code,
+-1 when unassigned) into the allocation report and statistics returned by the dictionary-based methods.
+The report is columnar (HotelReport): occupancy and revenue are aggregated with np.bincount, and the guest lists
+are one array of guest codes with the hotel of each, grouped by hotel (with offsets) only when guest lists are read.
+Guest and hotel IDs are decoded from the dataset's IdDictionary only when they are read (report details, DataFrame,
+exports), and only once per report.
+It still reads like the report dictionary (hotel_id -> details), each hotel's details being built when it is looked up.
+"""
+
+def round_cents(values):
+    """
+    Rounds values to 2 decimals exactly as round(value, 2) does.
+    np.round scales by 100, which can land on the other side of a half cent: those values are rounded by Python.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    rounded = np.round(values, 2)
+    scaled = values * 100
+    near_half = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    if len(near_half) > 0:
+        rounded[near_half] = [round(value, 2) for value in values[near_half].tolist()]
+    return rounded
+
+
+def sequential_sum(values):
+    """Sum of values added left to right, as Python's sum() of the list (so statistics match the dictionary-based methods)."""
+    values = np.asarray(values, dtype=np.float64)
+    return float(np.cumsum(values)[-1]) if len(values) > 0 else 0
+
+
+class HotelReport(Mapping):
+    def __init__(self, hotel_ids, rooms_occupied, rooms_available, revenue, guest_codes=None, guest_hotels=None,
+                 guest_ids=None):
+        """
+        Allocation report of every hotel, stored as columns (position = hotel code).
+
+        Parameters:
+        hotel_ids (array or IdDictionary): external hotel IDs.
+        rooms_occupied, rooms_available (array): rooms of each hotel occupied by the allocation, and still available.
+        revenue (array): revenue of each hotel.
+        guest_codes (array, optional): codes of the allocated guests, in allocation order (None: guest lists not kept).
+        guest_hotels (array, optional): hotel code of each of these guests.
+        guest_ids (array or IdDictionary, optional): external guest IDs, by guest code.
+        """
+        self.hotel_dictionary = hotel_ids if isinstance(hotel_ids, IdDictionary) else IdDictionary(hotel_ids)
+        self.rooms_occupied = np.asarray(rooms_occupied, dtype=np.int64)
+        self.rooms_available = np.asarray(rooms_available, dtype=np.int64)
+        self.revenue = np.asarray(revenue, dtype=np.float64)
+        self.guest_codes = None if guest_codes is None else np.asarray(guest_codes, dtype=np.int64)
+        self.guest_hotels = None if guest_hotels is None else np.asarray(guest_hotels, dtype=np.int64)
+        self.guest_dictionary = guest_ids if guest_ids is None or isinstance(guest_ids, IdDictionary) else IdDictionary(guest_ids)
+        self._positions = None # hotel_id -> position, built on the first lookup
+        self._grouped = None # (offsets, guest codes grouped by hotel), built when guest lists are first read
+        self._grouped_ids = None # the same with the guest IDs, decoded when guest lists are first read
+
+    def __getstate__(self):
+        # Decoded IDs are not pickled (e.g. sent back by a worker): they are decoded again when read
+        state = {**self.__dict__, '_positions': None, '_grouped_ids': None}
+        state.pop('hotel_ids', None)
+        return state
+
+    @cached_property
+    def hotel_ids(self):
+        """External hotel IDs, by hotel code (decoded on first access)."""
+        return self.hotel_dictionary.ids
+
+    def __len__(self):
+        return len(self.hotel_dictionary)
+
+    def __iter__(self):
+        return iter(self.hotel_ids.tolist())
+
+    def __getitem__(self, hotel_id):
+        if self._positions is None:
+            self._positions = {hotel: position for position, hotel in enumerate(self.hotel_ids.tolist())}
+        return self.details(self._positions[hotel_id])
+
+    def __repr__(self):
+        return repr(self.to_frame())
+
+    def details(self, position):
+        """Report of one hotel (by code), as in the report dictionary."""
+        details = {
+            'rooms_occupied': int(self.rooms_occupied[position]),
+            'rooms_available': int(self.rooms_available[position]),
+            'number_of_guests_accommodated': int(self.rooms_occupied[position]),
+            'revenue': float(self.revenue[position])
+        }
+        if self.guest_codes is not None:
+            offsets, guests = self.grouped_guests()
+            details['guests'] = guests[offsets[position]:offsets[position + 1]].tolist()
+        return details
+
+    def items(self):
+        """(hotel_id, details) pairs in hotel order, without looking hotels up one by one."""
+        return zip(self.hotel_ids.tolist(), self.values())
+
+    def values(self):
+        return (self.details(position) for position in range(len(self.hotel_ids)))
+
+    def grouped_codes(self):
+        """
+        Guest codes grouped by hotel, in allocation order within each hotel (CSR layout).
+
+        Returns:
+        tuple: (offsets, guest codes): the guests of hotel h are guest_codes[offsets[h]:offsets[h + 1]].
+        """
+        if self._grouped is None:
+            counts = np.bincount(self.guest_hotels, minlength=len(self))
+            offsets = np.concatenate(([0], np.cumsum(counts)))
+            self._grouped = (offsets, self.guest_codes[np.argsort(self.guest_hotels, kind='stable')])
+        return self._grouped
+
+    def grouped_guests(self):
+        """
+        Guest IDs grouped by hotel, in allocation order within each hotel (CSR layout), decoded on first use.
+
+        Returns:
+        tuple: (offsets, guest IDs): the guests of hotel h are guest_ids[offsets[h]:offsets[h + 1]].
+        """
+        if self._grouped_ids is None:
+            offsets, codes = self.grouped_codes()
+            self._grouped_ids = (offsets, self.guest_dictionary.decode(codes))
+        return self._grouped_ids
+
+    def guest_lists(self):
+        """Guest IDs of each hotel, as one list per hotel (None if the guest lists were not kept)."""
+        if self.guest_codes is None:
+            return None
+        offsets, guests = self.grouped_guests()
+        guests, offsets = guests.tolist(), offsets.tolist()
+        return [guests[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+
+    def to_frame(self, guests='auto'):
+        """
+        Report as a DataFrame with one row per hotel and the keys of the report details as columns (plus 'hotel').
+        Numeric columns keep their dtypes.
+
+        Parameters:
+        guests (str or None): 'arrow' (an Arrow list column, built from the grouped guest IDs without making one
+        Python list per hotel; needs pyarrow), 'list' (a Python list per hotel), 'auto' (Arrow when pyarrow is
+        installed, lists otherwise) or None (no guests column).
+        """
+        import pandas as pd
+        frame = pd.DataFrame({
+            'hotel': self.hotel_ids,
+            'rooms_occupied': self.rooms_occupied,
+            'rooms_available': self.rooms_available,
+            'number_of_guests_accommodated': self.rooms_occupied,
+            'revenue': self.revenue
+        })
+        if guests is None or self.guest_codes is None:
+            return frame
+        if guests not in ('auto', 'arrow', 'list'):
+            raise ValueError(f"guests must be 'auto', 'arrow', 'list' or None, not {guests!r}")
+        if guests == 'auto':
+            try:
+                import pyarrow # noqa: F401
+                guests = 'arrow'
+            except ImportError:
+                guests = 'list'
+        if guests == 'arrow':
+            import pyarrow as pa
+            offsets, guest_ids = self.grouped_guests()
+            lists = pa.ListArray.from_arrays(pa.array(offsets, type=pa.int32()), pa.array(guest_ids))
+            frame['guests'] = pd.Series(lists, dtype=pd.ArrowDtype(lists.type))
+        else:
+            frame['guests'] = self.guest_lists()
+        return frame
+
+    def statistics(self):
+        """Hotel part of the overall statistics: count of occupied hotels and average revenue per occupied hotel."""
+        occupied_hotels_count = int(np.count_nonzero(self.rooms_occupied))
+        total_revenues = sequential_sum(self.revenue)
+        return {
+            'occupied_hotels_count': occupied_hotels_count,
+            'average_revenue': round(total_revenues / occupied_hotels_count, 2) if occupied_hotels_count > 0 else 0
+        }
+
+
+def build_allocation_result(data, rooms_left, assignment, guest_order, satisfaction, revenue,
+                            scored=None, round_revenue=True):
+    """
+    Builds the hotel report and the overall statistics of an allocation.
+
+    Parameters:
+    data (AllocationData): the dataset the allocation was computed on.
+    rooms_left (array): available rooms of each hotel after the allocation.
+    assignment (array): hotel code assigned to each guest, -1 if unassigned.
+    guest_order (array): guest codes in the order they were processed (sets the order of each hotel's guest list).
+    satisfaction (array): satisfaction score of each guest.
+    revenue (array): revenue generated by each guest.
+    scored (array, optional): boolean mask of the guests included in the average satisfaction (default: all guests).
+    round_revenue (bool): round the revenue of each hotel to 2 decimals.
+
+    Returns:
+    dict: 'allocation_report' (HotelReport), 'statistics', 'unassigned_guests', 'unassigned_count'.
+    """
+    with phase('report building'):
+        num_hotels = data.num_hotels
+        ordered = np.asarray(guest_order)
+        ordered_hotels = assignment[ordered]
+        assigned = ordered[ordered_hotels >= 0]
+        assigned_hotels = ordered_hotels[ordered_hotels >= 0]
+
+        # Per-hotel aggregates (revenues are summed in processing order, as the dictionary-based methods do)
+        occupied = np.bincount(assigned_hotels, minlength=num_hotels)
+        hotel_revenue = np.bincount(assigned_hotels, weights=revenue[assigned], minlength=num_hotels)
+        # Guest lists: codes of the assigned guests in processing order with their hotel (grouped by hotel when read)
+        allocation_report = HotelReport(data.hotel_dictionary, occupied, rooms_left,
+                                        round_cents(hotel_revenue) if round_revenue else hotel_revenue,
+                                        assigned, assigned_hotels, data.guest_dictionary)
+
+    with phase('statistics'):
+        # Overall statistics (same definitions as the dictionary-based methods)
+        scored = np.ones(data.num_guests, dtype=bool) if scored is None else scored
+        scored_count = int(np.count_nonzero(scored))
+        total_satisfaction_score = sequential_sum(satisfaction[ordered[scored[ordered]]]) # summed in processing order
+        average_satisfaction_score = round(total_satisfaction_score / scored_count, 2) if scored_count > 0 else 0
+
+        hotel_statistics = allocation_report.statistics()
+        statistics = {
+            'assigned_guests_count': len(assigned),
+            'average_satisfaction_score': average_satisfaction_score,
+            'occupied_hotels_count': hotel_statistics['occupied_hotels_count'],
+            'average_revenue': hotel_statistics['average_revenue']
+        }
+
+    unassigned_guests = data.guest_dictionary.decode(np.flatnonzero(assignment < 0)).tolist()
+    return {
+        'allocation_report': allocation_report,
+        'statistics': statistics,
+        'unassigned_guests': unassigned_guests,
+        'unassigned_count': len(unassigned_guests)
+    }
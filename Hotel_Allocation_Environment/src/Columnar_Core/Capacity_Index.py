@@ -0,0 +1,67 @@
+import numpy as np
+
+"""
+Index of the hotels that still have rooms, ordered by a strategy rank (e.g. price ascending, rooms descending).
+It answers "first hotel in rank order with rooms left" and updates the room counts in amortized O(1), with a
+union-find "next free" structure: every position in rank order points to a position at or after it, and full hotels
+point to the next position. find() follows the pointers and shortens them on the way (path halving), so each full
+hotel is skipped only a few times during a whole allocation.
+"""
+
+class CapacityIndex:
+    def __init__(self, rooms, rank):
+        """
+        Parameters:
+        rooms (array): available rooms of each hotel (by hotel code); the index works on its own copy.
+        rank (array): hotel codes in the order they are offered (first = preferred by the strategy).
+        """
+        self.rooms = np.asarray(rooms).tolist() # Python lists: fast scalar access in allocation loops
+        self.rank = np.asarray(rank).tolist()
+        self.position = [0] * len(self.rooms) # position of each hotel in rank order
+        for position, hotel in enumerate(self.rank):
+            self.position[hotel] = position
+        self._build()
+
+    def _build(self):
+        # Position len(rank) is the sentinel "no hotel with rooms left"
+        self._next = [position if self.rooms[hotel] > 0 else position + 1 for position, hotel in enumerate(self.rank)]
+        self._next.append(len(self.rank))
+
+    def _find(self, position):
+        parent = self._next
+        while parent[position] != position:
+            parent[position] = parent[parent[position]] # path halving
+            position = parent[position]
+        return position
+
+    def has_rooms(self, hotel):
+        return self.rooms[hotel] > 0
+
+    def first_available(self, start=0):
+        """First hotel with rooms left, at or after position start in rank order. Returns -1 if there is none."""
+        position = self._find(start)
+        return self.rank[position] if position < len(self.rank) else -1
+
+    def take(self, hotel):
+        """Occupies one room of a hotel (which must have rooms left); a hotel that becomes full leaves the index."""
+        self.rooms[hotel] -= 1
+        if self.rooms[hotel] <= 0:
+            position = self.position[hotel]
+            self._next[position] = position + 1
+
+    def add_rooms(self, hotel, rooms):
+        """
+        Adds rooms to a hotel (or removes them, with a negative number).
+        Re-opening a full hotel rebuilds the pointers (O(hotels)): allocations only take rooms, so this is rare.
+        """
+        was_full = self.rooms[hotel] <= 0
+        self.rooms[hotel] += rooms
+        if was_full and self.rooms[hotel] > 0:
+            self._build()
+        elif not was_full and self.rooms[hotel] <= 0:
+            position = self.position[hotel]
+            self._next[position] = position + 1
+
+    def rooms_left(self):
+        """Available rooms of each hotel, by hotel code."""
+        return np.array(self.rooms, dtype=np.int64)
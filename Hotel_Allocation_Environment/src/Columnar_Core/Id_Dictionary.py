@@ -0,0 +1,194 @@
+import numpy as np
+
+"""
+Compact dictionary of external IDs (guest or hotel IDs): the code of an ID is its position, a dense integer.
+IDs of the form prefix + number (e.g. 'guest_1', 'hotel_7', all with the same prefix and written without leading
+zeros) are stored as the prefix and one int64 array of numbers, instead of one Python string per ID (about 70 bytes
+each): 8 bytes per ID, and nothing to hash. Integer IDs are stored as numbers without prefix. Any other IDs are kept
+as an array of Python objects.
+Both directions are vectorized, on the code points of fixed-width unicode arrays (no Python loop over IDs):
+- encode: IDs -> codes (prefix check and digits read column by column, then a binary search among the numbers);
+- decode: codes -> IDs (digits written column by column), only where strings are needed (reports, exports).
+"""
+
+MAX_DIGITS = 18 # numbers always fit in an int64
+
+
+def parse_numbers(ids, prefix):
+    """
+    Numbers of IDs of the form prefix + number (canonical: digits only, no leading zero).
+
+    Parameters:
+    ids (array): unicode array (dtype 'U').
+    prefix (str): common prefix.
+
+    Returns:
+    tuple: (numbers, valid) arrays: the number of each ID, and whether the ID has that form.
+    """
+    width = ids.dtype.itemsize // 4
+    if len(ids) == 0 or width <= len(prefix):
+        return np.zeros(len(ids), dtype=np.int64), np.zeros(len(ids), dtype=bool)
+    points = np.ascontiguousarray(ids).view(np.uint32).reshape(len(ids), width)
+    valid = (points[:, :len(prefix)] == np.array([ord(char) for char in prefix], dtype=np.uint32)).all(axis=1)
+    lengths = np.count_nonzero(points[:, len(prefix):], axis=1) # unicode arrays are padded with zeros
+    valid &= (lengths >= 1) & (lengths <= MAX_DIGITS)
+    valid &= (points[:, len(prefix)] != ord('0')) | (lengths == 1) # no leading zero
+    numbers = np.zeros(len(ids), dtype=np.int64)
+    for column in range(len(prefix), min(width, len(prefix) + MAX_DIGITS)):
+        digits = points[:, column].astype(np.int64) - ord('0')
+        inside = column - len(prefix) < lengths
+        valid &= ~inside | ((digits >= 0) & (digits <= 9))
+        numbers[inside] = numbers[inside] * 10 + digits[inside]
+    return numbers, valid
+
+
+def format_numbers(numbers, prefix=''):
+    """prefix + str(number) for every number (non-negative), as a unicode array."""
+    numbers = np.asarray(numbers, dtype=np.int64)
+    lengths = np.searchsorted(10 ** np.arange(1, MAX_DIGITS + 1, dtype=np.int64), numbers, side='right') + 1
+    width = len(prefix) + (int(lengths.max()) if len(numbers) > 0 else 1)
+    points = np.zeros((len(numbers), width), dtype=np.uint32)
+    points[:, :len(prefix)] = [ord(char) for char in prefix]
+    for length in np.unique(lengths).tolist(): # numbers of one length: one block of digit columns
+        rows = np.flatnonzero(lengths == length)
+        powers = 10 ** np.arange(length - 1, -1, -1, dtype=np.int64)
+        points[rows, len(prefix):len(prefix) + length] = ord('0') + numbers[rows, None] // powers % 10
+    return points.view(f'<U{width}').ravel()
+
+
+class IdDictionary:
+    def __init__(self, ids):
+        """
+        Parameters:
+        ids (array or list): external IDs, in code order (position = code).
+        """
+        self.prefix = None # common prefix of prefix + number IDs ('' for integer IDs)
+        self.numbers = None # number of each ID (prefix + number or integer IDs)
+        self.values = None # the IDs themselves, when they have no compact form
+        self._lookup = None # (sorted numbers, codes), built on the first encode
+
+        ids = ids if isinstance(ids, np.ndarray) else np.array(list(ids), dtype=object)
+        item_types = set(map(type, ids.tolist())) if ids.dtype == object else set()
+        if item_types == {int}:
+            ids = ids.astype(np.int64)
+        if ids.dtype.kind in 'iu':
+            self.prefix, self.numbers = '', ids.astype(np.int64)
+            self._integers = True
+            return
+        self._integers = False
+        if ids.dtype.kind == 'U' or item_types == {str}:
+            strings = ids.astype(str)
+            prefix = str(np.strings.rstrip(strings[:1], '0123456789')[0]) if len(strings) > 0 else ''
+            numbers, valid = parse_numbers(strings, prefix)
+            if len(strings) > 0 and valid.all():
+                self.prefix, self.numbers = prefix, numbers
+                return
+        self.values = ids.astype(object)
+
+    @classmethod
+    def from_arrays(cls, arrays, name):
+        """Reads back a dictionary stored with to_arrays (or as a plain array of IDs, name)."""
+        if f"{name}_prefix" not in arrays:
+            return cls(arrays[name])
+        dictionary = cls.__new__(cls) # numbers already parsed: no need to check them again
+        dictionary.prefix, dictionary.numbers = str(arrays[f"{name}_prefix"][0]), np.asarray(arrays[name], dtype=np.int64)
+        dictionary.values, dictionary._lookup, dictionary._integers = None, None, False
+        return dictionary
+
+    def to_arrays(self, name):
+        """
+        The dictionary as arrays without Python objects (for .npz archives and shared memory): name (numbers, or
+        fixed-width IDs) and, for prefix + number IDs, name_prefix. A TypeError is raised if the IDs cannot be stored.
+        """
+        if self.values is None:
+            return {name: self.numbers} if self._integers else {name: self.numbers, f"{name}_prefix": np.array([self.prefix])}
+        array = np.array(self.values.tolist())
+        if array.dtype == object:
+            raise TypeError(f"{name} cannot be stored as a fixed-width array")
+        return {name: array}
+
+    def __len__(self):
+        return len(self.numbers) if self.numbers is not None else len(self.values)
+
+    def __getstate__(self):
+        return {**self.__dict__, '_lookup': None} # rebuilt on demand: only the compact arrays are sent to workers
+
+    @property
+    def compact(self):
+        """True if the IDs are stored as numbers (prefix + number, or integers)."""
+        return self.numbers is not None
+
+    @property
+    def nbytes(self):
+        """Memory used by the stored IDs (for object IDs, the Python strings are counted too)."""
+        if self.compact:
+            return self.numbers.nbytes
+        return self.values.nbytes + sum(item.__sizeof__() for item in self.values.tolist())
+
+    @property
+    def ids(self):
+        """All the IDs, as an object array (decoded)."""
+        return self.decode()
+
+    def sort_order(self):
+        """Codes sorted by ID, in the order sorted() gives (stable for equal IDs)."""
+        if self.values is not None:
+            return np.argsort(self.values, kind='stable')
+        if self._integers:
+            return np.argsort(self.numbers, kind='stable')
+        return np.argsort(format_numbers(self.numbers), kind='stable') # same prefix: the digits decide, as strings
+
+    def decode(self, codes=None):
+        """
+        IDs of codes (all the IDs if codes is None), as an object array.
+        Codes must be valid (0 <= code < len(self)).
+        """
+        if self.values is not None:
+            return self.values if codes is None else self.values[codes]
+        numbers = self.numbers if codes is None else self.numbers[codes]
+        if self._integers:
+            return numbers.astype(object)
+        return format_numbers(numbers, self.prefix).astype(object)
+
+    def encode(self, ids):
+        """
+        Codes of external IDs.
+
+        Parameters:
+        ids (array or list): IDs to look up.
+
+        Returns:
+        array: int32 code of each ID, -1 for IDs that are not in the dictionary.
+        """
+        ids = ids if isinstance(ids, np.ndarray) else np.array(list(ids), dtype=object)
+        if self.values is not None:
+            import pandas as pd
+            return pd.Index(self.values, dtype=object).get_indexer(pd.Index(ids, dtype=object)).astype(np.int32)
+        if len(ids) == 0:
+            return np.zeros(0, dtype=np.int32)
+
+        if self._integers:
+            if ids.dtype.kind in 'iu':
+                valid = np.ones(len(ids), dtype=bool)
+            else:
+                valid = np.array([isinstance(item, (int, np.integer)) and not isinstance(item, bool)
+                                  and -2**63 <= item < 2**63 for item in ids.tolist()], dtype=bool)
+            numbers = np.where(valid, ids, 0).astype(np.int64)
+        else:
+            if ids.dtype.kind == 'U' or set(map(type, ids.tolist())) == {str}:
+                is_string = np.ones(len(ids), dtype=bool)
+            else:
+                is_string = np.array([type(item) is str for item in ids.tolist()], dtype=bool)
+            strings = ids.astype(str) if is_string.all() else np.where(is_string, ids, '').astype(str)
+            numbers, valid = parse_numbers(strings, self.prefix)
+            valid &= is_string
+
+        if self._lookup is None:
+            order = np.argsort(self.numbers, kind='stable')
+            self._lookup = (self.numbers[order], order)
+        sorted_numbers, order = self._lookup
+        if len(sorted_numbers) == 0:
+            return np.full(len(ids), -1, dtype=np.int32)
+        found = np.minimum(np.searchsorted(sorted_numbers, numbers), len(sorted_numbers) - 1)
+        valid &= sorted_numbers[found] == numbers
+        return np.where(valid, order[found], -1).astype(np.int32)
@@ -0,0 +1,54 @@
+import numpy as np
+
+"""
+Connected components of the guest-hotel preference graph (an edge between a guest and each known hotel of their
+preference list). Guests of different components never want the same hotel, so components can be allocated
+independently by the preference-only rules.
+Union-find over the hotels, vectorized: every round, each guest hooks the roots of all its hotels onto the smallest
+of them (np.minimum.at), then the parent pointers are compressed by pointer jumping. Roots only decrease, and a round
+that changes nothing means every guest's hotels share one root, so the loop stops after a few rounds (about the
+logarithm of the component diameter), each one a handful of array passes over the preference entries.
+"""
+
+def find_roots(parent):
+    """Root of every node (pointer jumping until parent[parent] == parent)."""
+    while True:
+        grandparent = parent[parent]
+        if (grandparent == parent).all():
+            return parent
+        parent = grandparent
+
+
+def preference_components(data):
+    """
+    Components of the preference graph.
+
+    Parameters:
+    data (AllocationData): the dataset.
+
+    Returns:
+    tuple: (guest_component, hotel_component, num_components): component of each guest (-1 for the guests without
+    any known preferred hotel) and of each hotel (every hotel is in a component, possibly alone), numbered from 0.
+    """
+    known = data.pref_hotels >= 0
+    entry_guest = np.repeat(np.arange(data.num_guests), data.pref_lengths)[known]
+    entry_hotel = data.pref_hotels[known].astype(np.int64)
+    has_hotels = np.bincount(entry_guest, minlength=data.num_guests) > 0
+
+    parent = np.arange(data.num_hotels)
+    while True:
+        roots = find_roots(parent)
+        entry_root = roots[entry_hotel]
+        guest_root = np.full(data.num_guests, data.num_hotels)
+        np.minimum.at(guest_root, entry_guest, entry_root) # smallest root among the guest's hotels
+        hooked = roots.copy()
+        np.minimum.at(hooked, entry_root, guest_root[entry_guest]) # each root points to the smallest root it meets
+        if (hooked == roots).all():
+            break
+        parent = hooked
+
+    # Number the components by their smallest hotel code
+    _, hotel_component = np.unique(roots, return_inverse=True)
+    guest_component = np.full(data.num_guests, -1, dtype=np.int64)
+    guest_component[has_hotels] = hotel_component[guest_root[has_hotels]]
+    return guest_component, hotel_component, int(hotel_component.max()) + 1 if data.num_hotels > 0 else 0
@@ -0,0 +1,101 @@
+import numpy as np
+
+"""
+Preference rank lookup, built once per dataset (see AllocationData.preference_rank).
+Every (guest, hotel) preference entry is packed into one int64 key, guest * number of hotels + hotel, and the keys
+are sorted: the position of a hotel in a guest's preference list is then found with a binary search, for any number
+of (guest, hotel) pairs at once, instead of preferences.index(hotel) on a Python list.
+"""
+
+class PreferenceRank:
+    def __init__(self, data):
+        """
+        Parameters:
+        data (AllocationData): the dataset.
+        """
+        self.num_hotels = data.num_hotels
+
+        lengths = data.pref_lengths
+        entry_guest = np.repeat(np.arange(data.num_guests, dtype=np.int64), lengths)
+        entry_position = np.arange(len(data.pref_hotels)) - np.repeat(data.pref_offsets[:-1], lengths)
+        known = data.pref_hotels >= 0
+        keys = entry_guest[known] * self.num_hotels + data.pref_hotels[known]
+        positions = entry_position[known]
+
+        # Sort by key; for a hotel listed twice by the same guest keep the first position (as list.index does):
+        # entries of a guest are in position order, and the stable sort keeps that order for equal keys
+        order = np.argsort(keys, kind='stable')
+        keys, positions = keys[order], positions[order]
+        first = np.ones(len(keys), dtype=bool)
+        first[1:] = keys[1:] != keys[:-1]
+        self.keys = keys[first]
+        self.positions = positions[first]
+
+    def position(self, guests, hotels):
+        """
+        Position of each hotel in the preference list of the corresponding guest (vectorized).
+
+        Parameters:
+        guests (array): guest codes.
+        hotels (array): hotel codes (same length as guests).
+
+        Returns:
+        array: position in the preference list, -1 if the hotel is not among the guest's preferences.
+        """
+        guests, hotels = np.asarray(guests, dtype=np.int64), np.asarray(hotels, dtype=np.int64)
+        query = guests * self.num_hotels + hotels
+        if len(self.keys) == 0:
+            return np.full(len(query), -1, dtype=np.int64)
+        found = np.minimum(np.searchsorted(self.keys, query), len(self.keys) - 1)
+        matched = (hotels >= 0) & (self.keys[found] == query) # hotel -1 would match the previous guest's last hotel
+        return np.where(matched, self.positions[found], -1)
+
+
+def preference_positions(data, assignment):
+    """Position of each guest's assigned hotel in their preference list: -1 if unassigned or outside the preferences."""
+    return data.preference_rank.position(np.arange(data.num_guests), assignment)
+
+
+def satisfaction_scores(data, assignment, outside_score=0.0, positions=None):
+    """
+    Satisfaction score of every guest in one pass.
+    - Guest allocated to a preferred hotel: (length - position) / length of the preference list, rounded to 2 decimals
+      (higher score for a better match);
+    - guest allocated outside their preferences: outside_score (0.1 penalty for the price and availability methods);
+    - unassigned guest: 0.
+
+    Parameters:
+    data (AllocationData): the dataset.
+    assignment (array): hotel code assigned to each guest, -1 if unassigned.
+    outside_score (float): score of guests allocated to a hotel outside their preferences.
+    positions (array, optional): result of preference_positions, if the caller already computed it.
+
+    Returns:
+    array: score of each guest.
+    """
+    positions = preference_positions(data, assignment) if positions is None else positions
+    scores = np.zeros(data.num_guests)
+    assigned = np.flatnonzero(assignment >= 0)
+    positions = positions[assigned]
+    preferred = positions >= 0
+    scores[assigned[~preferred]] = outside_score
+
+    guests = assigned[preferred]
+    if len(guests) > 0:
+        scores[guests] = preference_scores(data.pref_lengths[guests], positions[preferred])
+    return scores
+
+
+def preference_scores(lengths, positions):
+    """
+    Score of a hotel at the given positions of preference lists of the given lengths (vectorized).
+    The score only depends on (length, position): it is computed with Python's round() once per distinct pair,
+    so that scores are exactly those of round((len(preferences) - index) / len(preferences), 2).
+    """
+    lengths, positions = np.asarray(lengths, dtype=np.int64), np.asarray(positions, dtype=np.int64)
+    base = lengths.max(initial=0) + 1
+    pairs, inverse = np.unique(lengths * base + positions, return_inverse=True)
+    pair_lengths, pair_positions = np.divmod(pairs, base)
+    pair_scores = np.array([round((length - position) / length, 2)
+                            for length, position in zip(pair_lengths.tolist(), pair_positions.tolist())])
+    return pair_scores[inverse.reshape(-1)] if len(lengths) > 0 else np.zeros(0)
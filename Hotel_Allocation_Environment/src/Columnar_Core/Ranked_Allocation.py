@@ -0,0 +1,89 @@
+import numpy as np
+
+from src.Columnar_Core.Capacity_Index import CapacityIndex
+from src.Instrumentation import phase
+
+"""
+Allocation kernel shared by the price and availability methods.
+Hotels are visited in a global rank order (cheapest first, or most roomy first); guests are served in reservation
+order and get the first hotel in rank order that is in their preferences and still has rooms.
+If none of their preferred hotels has rooms left, they get the first hotel in rank order with rooms left.
+The kernel only computes the assignment: satisfaction and revenue are derived from it by the methods.
+
+Instead of scanning every hotel for every guest (guests x hotels x preferences), the kernel:
+- re-orders each guest's preference list by hotel rank once, with a single sort over all preference entries;
+- walks the re-ordered list of a guest until it finds a hotel with rooms (each guest is served once, so the total
+  work is bounded by the number of preference entries);
+- answers the fallback ("first hotel in rank order with rooms left") with a CapacityIndex, in amortized O(1).
+"""
+
+def hotel_rank(key, descending=False):
+    """Hotel codes sorted by key (ties keep the dataset order)."""
+    key = np.asarray(key)
+    return np.argsort(-key if descending else key, kind='stable')
+
+
+def ranked_preferences(data, rank):
+    """
+    Re-orders every preference list by hotel rank (unknown hotels are dropped).
+
+    Parameters:
+    data (AllocationData): the dataset.
+    rank (array): hotel codes in the order they are offered to guests.
+
+    Returns:
+    tuple: (offsets, hotels) in CSR layout.
+    """
+    rank_position = np.empty(data.num_hotels, dtype=np.int64)
+    rank_position[rank] = np.arange(len(rank))
+
+    entry_guest = np.repeat(np.arange(data.num_guests), data.pref_lengths)
+    known = data.pref_hotels >= 0
+    entry_guest, hotels = entry_guest[known], data.pref_hotels[known]
+
+    # Sort by guest, then hotel rank: both keys are packed into one int64, which sorts much faster than a lexsort
+    sort_key = entry_guest.astype(np.int64) * data.num_hotels + rank_position[hotels]
+    order = np.argsort(sort_key, kind='stable')
+    offsets = np.concatenate(([0], np.cumsum(np.bincount(entry_guest, minlength=data.num_guests))))
+    return offsets, hotels[order]
+
+
+def ranked_allocation(data, rank, fallback=True, preferences=None):
+    """
+    Parameters:
+    data (AllocationData): the dataset.
+    rank (array): hotel codes in the order they are offered to guests (all hotels).
+    fallback (bool): give the guests without a preferred hotel the first hotel in rank order with rooms left
+    (False: they stay unassigned, e.g. until a later fallback pass).
+    preferences (tuple, optional): ranked_preferences(data, rank), if already computed (e.g. shared by scenarios).
+
+    Returns:
+    tuple: (assignment, rooms_left) arrays: hotel code of each guest (-1 if unassigned), rooms left in each hotel.
+    """
+    with phase('sorting'):
+        offsets, hotels = ranked_preferences(data, rank) if preferences is None else preferences
+        capacity = CapacityIndex(data.rooms, rank)
+
+    with phase('allocation loop'):
+        # Python lists: scalar access is much faster than on NumPy arrays inside the loop
+        offsets, hotels = offsets.tolist(), hotels.tolist()
+        rooms = capacity.rooms # room counts kept up to date by the index
+        assignment = [-1] * data.num_guests
+
+        for guest in data.reservation_order.tolist():
+            allocated = False
+            for entry in range(offsets[guest], offsets[guest + 1]):
+                hotel = hotels[entry]
+                if rooms[hotel] > 0:
+                    capacity.take(hotel)
+                    assignment[guest] = hotel
+                    allocated = True
+                    break
+
+            if not allocated and fallback:
+                hotel = capacity.first_available()
+                if hotel >= 0:
+                    capacity.take(hotel)
+                    assignment[guest] = hotel
+
+        return np.array(assignment, dtype=np.int32), capacity.rooms_left()
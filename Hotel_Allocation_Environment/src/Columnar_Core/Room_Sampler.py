@@ -0,0 +1,68 @@
+import numpy as np
+
+"""
+Random sampling of a hotel with rooms left, in O(1) per draw.
+The candidates are kept in a "swap-remove" list: a draw picks a random index, and a candidate that must leave the list
+is overwritten by the last element, so nothing is ever shifted or rebuilt.
+- by='hotel': every hotel with rooms left is equally likely (what random_allocation always did);
+  the list holds hotels, and a hotel leaves it when it becomes full.
+- by='room': every free room is equally likely (roomy hotels are drawn more often);
+  the list holds one entry per free room, and the drawn room leaves it.
+Uniform numbers are drawn from the generator in blocks, so the per-draw cost is a few list operations.
+"""
+
+class RoomSampler:
+    BLOCK_SIZE = 65536
+
+    def __init__(self, rooms, rng, by='hotel'):
+        """
+        Parameters:
+        rooms (array): available rooms of each hotel (by hotel code); the sampler works on its own copy.
+        rng (numpy.random.Generator): source of randomness.
+        by (str): 'hotel' (uniform over hotels with rooms) or 'room' (uniform over free rooms).
+        """
+        if by not in ('hotel', 'room'):
+            raise ValueError(f"by must be 'hotel' or 'room', not {by!r}")
+        rooms = np.asarray(rooms)
+        self.by = by
+        self.rng = rng
+        self.rooms = rooms.tolist()
+        if by == 'hotel':
+            self.candidates = np.flatnonzero(rooms > 0).tolist()
+            self.index = {hotel: i for i, hotel in enumerate(self.candidates)} # position of each hotel in candidates
+        else:
+            self.candidates = np.repeat(np.arange(len(rooms)), np.maximum(rooms, 0)).tolist()
+        self._uniforms = []
+
+    def __len__(self):
+        return len(self.candidates)
+
+    def _uniform(self):
+        if not self._uniforms:
+            self._uniforms = self.rng.random(self.BLOCK_SIZE).tolist()
+        return self._uniforms.pop()
+
+    def _remove(self, i):
+        last = self.candidates.pop()
+        if i < len(self.candidates):
+            self.candidates[i] = last
+            if self.by == 'hotel':
+                self.index[last] = i
+
+    def draw(self):
+        """Draws a hotel with rooms left and occupies one of its rooms. Returns -1 if every hotel is full."""
+        if not self.candidates:
+            return -1
+        i = int(self._uniform() * len(self.candidates))
+        hotel = self.candidates[i]
+        self.rooms[hotel] -= 1
+        if self.by == 'room':
+            self._remove(i)
+        elif self.rooms[hotel] <= 0:
+            del self.index[hotel]
+            self._remove(i)
+        return hotel
+
+    def rooms_left(self):
+        """Available rooms of each hotel, by hotel code."""
+        return np.array(self.rooms, dtype=np.int64)
@@ -0,0 +1,95 @@
+import gc
+import sys
+import numpy as np
+from multiprocessing import shared_memory, util
+from src.Columnar_Core.Allocation_Data import AllocationData
+
+"""
+Publishes an AllocationData to other processes through one multiprocessing.shared_memory block.
+The arrays are copied once into the block, and every worker maps them read-only instead of receiving a pickled copy:
+only a small description of the block (its name and the dtype, shape and offset of each array) is sent to the workers.
+Guest and hotel IDs are stored in their compact form (AllocationData.to_arrays), since Python objects cannot be shared.
+A worker keeps its mappings for all its tasks, and closes them when it exits (detach_shared_data).
+"""
+
+ALIGNMENT = 64
+
+
+class SharedAllocationData:
+    def __init__(self, data):
+        """
+        Copies the arrays of data into a new shared memory block (released by close, or at the end of a with block).
+
+        Parameters:
+        data (AllocationData): the dataset to publish.
+        """
+        arrays = {field: np.ascontiguousarray(array) for field, array in data.to_arrays().items()}
+
+        layout, size = [], 0
+        for field, array in arrays.items():
+            layout.append((field, array.dtype.str, array.shape, size))
+            size += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+        self.shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for field, dtype, shape, offset in layout:
+            np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offset)[...] = arrays[field]
+
+        # What a worker needs to map the arrays (small and picklable)
+        self.spec = (self.shm.name, tuple(layout))
+
+    def close(self):
+        """Releases the block: the workers must be done with it."""
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Blocks attached by this process, by name: a worker maps each block once, whatever the number of tasks it runs
+_attached = {}
+# Detached blocks whose arrays were still in use (kept open: a SharedMemory closes its mapping when collected)
+_in_use = []
+
+def attach_shared_data(spec):
+    """
+    Maps a published dataset in the current process (a worker), without copying the numeric arrays.
+
+    Parameters:
+    spec (tuple): SharedAllocationData.spec.
+
+    Returns:
+    AllocationData: the dataset, with read-only arrays.
+    """
+    name, layout = spec
+    if name not in _attached:
+        if not _attached:
+            # Runs when the worker process exits (multiprocessing finalizer: atexit is skipped in forked workers)
+            util.Finalize(None, detach_shared_data, exitpriority=0)
+        shm = shared_memory.SharedMemory(name=name)
+        references = sys.getrefcount(shm.buf.obj) # references to the mapping before any array is built on it
+        arrays = {}
+        for field, dtype, shape, offset in layout:
+            array = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+            array.flags.writeable = False # the methods never modify their input
+            arrays[field] = array
+        _attached[name] = (shm, AllocationData.from_arrays(arrays), references)
+    return _attached[name][1]
+
+def detach_shared_data():
+    """
+    Drops the datasets attached by this process and closes their mappings.
+    A mapping whose arrays are still referenced elsewhere is not closed (reading them would crash the process):
+    it is released at the end of the process.
+    """
+    while _attached:
+        name, (shm, data, references) = _attached.popitem()
+        del data
+        gc.collect() # arrays held in reference cycles of the dataset
+        # Every array built on the mapping (views included) references it
+        if sys.getrefcount(shm.buf.obj) <= references:
+            shm.close()
+        else:
+            _in_use.append(shm)
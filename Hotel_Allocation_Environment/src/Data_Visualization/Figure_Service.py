@@ -0,0 +1,178 @@
+import hashlib
+import io
+import json
+import os
+from collections import OrderedDict
+import numpy as np
+
+from src.Columnar_Core.Allocation_Result import HotelReport
+from src.Data_Visualization import individual_visualization as visualization
+
+"""
+Figure service: the allocation methods only return data, and figures are drawn here, on request.
+A figure is rendered once to PNG and cached, keyed by a hash of the data it shows and by the plot type:
+asking again for the same chart of the same result (e.g. at every Streamlit rerun) returns the cached PNG,
+and batch runs that never ask for a figure never import matplotlib.
+Keys also hold RENDER_VERSION, so PNGs drawn by older plotting code are never served, and the folder keeps the
+max_files most recently used PNGs (files of older versions are removed first).
+Columnar reports (HotelReport) are read as columns: hashing and filtering them never builds per-hotel details or
+guest lists, and the plots are drawn from aggregated summaries (see individual_visualization).
+"""
+
+# Plots shown for each allocation method
+METHOD_PLOTS = {
+    'Random': ['revenue_distribution', 'satisfaction_distribution', 'guests_per_hotel'],
+    'Reservation': ['revenue_distribution', 'satisfaction_distribution', 'guests_per_hotel'],
+    'Price': ['revenue_distribution', 'satisfaction_distribution', 'guests_per_hotel', 'guests_by_price_category'],
+    'Availability': ['revenue_distribution', 'satisfaction_distribution', 'guests_per_hotel', 'guests_by_room_category'],
+    'Optimal': ['revenue_distribution', 'satisfaction_distribution', 'guests_per_hotel'],
+    'Stable': ['revenue_distribution', 'satisfaction_distribution', 'guests_per_hotel'],
+}
+RENDER_VERSION = 2 # bump whenever the drawing code changes (2: plots drawn from pre-aggregated summaries)
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                                 "Data_storing", "figures")
+
+
+def allocated_hotels(report):
+    """The hotels of a report that accommodate guests (a columnar report is filtered column by column)."""
+    if isinstance(report, HotelReport):
+        kept = report.rooms_occupied > 0
+        return HotelReport(report.hotel_ids[kept], report.rooms_occupied[kept], report.rooms_available[kept],
+                           report.revenue[kept])
+    return {hotel_id: details for hotel_id, details in report.items() if details['number_of_guests_accommodated'] > 0}
+
+
+def plot_data(method_name, result, plot_type, hotels_dict=None):
+    """
+    Selects the data a plot needs from an allocation result.
+    The random method only plots the hotels and guests that were allocated (as it always did).
+
+    Returns:
+    tuple: (report, satisfaction, hotels_dict) restricted to what the plot type uses.
+    """
+    report = result['allocation_report']
+    satisfaction = np.asarray(result['guest_satisfaction'])
+    if method_name == 'Random':
+        report = allocated_hotels(report)
+        satisfaction = satisfaction[np.asarray(result['assignment']) >= 0]
+    if plot_type == 'satisfaction_distribution':
+        return None, satisfaction, None
+    if plot_type in ('guests_by_price_category', 'guests_by_room_category'):
+        return report, None, hotels_dict
+    return report, None, None
+
+
+def data_hash(report, satisfaction, hotels_dict):
+    """SHA-256 of the data shown by a plot."""
+    digest = hashlib.sha256()
+    if report is not None:
+        hotel_ids, guests, revenue = visualization.hotel_columns(report)
+        digest.update(json.dumps(hotel_ids.tolist(), default=str).encode())
+        digest.update(np.ascontiguousarray(guests, dtype=np.int64).tobytes())
+        digest.update(np.ascontiguousarray(revenue, dtype=np.float64).tobytes())
+    if satisfaction is not None:
+        digest.update(np.ascontiguousarray(satisfaction, dtype=np.float64).tobytes())
+    if hotels_dict is not None:
+        rows = [(hotel_id, hotel['available_rooms'], hotel['price']) for hotel_id, hotel in hotels_dict.items()]
+        digest.update(json.dumps(rows, default=float).encode())
+    return digest.hexdigest()
+
+
+def draw(plot_type, report, satisfaction, hotels_dict):
+    """Draws one plot with the functions of individual_visualization. Returns a matplotlib figure."""
+    if plot_type == 'revenue_distribution':
+        return visualization.plot_revenue_distribution(report)
+    if plot_type == 'satisfaction_distribution':
+        return visualization.plot_guest_satisfaction_distribution(satisfaction)
+    if plot_type == 'guests_per_hotel':
+        return visualization.plot_guests_per_hotel(report)
+    if plot_type == 'guests_by_price_category':
+        return visualization.plot_guests_by_price_category(visualization.group_hotels_by_price(report, hotels_dict))
+    if plot_type == 'guests_by_room_category':
+        return visualization.plot_revenue_by_room_category(visualization.group_hotels_by_rooms(report, hotels_dict))
+    raise ValueError(f"Unknown plot type: {plot_type}")
+
+
+class FigureService:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_entries=64, max_files=256):
+        """
+        Parameters:
+        cache_dir (str or None): folder where rendered PNGs are kept between runs (None: memory only).
+        max_entries (int): number of PNGs kept in memory (least recently used are dropped first).
+        max_files (int): number of PNGs kept in cache_dir (least recently used are deleted first).
+        """
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_files = max_files
+        self._memory = OrderedDict()
+
+    def render(self, method_name, result, plot_type, hotels_dict=None):
+        """
+        Returns one plot of an allocation result as PNG bytes, from the cache when possible.
+
+        Parameters:
+        method_name (str): 'Random', 'Reservation', 'Price' or 'Availability'.
+        result (dict): result of the allocation method (allocation_report, guest_satisfaction, assignment).
+        plot_type (str): one of the plot types in METHOD_PLOTS.
+        hotels_dict (dict, optional): hotel_id -> {'available_rooms', 'price'} before the allocation
+        (needed by the price and room category plots).
+        """
+        report, satisfaction, hotels = plot_data(method_name, result, plot_type, hotels_dict)
+        key = f"{plot_type}-v{RENDER_VERSION}-{data_hash(report, satisfaction, hotels)[:32]}"
+
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+
+        path = os.path.join(self.cache_dir, f"{key}.png") if self.cache_dir else None
+        if path and os.path.isfile(path):
+            with open(path, 'rb') as png_file:
+                png = png_file.read()
+            os.utime(path) # most recently used: evicted last
+        else:
+            png = self._to_png(draw(plot_type, report, satisfaction, hotels))
+            if path:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                with open(path, 'wb') as png_file:
+                    png_file.write(png)
+                self._evict_files()
+
+        self._memory[key] = png
+        if len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+        return png
+
+    def figures(self, method_name, result, hotels_dict=None):
+        """All the plots of a method (METHOD_PLOTS), as a list of PNG bytes."""
+        return [self.render(method_name, result, plot_type, hotels_dict) for plot_type in METHOD_PLOTS[method_name]]
+
+    def _evict_files(self):
+        """Deletes the PNGs of older render versions, then the least recently used ones beyond max_files."""
+        current, stale = [], []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith('.png'):
+                (current if f"-v{RENDER_VERSION}-" in entry.name else stale).append(entry)
+        current.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in stale + current[:max(0, len(current) - self.max_files)]:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError: # already removed by another process
+                pass
+
+    @staticmethod
+    def _to_png(fig):
+        import matplotlib.pyplot as plt
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png')
+        plt.close(fig) # free the figure: only the PNG is kept
+        return buffer.getvalue()
+
+
+# Service shared by the whole process (kept across Streamlit reruns, since modules are imported once)
+_default_service = None
+
+def get_figure_service():
+    global _default_service
+    if _default_service is None:
+        _default_service = FigureService()
+    return _default_service
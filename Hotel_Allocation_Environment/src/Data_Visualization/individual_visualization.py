@@ -1,17 +1,124 @@
-import matplotlib.pyplot as plt
-import seaborn as sns # just to enhance visualization
-import streamlit as st
+import numpy as np
 import pandas as pd
-from collections import Counter
+
+# matplotlib, seaborn and streamlit are imported inside the plotting functions:
+# importing this module (and the allocation methods that use it) stays fast when no figure is drawn.
+# Plots are drawn from small summaries computed first with numpy (histogram counts, binned KDE, box plot quantiles),
+# never from the raw per-guest or per-hotel values: drawing takes the same time for 4k or 40M guests.
+
+KDE_GRID_SIZE = 512 # bins of the histogram the KDE is smoothed from
+
+
+def hotel_columns(allocation_report):
+    """
+    Columns of an allocation report: (hotel_ids, number of guests, revenue) arrays, in report order.
+    Columnar reports (HotelReport) give their arrays directly; report dictionaries are read once.
+    """
+    if hasattr(allocation_report, 'rooms_occupied'):
+        return allocation_report.hotel_ids, allocation_report.rooms_occupied, allocation_report.revenue
+    hotel_ids = np.array(list(allocation_report.keys()), dtype=object)
+    guests = np.fromiter((details['number_of_guests_accommodated'] for details in allocation_report.values()),
+                         dtype=np.int64, count=len(hotel_ids))
+    revenue = np.fromiter((details['revenue'] for details in allocation_report.values()),
+                          dtype=np.float64, count=len(hotel_ids))
+    return hotel_ids, guests, revenue
+
+
+def binned_kde(values, grid_size=KDE_GRID_SIZE):
+    """
+    Gaussian kernel density estimate of values, computed on a histogram of grid_size bins over their range
+    (Scott's bandwidth, as seaborn): the histogram counts are convolved with the sampled kernel.
+
+    Returns:
+    tuple: (grid, density) arrays, or None when values have no spread (fewer than 2 distinct values).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < 2 or values.min() == values.max():
+        return None
+    bandwidth = values.std(ddof=1) * len(values) ** (-1 / 5)
+    counts, edges = np.histogram(values, bins=grid_size)
+    step = edges[1] - edges[0]
+    radius = min(grid_size, int(np.ceil(4 * bandwidth / step))) # the kernel is cut at 4 bandwidths
+    kernel = np.exp(-0.5 * (np.arange(-radius, radius + 1) * step / bandwidth) ** 2)
+    density = np.convolve(counts, kernel)[radius:radius + grid_size] / (len(values) * bandwidth * np.sqrt(2 * np.pi))
+    return (edges[:-1] + edges[1:]) / 2, density
+
+
+def plot_histogram(ax, values, bins, color):
+    """Histogram of values with its KDE line (counts scale), drawn from np.histogram and binned_kde."""
+    values = np.asarray(values, dtype=np.float64)
+    counts, edges = np.histogram(values, bins=bins)
+    ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge', color=color, edgecolor='black', alpha=0.75)
+    kde = binned_kde(values)
+    if kde is not None:
+        grid, density = kde
+        ax.plot(grid, density * len(values) * (edges[1] - edges[0]), color=color)
+
+
+def box_summary(values):
+    """
+    Box plot statistics of values: quartiles, whiskers at the furthest values within 1.5 IQR of the box (as seaborn),
+    and the distinct values beyond them.
+
+    Returns:
+    dict: 'Hotels', 'Q1', 'Median', 'Q3', 'Whisker Low', 'Whisker High', 'Outliers' (None values when empty).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return {'Hotels': 0, 'Q1': None, 'Median': None, 'Q3': None, 'Whisker Low': None, 'Whisker High': None,
+                'Outliers': []}
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    inside = values[(values >= q1 - 1.5 * (q3 - q1)) & (values <= q3 + 1.5 * (q3 - q1))]
+    low, high = inside.min(), inside.max()
+    return {'Hotels': len(values), 'Q1': q1, 'Median': median, 'Q3': q3, 'Whisker Low': low, 'Whisker High': high,
+            'Outliers': np.unique(values[(values < low) | (values > high)]).tolist()}
+
+
+def category_summaries(category_column, category_values, guests, bins, labels):
+    """
+    Box plot summaries of the hotels' number of guests, per category (as pd.cut: bins are right-inclusive,
+    and hotels outside them are left out).
+
+    Parameters:
+    category_column (str): name of the category column.
+    category_values (array): value the category is read from (available rooms, price), one per hotel.
+    guests (array): number of guests of each hotel.
+    bins (list): category edges.
+    labels (list): category names.
+
+    Returns:
+    DataFrame: one row per category: the category and its box_summary.
+    """
+    category = np.searchsorted(np.asarray(bins, dtype=np.float64), np.asarray(category_values, dtype=np.float64)) - 1
+    guests = np.asarray(guests)
+    return pd.DataFrame([{category_column: label, **box_summary(guests[category == index])}
+                         for index, label in enumerate(labels)])
+
+
+def plot_box_summaries(ax, summaries, category_column):
+    """Box plot drawn from category_summaries (Axes.bxp), one box per category with hotels."""
+    import seaborn as sns
+    colors = sns.color_palette("Set2", len(summaries))
+    rows = [(position, row) for position, row in enumerate(summaries.to_dict('records')) if row['Hotels'] > 0]
+    stats = [{'q1': row['Q1'], 'med': row['Median'], 'q3': row['Q3'], 'whislo': row['Whisker Low'],
+              'whishi': row['Whisker High'], 'fliers': row['Outliers']} for _, row in rows]
+    if stats:
+        boxes = ax.bxp(stats, positions=[position for position, _ in rows], patch_artist=True,
+                       medianprops={'color': 'black'})
+        for box, (position, _) in zip(boxes['boxes'], rows):
+            box.set_facecolor(colors[position])
+    ax.set_xticks(range(len(summaries)))
+    ax.set_xticklabels(summaries[category_column])
+    ax.set_xlim(-0.5, len(summaries) - 0.5)
 
 # Histogram to visualize the distribution of revenues across hotels
 def plot_revenue_distribution(allocation_report):
-    hotel_names = list(allocation_report.keys()) # extracts hotel IDs from the allocation report
-    revenues = [allocation_report[hotel_name]['revenue'] for hotel_name in hotel_names] # list of revenue values per hotel
+    import matplotlib.pyplot as plt
+    _, _, revenues = hotel_columns(allocation_report) # revenue of each hotel
     
-    # initialize matplotlib figure, use seaborn to create histogram (30 bars with kernel density estimate)
+    # initialize matplotlib figure, histogram (30 bars with kernel density estimate) from the binned counts
     fig, ax = plt.subplots(figsize=(10, 6)) 
-    sns.histplot(revenues, bins=30, kde=True, color='green', edgecolor='black', ax=ax) 
+    plot_histogram(ax, revenues, bins=30, color='green')
     ax.set_title('Revenue Distribution Across Hotels')
     ax.set_xlabel('Revenue')
     ax.set_ylabel('Number of Hotels')
@@ -19,10 +126,15 @@ def plot_revenue_distribution(allocation_report):
 
 # Histogram to visualize the distribution of guest satisfaction across guests
 def plot_guest_satisfaction_distribution(guest_satisfaction):
-    satisfaction_scores = list(guest_satisfaction.values()) # stores scores per guest
+    import matplotlib.pyplot as plt
+    # scores per guest: a dictionary (guest -> score) or an array of scores (columnar methods)
+    if isinstance(guest_satisfaction, dict):
+        satisfaction_scores = np.fromiter(guest_satisfaction.values(), dtype=np.float64, count=len(guest_satisfaction))
+    else:
+        satisfaction_scores = np.asarray(guest_satisfaction, dtype=np.float64)
     
     fig, ax = plt.subplots(figsize=(10, 6))
-    sns.histplot(satisfaction_scores, bins=30, kde=True, color='orange', edgecolor='black', ax=ax)
+    plot_histogram(ax, satisfaction_scores, bins=30, color='orange')
     ax.set_title('Guest Satisfaction Distribution')
     ax.set_xlabel('Satisfaction Score')
     ax.set_ylabel('Number of Guests')
@@ -30,17 +142,11 @@ def plot_guest_satisfaction_distribution(guest_satisfaction):
 
 # Bar chart to visualize the distribution of guests per hotel
 def plot_guests_per_hotel(allocation_report):
-    # Get the number of guests per hotel
-    hotel_guest_counts = [
-        allocation_report[hotel_name]['number_of_guests_accommodated'] 
-        for hotel_name in allocation_report
-    ] # list of the number of guests accommodated per hotel
-    
-    # Count how many hotels have a specific number of guests.
-    guest_count_distribution = Counter(hotel_guest_counts) # dictionary-like object (keys is number of guest, value is how many hotels have that number)
-    sorted_guest_counts = sorted(guest_count_distribution.items()) # Sort by the number of guests (x-axis values)
+    import matplotlib.pyplot as plt
+    _, hotel_guest_counts, _ = hotel_columns(allocation_report) # number of guests accommodated per hotel
     
-    num_guests, num_hotels = zip(*sorted_guest_counts) # separates the sorted pairs of guests and hotels into two lists (hotel with 3 guests // 3 guests)
+    # Count how many hotels have each number of guests (sorted by the number of guests, the x-axis values)
+    num_guests, num_hotels = np.unique(hotel_guest_counts, return_counts=True)
     
     fig, ax = plt.subplots(figsize=(10, 6))
     ax.bar(num_guests, num_hotels, color='purple') #(x, y, purple bars)
@@ -53,95 +159,83 @@ def plot_guests_per_hotel(allocation_report):
 
 # Availability plot: group by room availability and see if the revenue changes
 def group_hotels_by_rooms(availability_allocation_report, hotels_dict_original):
-    # Prepare data for grouping by available rooms
-    available_rooms = []
-    number_of_guests = []
-    hotel_labels = []
-
-    for hotel_id, report in availability_allocation_report.items():
-        available_rooms.append(hotels_dict_original[hotel_id]['available_rooms'])
-        number_of_guests.append(report['number_of_guests_accommodated'])
-        hotel_labels.append(hotel_id)
-
-    # Create a DataFrame
-    df = pd.DataFrame({
-        'Hotel': hotel_labels,
-        'Available Rooms': available_rooms,
-        'Number of Guests': number_of_guests,
-    })
+    """
+    Box plot summaries of the number of guests of the hotels, per room availability category.
+
+    Parameters:
+    availability_allocation_report (dict or HotelReport): allocation report.
+    hotels_dict_original (dict): hotel_id -> {'available_rooms', 'price'} before the allocation.
+
+    Returns:
+    DataFrame: one row per category: 'Room Category' and its quartiles, whiskers and outliers.
+    """
+    hotel_ids, number_of_guests, _ = hotel_columns(availability_allocation_report)
+    available_rooms = np.array([hotels_dict_original[hotel_id]['available_rooms'] for hotel_id in hotel_ids.tolist()],
+                               dtype=np.float64)
 
     # Define the room categories
     bins = [0, 6, 11, float('inf')]  # Define the bins for low, medium, and high availability
     labels = ['Low Availability', 'Medium Availability', 'High Availability']
-    df['Room Category'] = pd.cut(df['Available Rooms'], bins=bins, labels=labels)
-
-    return df
+    return category_summaries('Room Category', available_rooms, number_of_guests, bins, labels)
 
 # Create the box plot
-def plot_revenue_by_room_category(df):
-    # Check the grouped DataFrame structure
-    print("\nData for Plotting:")
-    print(df)
-
+def plot_revenue_by_room_category(summaries):
+    import matplotlib.pyplot as plt
     #  Create a figure and axis explicitly
     fig, ax = plt.subplots(figsize=(10, 6))
     
     # Create the box plot grouped by room category
-    sns.boxplot(x='Room Category', y='Number of Guests', data=df, palette="Set2", ax=ax)
+    plot_box_summaries(ax, summaries, 'Room Category')
     
     # Add titles and labels
     ax.set_title('Guest Distribution by Room Availability', fontsize=16)
     ax.set_xlabel('Room Availability Category', fontsize=12)
     ax.set_ylabel('Guests Number', fontsize=12)
     # Improve layout
-    plt.tight_layout() 
+    fig.tight_layout() 
     return fig
 
 # Price plot: guests accommodated in hotels grouped by price categories
 # Group hotels by price
 def group_hotels_by_price(price_allocation_report, hotels_dict):
-    # Prepare data for grouping by price
-    hotel_prices = []
-    num_guests = []
-    hotel_labels = []
-
-    for hotel_id, report in price_allocation_report.items():
-        hotel_prices.append(hotels_dict[hotel_id]['price'])  
-        num_guests.append(report.get('number_of_guests_accommodated', 0))
-        hotel_labels.append(hotel_id)
-
-    # Create a DataFrame
-    df = pd.DataFrame({
-        'Hotel': hotel_labels,
-        'Price': hotel_prices,
-        'Number of Guests': num_guests
-    })
+    """
+    Box plot summaries of the number of guests of the hotels, per price category.
+
+    Parameters:
+    price_allocation_report (dict or HotelReport): allocation report.
+    hotels_dict (dict): hotel_id -> {'available_rooms', 'price'}.
+
+    Returns:
+    DataFrame: one row per category: 'Price Category' and its quartiles, whiskers and outliers.
+    """
+    hotel_ids, num_guests, _ = hotel_columns(price_allocation_report)
+    hotel_prices = np.array([hotels_dict[hotel_id]['price'] for hotel_id in hotel_ids.tolist()], dtype=np.float64)
 
     # Define price categories
     bins = [0, 60, 130, 200, float('inf')]  # Adjust ranges as necessary
     labels = ['Budget', 'Mid-range', 'Luxury', 'Ultra Luxury']
-    df['Price Category'] = pd.cut(df['Price'], bins=bins, labels=labels)
-
-    return df
+    return category_summaries('Price Category', hotel_prices, num_guests, bins, labels)
 
 """
     Creates a box plot of the number of guests grouped by price category.
     Parameters:
-        df (pd.DataFrame): DataFrame containing 'Price Category' and 'Number of Guests'.
+        summaries (pd.DataFrame): box plot summaries per 'Price Category' (group_hotels_by_price).
     Returns:
         matplotlib.figure.Figure: A Matplotlib figure object for Streamlit compatibility.
     """
 
-def plot_guests_by_price_category(df, show_dataframe=False):
-   # Only display the dataframe if the flag is True
+def plot_guests_by_price_category(summaries, show_dataframe=False):
+    import matplotlib.pyplot as plt
+    import streamlit as st
+   # Only display the summaries if the flag is True
     if show_dataframe:
         st.subheader("DataFrame: Guests allocation to different luxury-level hotels")
-        st.write(df)
+        st.write(summaries)
     # Create boxplot below the dataframe
     fig, ax = plt.subplots(figsize=(10, 6))
     
     # Create the box plot grouped by price category
-    sns.boxplot(x='Price Category', y='Number of Guests', data=df, palette="Set2", ax=ax)
+    plot_box_summaries(ax, summaries, 'Price Category')
 
     # Add titles and labels
     ax.set_title('Number of Guests Accommodated by Price Category', fontsize=16)
@@ -149,4 +243,3 @@ def plot_guests_by_price_category(df, show_dataframe=False):
     ax.set_ylabel('Number of Guests', fontsize=12)
     
     return fig
-
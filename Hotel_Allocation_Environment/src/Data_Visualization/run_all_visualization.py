@@ -97,3 +97,36 @@ def statistics_comparison(statistics_dicts):
 
     return fig
 
+
+
+"""
+Scaling chart of the benchmark (src/Benchmarks/Scaling_Benchmark.py): median execution time and peak memory
+against the number of guests, one line per strategy and variant, on log-log axes.
+The parameter is the list of benchmark records; skipped and failed runs are left out."""
+def plot_scaling(records):
+    fig, axs = plt.subplots(1, 2, figsize=(14, 6))
+    series = {}
+    for record in records:
+        if 'median' in record:
+            series.setdefault((record['strategy'], record['variant']), []).append(record)
+    
+    strategies = list(dict.fromkeys(strategy for strategy, _ in series)) # one color per strategy, one line style per variant
+    for (strategy, variant), points in series.items():
+        points = sorted(points, key=lambda record: record['num_guests'])
+        guests = [record['num_guests'] for record in points]
+        style = {'color': f"C{strategies.index(strategy)}", 'linestyle': '-' if variant == 'columnar' else '--', 'marker': 'o'}
+        axs[0].plot(guests, [record['median'] for record in points], label=f"{strategy} ({variant})", **style)
+        axs[1].plot(guests, [record['peak_memory_mb'] for record in points], label=f"{strategy} ({variant})", **style)
+    
+    axs[0].set_title('Execution Time by Number of Guests')
+    axs[0].set_ylabel('Median Execution Time (seconds)')
+    axs[1].set_title('Peak Memory by Number of Guests')
+    axs[1].set_ylabel('Peak Memory (MB)')
+    for ax in axs:
+        ax.set_xscale('log')
+        ax.set_yscale('log')
+        ax.set_xlabel('Number of Guests')
+        ax.grid(True, which='both', alpha=0.3)
+        ax.legend()
+    fig.tight_layout()
+    return fig
@@ -0,0 +1,211 @@
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+"""
+Seeded generator of synthetic datasets, in the schemas of the real files:
+- hotels: hotel, rooms, price;
+- guests: guest, discount;
+- preferences: guest, hotel, priority (1 = first choice).
+IDs follow the real ones (hotel_1, ..., guest_1, ...). Guests and preferences are generated and written in chunks
+of guests, so the size of the output is not limited by memory; hotels are written at once (one row per hotel).
+Files are written as Parquet (needs pyarrow) or CSV, with the names load_data looks for in a data folder
+(hotels.parquet, guests.parquet, preferences.parquet, ...): point HOTEL_ALLOCATION_DATA_DIR to the output folder.
+The same seed and chunk size give the same files.
+Guests are written in numeric order (guest_1, guest_2, ..., guest_10), not in reservation order (sorted by ID as
+strings: guest_10 before guest_2); sort the guests and preferences files with sort_guest_files
+(Streaming_Reservation_Allocation.py) before streaming them.
+
+Usage (from Hotel_Allocation_Environment):
+    python -m src.Data_generation --guests 400000 --hotels 40000 --output-dir Data_storing/synthetic
+"""
+
+FORMATS = ('parquet', 'csv')
+
+
+def hotel_columns(num_hotels, rng, num_guests, rooms_per_guest=0.8, capacity_skew=0.5,
+                  median_price=150, price_skew=0.4, min_price=50, max_price=300):
+    """
+    Rooms and price of each hotel.
+    - Rooms: log-normal with shape capacity_skew (0: all hotels the same size), scaled so that the hotels
+      have about rooms_per_guest rooms per guest in total; every hotel has at least one room.
+    - Price: log-normal around median_price with shape price_skew, rounded and clipped to [min_price, max_price].
+    """
+    weights = rng.lognormal(0, capacity_skew, num_hotels)
+    rooms = np.maximum(1, np.round(weights / weights.sum() * rooms_per_guest * num_guests)).astype(np.int64)
+    price = np.clip(np.round(median_price * rng.lognormal(0, price_skew, num_hotels)), min_price, max_price).astype(np.int64)
+    return rooms, price
+
+
+def hotel_popularity(num_hotels, rng, popularity_skew=0.0):
+    """
+    Probability of each hotel to appear in a preference list: Zipf-like weights 1 / rank ** popularity_skew,
+    over a random ranking of the hotels (0: every hotel equally popular).
+    """
+    ranks = rng.permutation(num_hotels) + 1
+    weights = 1.0 / ranks ** popularity_skew
+    return weights / weights.sum()
+
+
+def preference_lengths(count, rng, distribution='uniform', min_preferences=1, max_preferences=10, mean_preferences=None):
+    """
+    Length of the preference list of count guests, between min_preferences and max_preferences.
+    - 'uniform': every length equally likely;
+    - 'geometric': short lists are the most common, with mean about mean_preferences (default: middle of the range).
+    """
+    if distribution == 'uniform':
+        return rng.integers(min_preferences, max_preferences, count, endpoint=True)
+    if distribution == 'geometric':
+        mean = mean_preferences or (min_preferences + max_preferences) / 2
+        extra = rng.geometric(1 / max(1.0, mean - min_preferences + 1), count) - 1
+        return np.minimum(min_preferences + extra, max_preferences)
+    raise ValueError(f"Unknown preference distribution: {distribution!r}")
+
+
+def guest_chunk(first_guest, count, num_hotels, popularity, rng, max_discount=0.25, **length_options):
+    """
+    Guests first_guest + 1 ... first_guest + count and their preferences.
+    A hotel drawn twice for the same guest is only kept at its first priority, so a list can be slightly shorter
+    than its drawn length (and a guest can end up with no preferences only if min_preferences is 0).
+
+    Returns:
+    tuple: (guests DataFrame, preferences DataFrame), in the file schemas.
+    """
+    guest_numbers = np.arange(first_guest + 1, first_guest + count + 1)
+    discount = np.round(rng.uniform(0, max_discount, count), 2)
+
+    lengths = preference_lengths(count, rng, **length_options)
+    entry_guest = np.repeat(np.arange(count, dtype=np.int64), lengths)
+    hotels = rng.choice(num_hotels, size=len(entry_guest), p=popularity)
+
+    # Drop repeated (guest, hotel) pairs, keeping the first one, then number the priorities from 1 within each guest
+    _, first = np.unique(entry_guest * num_hotels + hotels, return_index=True)
+    keep = np.zeros(len(entry_guest), dtype=bool)
+    keep[first] = True
+    entry_guest, hotels = entry_guest[keep], hotels[keep]
+    starts = np.concatenate(([0], np.cumsum(np.bincount(entry_guest, minlength=count))[:-1]))
+    priority = np.arange(len(entry_guest)) - starts[entry_guest] + 1
+
+    guests_df = pd.DataFrame({'guest': [f"guest_{number}" for number in guest_numbers.tolist()], 'discount': discount})
+    preferences_df = pd.DataFrame({
+        'guest': [f"guest_{number}" for number in guest_numbers[entry_guest].tolist()],
+        'hotel': [f"hotel_{number}" for number in (hotels + 1).tolist()],
+        'priority': priority
+    })
+    return guests_df, preferences_df
+
+
+class TableWriter:
+    """Appends DataFrames to one Parquet or CSV file."""
+
+    def __init__(self, path, file_format):
+        self.path = path
+        self.file_format = file_format
+        self._parquet_writer = None
+        self._header = True
+
+    def write(self, df):
+        if self.file_format == 'csv':
+            df.to_csv(self.path, mode='w' if self._header else 'a', header=self._header, index=False)
+            self._header = False
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._parquet_writer is None:
+            self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+        self._parquet_writer.write_table(table)
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def generate_dataset(output_dir, num_guests, num_hotels, seed=0, file_format='parquet', chunk_size=100_000,
+                     preference_distribution='uniform', min_preferences=1, max_preferences=10, mean_preferences=None,
+                     popularity_skew=0.0, rooms_per_guest=0.8, capacity_skew=0.5, median_price=150, price_skew=0.4,
+                     min_price=50, max_price=300, max_discount=0.25):
+    """
+    Writes a synthetic dataset (hotels, guests and preferences files) in output_dir.
+
+    Parameters:
+    output_dir (str): folder of the files (created if needed).
+    num_guests, num_hotels (int): size of the dataset.
+    seed (int): seed of the generator.
+    file_format (str): 'parquet' or 'csv'.
+    chunk_size (int): number of guests generated and written at a time.
+    preference_distribution, min_preferences, max_preferences, mean_preferences: length of the preference lists
+    (see preference_lengths).
+    popularity_skew (float): skew of the hotels' popularity in the preferences (see hotel_popularity).
+    rooms_per_guest, capacity_skew, median_price, price_skew, min_price, max_price: rooms and prices (see hotel_columns).
+    max_discount (float): discounts are uniform between 0 and max_discount.
+
+    Returns:
+    dict: dataset name ('hotels', 'guests', 'preferences') -> path of the written file.
+    """
+    if file_format not in FORMATS:
+        raise ValueError(f"file_format must be one of {FORMATS}, not {file_format!r}")
+    os.makedirs(output_dir, exist_ok=True)
+    paths = {name: os.path.join(output_dir, f"{name}.{file_format}") for name in ('hotels', 'guests', 'preferences')}
+    seeds = np.random.SeedSequence(seed)
+    hotel_seed, chunk_seed = seeds.spawn(2)
+
+    rng = np.random.default_rng(hotel_seed)
+    rooms, price = hotel_columns(num_hotels, rng, num_guests, rooms_per_guest, capacity_skew,
+                                 median_price, price_skew, min_price, max_price)
+    popularity = hotel_popularity(num_hotels, rng, popularity_skew)
+    with TableWriter(paths['hotels'], file_format) as writer:
+        writer.write(pd.DataFrame({'hotel': [f"hotel_{number}" for number in range(1, num_hotels + 1)],
+                                   'rooms': rooms, 'price': price}))
+
+    length_options = {'distribution': preference_distribution, 'min_preferences': min_preferences,
+                      'max_preferences': max_preferences, 'mean_preferences': mean_preferences}
+    chunk_starts = range(0, num_guests, chunk_size)
+    with TableWriter(paths['guests'], file_format) as guests_writer, \
+         TableWriter(paths['preferences'], file_format) as preferences_writer:
+        for first_guest, rng_seed in zip(chunk_starts, chunk_seed.spawn(len(chunk_starts))):
+            guests_df, preferences_df = guest_chunk(first_guest, min(chunk_size, num_guests - first_guest), num_hotels,
+                                                    popularity, np.random.default_rng(rng_seed), max_discount,
+                                                    **length_options)
+            guests_writer.write(guests_df)
+            preferences_writer.write(preferences_df)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generates a synthetic hotels/guests/preferences dataset.")
+    parser.add_argument('--guests', type=int, required=True)
+    parser.add_argument('--hotels', type=int, required=True)
+    parser.add_argument('--output-dir', required=True)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--format', choices=FORMATS, default='parquet')
+    parser.add_argument('--chunk-size', type=int, default=100_000)
+    parser.add_argument('--preference-distribution', choices=('uniform', 'geometric'), default='uniform')
+    parser.add_argument('--min-preferences', type=int, default=1)
+    parser.add_argument('--max-preferences', type=int, default=10)
+    parser.add_argument('--mean-preferences', type=float, default=None)
+    parser.add_argument('--popularity-skew', type=float, default=0.0)
+    parser.add_argument('--rooms-per-guest', type=float, default=0.8)
+    parser.add_argument('--capacity-skew', type=float, default=0.5)
+    parser.add_argument('--median-price', type=float, default=150)
+    parser.add_argument('--price-skew', type=float, default=0.4)
+    parser.add_argument('--max-discount', type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    paths = generate_dataset(args.output_dir, args.guests, args.hotels, args.seed, args.format, args.chunk_size,
+                             args.preference_distribution, args.min_preferences, args.max_preferences,
+                             args.mean_preferences, args.popularity_skew, args.rooms_per_guest, args.capacity_skew,
+                             args.median_price, args.price_skew, max_discount=args.max_discount)
+    for path in paths.values():
+        print(f"Written {path}")
+
+
+if __name__ == "__main__":
+    main()
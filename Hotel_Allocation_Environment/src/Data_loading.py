@@ -1,9 +1,240 @@
-import pandas as pd
+import hashlib
+import json
+import os
+import numpy as np
+from src.Instrumentation import phase
 
-def load_data():
-    hotels_df = pd.read_excel("C:/Users/Leila/Downloads/hotels.xlsx", index_col=0)
-    guests_df = pd.read_excel("C:/Users/Leila/Downloads/guests.xlsx", index_col=0)
-    preferences_df = pd.read_excel("C:/Users/Leila/Downloads/preferences.xlsx", index_col=0)
+"""
+Loading of the three datasets (hotels, guests, preferences).
+Paths are resolved in this order: arguments of load_data, environment variables, JSON config file, defaults.
+- HOTEL_ALLOCATION_DATA_DIR: folder containing hotels, guests and preferences files (.xlsx, .parquet or .csv,
+  e.g. hotels.xlsx or the files written by src/Data_generation.py);
+- HOTEL_ALLOCATION_HOTELS / HOTEL_ALLOCATION_GUESTS / HOTEL_ALLOCATION_PREFERENCES: path of a single file;
+- HOTEL_ALLOCATION_CACHE_DIR: folder of the binary cache;
+- HOTEL_ALLOCATION_CONFIG: JSON config file with the keys 'data_dir', 'hotels', 'guests', 'preferences', 'cache_dir'
+  (by default hotel_allocation.json in the working directory, if it exists).
+The first time an Excel or CSV file is read, its content is stored in a .npz cache keyed by the hash of the file:
+later runs load the cache instead of parsing the file again (the hash is only recomputed if the file mtime changes).
+Parquet files are already binary and column-oriented, so they are read directly.
+load_allocation_data also caches the columnar data built from the three files (AllocationData.save), so that a
+process that only allocates (e.g. src/Batch_Runner.py) loads it without importing pandas.
+pandas is imported by the functions that need it, not with this module.
+"""
+
+DEFAULT_DATA_DIR = "C:/Users/Leila/Downloads"
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Data_storing", "cache")
+DEFAULT_CONFIG_FILE = "hotel_allocation.json"
+DATASET_FILES = {'hotels': "hotels.xlsx", 'guests': "guests.xlsx", 'preferences': "preferences.xlsx"}
+FILE_EXTENSIONS = ('.xlsx', '.parquet', '.csv') # looked for in this order in the data folder
+
+# Datasets already loaded in this process: (path, cache_dir) -> DataFrame
+_loaded = {}
+
+def load_config():
+    """Reads the JSON config file (HOTEL_ALLOCATION_CONFIG or hotel_allocation.json). Returns {} if there is none."""
+    config_path = os.environ.get("HOTEL_ALLOCATION_CONFIG", DEFAULT_CONFIG_FILE)
+    if not os.path.isfile(config_path):
+        return {}
+    with open(config_path) as config_file:
+        return json.load(config_file)
+
+def resolve_paths(hotels_path=None, guests_path=None, preferences_path=None, cache_dir=None, data_dir=None):
+    """
+    Resolves the path of each dataset and of the cache folder.
+    data_dir (optional) replaces HOTEL_ALLOCATION_DATA_DIR and the 'data_dir' of the config file.
+
+    Returns:
+    tuple: (dict dataset name -> path, cache folder).
+    """
+    config = load_config()
+    data_dir = data_dir or os.environ.get("HOTEL_ALLOCATION_DATA_DIR", config.get('data_dir', DEFAULT_DATA_DIR))
+    explicit = {'hotels': hotels_path, 'guests': guests_path, 'preferences': preferences_path}
+
+    paths = {}
+    for name, file_name in DATASET_FILES.items():
+        paths[name] = (explicit[name]
+                       or os.environ.get(f"HOTEL_ALLOCATION_{name.upper()}")
+                       or config.get(name)
+                       or find_dataset_file(data_dir, name, file_name))
+    cache_dir = cache_dir or os.environ.get("HOTEL_ALLOCATION_CACHE_DIR") or config.get('cache_dir', DEFAULT_CACHE_DIR)
+    return paths, cache_dir
+
+def find_dataset_file(data_dir, name, default_file_name):
+    """Path of a dataset in a folder: the first of <name>.xlsx, .parquet, .csv that exists, else the default file name."""
+    for extension in FILE_EXTENSIONS:
+        path = os.path.join(data_dir, name + extension)
+        if os.path.isfile(path):
+            return path
+    return os.path.join(data_dir, default_file_name)
+
+def read_table(path):
+    """Parses a dataset file according to its extension (Excel files have an index column, as the original exports)."""
+    import pandas as pd
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.parquet':
+        return pd.read_parquet(path)
+    if extension == '.csv':
+        return pd.read_csv(path)
+    return pd.read_excel(path, index_col=0)
+
+def file_hash(path):
+    """SHA-256 of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for block in iter(lambda: source.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def save_npz(df, path):
+    """
+    Stores a DataFrame as a .npz archive (index + one array per column, strings as fixed-width unicode).
+    Missing values of text columns are stored as empty strings plus a mask (mask:<column>), restored by load_npz.
+    """
+    import pandas as pd
+    arrays = {'__index__': df.index.to_numpy()}
+    for column in df.columns:
+        values = df[column].to_numpy()
+        if values.dtype == object or pd.api.types.is_string_dtype(values.dtype):
+            missing = pd.isna(values)
+            if missing.any():
+                arrays[f"mask:{column}"] = missing
+                values = np.where(missing, '', values)
+            values = values.astype(str)
+        arrays[f"col:{column}"] = values
+    tmp_path = path + ".tmp.npz" # write then rename, so that an interrupted run never leaves a broken cache
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+
+def load_npz(path):
+    """Reads a DataFrame stored with save_npz."""
+    import pandas as pd
+    with np.load(path, allow_pickle=False) as archive:
+        # unicode arrays get the same string dtype pandas gives to text columns read from Excel
+        columns = {key[4:]: archive[key] for key in archive.files if key.startswith("col:")}
+        df = pd.DataFrame(columns, index=archive['__index__'])
+        for key in archive.files:
+            if key.startswith("mask:"):
+                df[key[5:]] = df[key[5:]].mask(archive[key])
+        return df
+
+def read_cached(path, cache_dir):
+    """
+    Reads a dataset through the binary cache.
+    The manifest (<name>-<hash of the absolute path>.json) stores size, mtime and hash of the source file the cache
+    was built from: files with the same name in different folders have their own manifest and cache.
+
+    Parameters:
+    path (str): path of the source file (Excel or CSV).
+    cache_dir (str): folder of the cache.
+
+    Returns:
+    DataFrame: the dataset.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    source = os.path.abspath(path)
+    name = f"{os.path.splitext(os.path.basename(path))[0]}-{hashlib.sha256(source.encode()).hexdigest()[:12]}"
+    manifest_path = os.path.join(cache_dir, f"{name}.json")
+    stat = os.stat(path)
+    manifest = {}
+    if os.path.isfile(manifest_path):
+        with open(manifest_path) as manifest_file:
+            manifest = json.load(manifest_file)
+
+    # Same source, size and mtime: no need to hash the file again
+    unchanged = (manifest.get('source') == source and manifest.get('size') == stat.st_size
+                 and manifest.get('mtime_ns') == stat.st_mtime_ns)
+    source_hash = manifest['sha256'] if unchanged else file_hash(path)
+    cache_path = os.path.join(cache_dir, f"{name}-{source_hash[:16]}.npz")
+
+    if os.path.isfile(cache_path):
+        df = load_npz(cache_path)
+    else:
+        df = read_table(path)
+        save_npz(df, cache_path)
+        old_cache = manifest.get('cache')
+        if old_cache and old_cache != cache_path and os.path.isfile(old_cache):
+            os.remove(old_cache)
+
+    if not unchanged:
+        manifest = {'source': source, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                    'sha256': source_hash, 'cache': cache_path}
+        with open(manifest_path, 'w') as manifest_file:
+            json.dump(manifest, manifest_file)
+    return df
+
+def load_data(hotels_path=None, guests_path=None, preferences_path=None, cache_dir=None, use_cache=True):
+    """
+    Loads the hotels, guests and preferences datasets.
+    Each file is parsed at most once per process; with use_cache, parsed Excel and CSV files are also cached on disk.
+
+    Returns:
+    tuple: (hotels_df, guests_df, preferences_df), copies that the caller can modify.
+    """
+    paths, cache_dir = resolve_paths(hotels_path, guests_path, preferences_path, cache_dir)
+    frames = []
+    for name in DATASET_FILES:
+        key = (os.path.abspath(paths[name]), cache_dir if use_cache else None)
+        if key not in _loaded:
+            cached = use_cache and not paths[name].lower().endswith('.parquet')
+            _loaded[key] = read_cached(paths[name], cache_dir) if cached else read_table(paths[name])
+        frames.append(_loaded[key].copy())
+    hotels_df, guests_df, preferences_df = frames
     return hotels_df, guests_df, preferences_df
 
-hotels_df, guests_df, preferences_df = load_data()
\ No newline at end of file
+def load_allocation_data(hotels_path=None, guests_path=None, preferences_path=None, cache_dir=None, use_cache=True,
+                         data_dir=None):
+    """
+    Loads the three datasets as columnar data (AllocationData).
+    With use_cache, the columnar data is stored in the cache folder, keyed by the path, size and mtime of the three
+    files: later runs on unchanged files read it back with a single np.load, without parsing the files or importing
+    pandas. Edited files get a new key (the entry of the previous version is left in the folder).
+    data_dir: folder of the three files, see resolve_paths.
+
+    Returns:
+    AllocationData: the columnar dataset.
+    """
+    from src.Columnar_Core.Allocation_Data import AllocationData
+    paths, cache_dir = resolve_paths(hotels_path, guests_path, preferences_path, cache_dir, data_dir)
+    cache_path = None
+    if use_cache:
+        digest = hashlib.sha256()
+        for name in DATASET_FILES:
+            stat = os.stat(paths[name])
+            digest.update(f"{os.path.abspath(paths[name])}|{stat.st_size}|{stat.st_mtime_ns}\n".encode())
+        cache_path = os.path.join(cache_dir, f"allocation_data-{digest.hexdigest()[:16]}.npz")
+        if os.path.isfile(cache_path):
+            with phase('loading'):
+                return AllocationData.load(cache_path)
+
+    with phase('loading'):
+        dataframes = load_data(paths['hotels'], paths['guests'], paths['preferences'], cache_dir, use_cache)
+    data = AllocationData.from_dataframes(*dataframes)
+    if cache_path is not None:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            data.save(cache_path)
+        except TypeError: # IDs of mixed types: the data is still returned, only not cached
+            pass
+    return data
+
+def read_chunks(path, chunk_size=100_000):
+    """
+    Reads a dataset file in chunks of rows, without loading the whole file (used by the streaming allocation).
+    CSV files are read with pandas' chunked reader and Parquet files batch by batch (pyarrow);
+    Excel files cannot be read partially, so they are parsed once and split.
+
+    Yields:
+    DataFrame: the next chunk_size rows (fewer for the last chunk).
+    """
+    import pandas as pd
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        yield from pd.read_csv(path, chunksize=chunk_size)
+    elif extension == '.parquet':
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        df = read_table(path)
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size]
@@ -0,0 +1,89 @@
+from functools import cached_property
+from src.Instrumentation import phase
+
+"""
+Lazy dataset registry.
+Nothing is loaded when a module is imported: a dataset reads its files the first time one of its representations
+(DataFrames, dictionaries, columnar data) is requested, and each representation is built once and then reused.
+"""
+
+class Dataset:
+    def __init__(self, name, hotels_path=None, guests_path=None, preferences_path=None, cache_dir=None):
+        """
+        Parameters:
+        name (str): name of the dataset in the registry.
+        hotels_path, guests_path, preferences_path, cache_dir (str, optional): passed to load_data
+        (None means environment variables, config file or default paths).
+        """
+        self.name = name
+        self.paths = {
+            'hotels_path': hotels_path,
+            'guests_path': guests_path,
+            'preferences_path': preferences_path,
+            'cache_dir': cache_dir
+        }
+
+    @cached_property
+    def dataframes(self):
+        """(hotels_df, guests_df, preferences_df) as loaded from the files."""
+        from src.Data_loading import load_data
+        with phase('loading'):
+            return load_data(**self.paths)
+
+    @property
+    def hotels_df(self):
+        return self.dataframes[0]
+
+    @property
+    def guests_df(self):
+        return self.dataframes[1]
+
+    @property
+    def preferences_df(self):
+        return self.dataframes[2]
+
+    @cached_property
+    def guests_dict(self):
+        """guest_id -> {'discount', 'preferences'}: input of the dictionary-based allocation methods."""
+        from src.Guests_Hotels_Dictionaries.Guests import create_guests_dict
+        guests_df, preferences_df = self.guests_df, self.preferences_df
+        with phase('copying'):
+            return create_guests_dict(guests_df, preferences_df)
+
+    @cached_property
+    def hotels_dict(self):
+        """hotel_id -> {'available_rooms', 'price'}: input of the dictionary-based allocation methods."""
+        from src.Guests_Hotels_Dictionaries.Hotels import create_hotels_dict
+        hotels_df = self.hotels_df
+        with phase('copying'):
+            return create_hotels_dict(hotels_df)
+
+    @cached_property
+    def data(self):
+        """
+        Columnar data (AllocationData): input of the columnar allocation methods.
+        Built from the DataFrames if they are already loaded, otherwise read through the columnar cache
+        (load_allocation_data), which does not need the DataFrames.
+        """
+        if 'dataframes' in self.__dict__:
+            from src.Columnar_Core.Allocation_Data import AllocationData
+            return AllocationData.from_dataframes(self.hotels_df, self.guests_df, self.preferences_df)
+        from src.Data_loading import load_allocation_data
+        return load_allocation_data(**self.paths)
+
+
+# Registered datasets by name: 'default' uses the paths from environment variables, config file or defaults
+_datasets = {}
+
+def register_dataset(name, **paths):
+    """Registers (or replaces) a dataset under a name. Returns the Dataset object, which is not loaded yet."""
+    _datasets[name] = Dataset(name, **paths)
+    return _datasets[name]
+
+def get_dataset(name='default'):
+    """Returns a registered dataset; the 'default' one is registered on first use."""
+    if name not in _datasets:
+        if name != 'default':
+            raise KeyError(f"Unknown dataset: {name}")
+        register_dataset(name)
+    return _datasets[name]
@@ -1,11 +1,3 @@
-from src.Data_loading import load_data
-
-# Load data
-hotels_df, guests_df, preferences_df = load_data()
-
-# Sort preferences DataFrame by guest and priority for easier handling 
-preferences_df = preferences_df.sort_values(by=['guest', 'priority'])
-
 # Create a guest object
 def create_guest(guest_id, discount, preferences): 
     """
@@ -36,7 +28,8 @@ def create_guests_dict(guests_df, preferences_df):
     # Initialize an empty dictionary for guests' data
     guests_dict = {} 
 
-    # Group preferences by guest 
+    # Sort preferences DataFrame by guest and priority, then group preferences by guest 
+    preferences_df = preferences_df.sort_values(by=['guest', 'priority'])
     grouped_preferences = preferences_df.groupby('guest')['hotel'].apply(list)
 
     # Iterate over each row in the guests dataframe and build the guest dictionary 
@@ -52,4 +45,9 @@ def create_guests_dict(guests_df, preferences_df):
 
     return guests_dict
 
-guests_dict_original = create_guests_dict(guests_df, preferences_df)
\ No newline at end of file
+def __getattr__(name):
+    # guests_dict_original is built from the default dataset the first time it is accessed (not at import)
+    if name == 'guests_dict_original':
+        from src.Dataset_Registry import get_dataset
+        return get_dataset().guests_dict
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,6 +1,3 @@
-from src.Data_loading import load_data
-hotels_df, guests_df, preferences_df = load_data()
-
 def create_hotels_dict(hotels_df):
     """
     Creates a dictionary of hotels with their available rooms and prices.
@@ -21,5 +18,10 @@ def create_hotels_dict(hotels_df):
         hotels_dict[hotel_id] = hotel_data
     return hotels_dict
 
-hotels_dict_original = create_hotels_dict(hotels_df)
+def __getattr__(name):
+    # hotels_dict_original is built from the default dataset the first time it is accessed (not at import)
+    if name == 'hotels_dict_original':
+        from src.Dataset_Registry import get_dataset
+        return get_dataset().hotels_dict
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
@@ -1,123 +1,348 @@
 import time
 import pandas as pd
-import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor
 from copy import deepcopy
 
+from src.Allocation_Methods.Price_Allocation import price_allocation, price_allocation_columnar, printed_price_allocation_report
+from src.Allocation_Methods.Random_Allocation import random_allocation, random_allocation_columnar, print_random_allocation_report
+from src.Allocation_Methods.Availability_Allocation import availability_allocation, availability_allocation_columnar, printed_availability_allocation_report
+from src.Allocation_Methods.Reservation_Allocation import reservation_allocation, reservation_allocation_columnar, printed_reservation_allocation_report
+from src.Allocation_Methods.Optimal_Allocation import optimal_allocation, optimal_allocation_columnar, printed_optimal_allocation_report
+from src.Allocation_Methods.Random_Monte_Carlo import random_monte_carlo
+from src.Allocation_Methods.Stable_Allocation import stable_allocation, stable_allocation_columnar, printed_stable_allocation_report
+from src.Columnar_Core.Allocation_Data import AllocationData
+from src.Columnar_Core.Allocation_Result import HotelReport
+from src.Columnar_Core.Shared_Data import SharedAllocationData, attach_shared_data
+from src.Data_Visualization.Figure_Service import get_figure_service
+from src.Instrumentation import get_instrumentation
+from src.Scenario_Engine import run_scenarios
 
-from src.Guests_Hotels_Dictionaries.Guests import guests_dict_original
-from src.Guests_Hotels_Dictionaries.Hotels import hotels_dict_original
-from src.Allocation_Methods.Price_Allocation import price_allocation, printed_price_allocation_report
-from src.Allocation_Methods.Random_Allocation import random_allocation, print_random_allocation_report
-from src.Allocation_Methods.Availability_Allocation import availability_allocation, printed_availability_allocation_report
-from src.Allocation_Methods.Reservation_Allocation import reservation_allocation, printed_reservation_allocation_report
+# Columnar version of each method, by name (used by the worker processes of the parallel Run All)
+COLUMNAR_METHODS = {
+    "Random": random_allocation_columnar,
+    "Reservation": reservation_allocation_columnar,
+    "Price": price_allocation_columnar,
+    "Availability": availability_allocation_columnar,
+    "Optimal": optimal_allocation_columnar,
+    "Stable": stable_allocation_columnar
+}
+
+# Column names of the report DataFrames shown to the user
+REPORT_DF_COLUMNS = {
+    'hotel': 'Hotel',
+    'rooms_occupied': 'Rooms Occupied',
+    'rooms_available': 'Rooms Available',
+    'number_of_guests_accommodated': 'Number of Guests Accommodated',
+    'revenue': 'Revenue ($)',
+    'guests': 'Guests'
+}
+
+def run_shared_method(spec, method_name, seed=None, instrument=False, trace_memory=False):
+    """
+    Worker of the parallel Run All: runs the columnar version of a method on a dataset published in shared memory.
+    Returns the result, the execution time (measured in the worker, as self.times is in a sequential run)
+    and, with instrument, the instrumentation records of the run (None otherwise).
+    """
+    instrumentation = get_instrumentation()
+    instrumentation.reset() # a forked worker starts with a copy of the parent's records
+    if instrument:
+        instrumentation.enable(trace_memory)
+    else:
+        instrumentation.disable()
+    data = attach_shared_data(spec)
+    kwargs = {'seed': seed} if method_name == 'Random' else {}
+    with instrumentation.method(method_name):
+        start_time = time.time()
+        result = COLUMNAR_METHODS[method_name](data, **kwargs)
+        elapsed_time = time.time() - start_time
+    return result, elapsed_time, instrumentation.to_dict() if instrument else None
 
 # Hotel Manager class
 class HotelManager:
-    def __init__(self, guests_dict_original, hotels_dict_original):
+    def __init__(self, guests_dict_original, hotels_dict_original, data=None, seed=None, cache=None, instrumentation=None):
         self.guests_dict = guests_dict_original # copy the dictionaries, so that I do not modify the original ones
-        self.hotels_dict = deepcopy(hotels_dict_original)
+        self.hotels_dict_original = hotels_dict_original
+        self.hotels_dict = deepcopy(hotels_dict_original) if hotels_dict_original is not None else None
+        self.data = data # columnar dataset (AllocationData): when given, the columnar version of each method is used
+        self.seed = seed # seed of the random allocation (None: a different draw at every run)
+        self.cache = cache # ResultCache: results on columnar data are reused, keyed by dataset fingerprint, method and seed
+        self.instrumentation = instrumentation or get_instrumentation() # per-phase timings, off unless enabled
         self.results = {} # store all allocations results by method
         self.times = {}
         self.statistics = {}
+    
+    @classmethod
+    def from_data(cls, data, seed=None, cache=None, instrumentation=None):
+        """Creates a manager that runs every method on the columnar data model (no dictionaries needed)."""
+        return cls(None, None, data=data, seed=seed, cache=cache, instrumentation=instrumentation)
         
     def reset_hotels(self):
-        self.hotels_dict = deepcopy(hotels_dict_original)
+        if self.data is None: # the columnar methods never modify their input
+            with self.instrumentation.phase('copying'):
+                self.hotels_dict = deepcopy(self.hotels_dict_original)
+    
+    def cache_key(self, method_name):
+        """
+        Key of a result in self.cache: dataset fingerprint, method and seed.
+        None when the result cannot be cached (no cache, dictionary mode, or unseeded random allocation).
+        """
+        if self.cache is None or self.data is None or (method_name == 'Random' and self.seed is None):
+            return None
+        return (self.data.fingerprint, method_name, self.seed)
+    
+    def allocate(self, method_name, method, columnar_method):
+        """
+        Runs an allocation method on the dictionaries, or its columnar version on self.data if available,
+        and stores its execution time in self.times.
+        With a cache, a result already computed on the same data (and seed, for the random method) is reused,
+        together with the time its computation took. An unseeded random allocation is never cached.
+        With instrumentation enabled, the phases of the run are recorded under the method name.
+        """
+        kwargs = {'seed': self.seed} if method_name == 'Random' else {}
+        computed = []
+        
+        def compute():
+            computed.append(True)
+            start_time = time.time()
+            if self.data is not None:
+                result = columnar_method(self.data, **kwargs)
+            else:
+                result = method(self.guests_dict, self.hotels_dict, **kwargs)
+            return result, time.time() - start_time
+        
+        with self.instrumentation.method(method_name):
+            key = self.cache_key(method_name)
+            if key is not None:
+                result, elapsed_time = self.cache.get_or_compute(key, compute)
+            else:
+                result, elapsed_time = compute()
+        self.times[method_name] = elapsed_time
+        self.count_run(method_name, result, cached=not computed)
+        return result
+    
+    def count_run(self, method_name, result, cached=False):
+        """Instrumentation counters of a method run: runs, cache hits, guests and assigned guests."""
+        if not self.instrumentation.enabled:
+            return
+        num_guests = self.data.num_guests if self.data is not None else len(self.guests_dict)
+        self.instrumentation.count('runs', method=method_name)
+        self.instrumentation.count('cache_hits', int(cached), method=method_name)
+        self.instrumentation.count('guests', num_guests, method=method_name)
+        self.instrumentation.count('assigned_guests', result['statistics']['assigned_guests_count'], method=method_name)
     
     def run_random_allocation(self):
-        result = random_allocation(self.guests_dict, self.hotels_dict)
+        result = self.allocate('Random', random_allocation, random_allocation_columnar)
         self.statistics['Random'] = result['statistics']  
         self.results['Random'] = result
         # Process the allocation report into a DataFrame
-        random_allocation_report_df = self.create_allocation_report_df(result.get('allocation_report', {}))
+        random_allocation_report_df = self.create_allocation_report_df(result.get('allocation_report', {}), 'Random')
         
         return {
             'allocation_report': random_allocation_report_df,
-            'statistics': result['statistics'],
-            'plots': result.get('plots', [])
+            'statistics': result['statistics']
         }
 
+    def run_random_monte_carlo(self, draws=1000, max_workers=None):
+        """
+        Monte Carlo mode of the random allocation: the distribution of every statistic over draws seeded random
+        allocations (see Random_Monte_Carlo.py). Draws are derived from self.seed, so a seeded manager always
+        returns the same distribution, and it is cached like the single results.
+        Returns the summary: statistic -> mean, std, percentiles and confidence interval of the mean.
+        """
+        data = self.data if self.data is not None else AllocationData.from_dicts(self.guests_dict, self.hotels_dict_original)
+        key = self.cache_key('Random')
+        key = (data.fingerprint, 'Random Monte Carlo', self.seed, draws) if key is not None else None
+        compute = lambda: random_monte_carlo(data, draws, self.seed, max_workers=max_workers)
+        result = self.cache.get_or_compute(key, compute) if key is not None else compute()
+        self.results['Random Monte Carlo'] = result
+        return result['summary']
+
+    def run_scenarios(self, scenarios, methods=None, max_workers=None):
+        """
+        What-if scenarios (price, capacity and discount changes) evaluated in one batch, instead of editing
+        hotels_dict_original and re-running run_all_methods for each one (see Scenario_Engine.py).
+        Returns the tidy table of statistics: one row per scenario and method, the unchanged dataset as 'baseline'.
+        """
+        data = self.data if self.data is not None else AllocationData.from_dicts(self.guests_dict, self.hotels_dict_original)
+        table = run_scenarios(data, scenarios, methods, self.seed, max_workers)
+        self.results['Scenarios'] = table
+        return table
+
     def run_reservation_allocation(self):
-        result = reservation_allocation(self.guests_dict, self.hotels_dict)
+        result = self.allocate('Reservation', reservation_allocation, reservation_allocation_columnar)
         self.statistics['Reservation'] = result['statistics']  
         self.results['Reservation'] = result    
-        reservation_allocation_report_df = self.create_allocation_report_df(result.get('allocation_report', {}))
+        reservation_allocation_report_df = self.create_allocation_report_df(result.get('allocation_report', {}), 'Reservation')
         return {
             'allocation_report': reservation_allocation_report_df,
-            'statistics': result['statistics'],
-            'plots': result.get('plots', [])
+            'statistics': result['statistics']
         }
     
     def run_price_allocation(self):
-        result = price_allocation(self.guests_dict, self.hotels_dict)
+        result = self.allocate('Price', price_allocation, price_allocation_columnar)
         self.statistics['Price'] = result['statistics'] 
         self.results['Price'] = result
-        price_allocation_report_df = self.create_allocation_report_df(result.get('allocation_report', {}))
+        price_allocation_report_df = self.create_allocation_report_df(result.get('allocation_report', {}), 'Price')
         return {
             'allocation_report': price_allocation_report_df,
-            'statistics': result['statistics'],
-            'plots': result.get('plots', [])
+            'statistics': result['statistics']
         }
     
     def run_availability_allocation(self):
-        result = availability_allocation(self.guests_dict, self.hotels_dict)
+        result = self.allocate('Availability', availability_allocation, availability_allocation_columnar)
         self.statistics['Availability'] = result['statistics'] 
         self.results['Availability'] = result
-        availability_allocation_report_df = self.create_allocation_report_df(result.get('allocation_report', {}))
+        availability_allocation_report_df = self.create_allocation_report_df(result.get('allocation_report', {}), 'Availability')
         return {
             'allocation_report': availability_allocation_report_df,
-            'statistics': result['statistics'],
-            'plots': result.get('plots', [])
+            'statistics': result['statistics']
         }
     
-    def create_allocation_report_df(self, allocation_report):
+    def run_optimal_allocation(self):
+        result = self.allocate('Optimal', optimal_allocation, optimal_allocation_columnar)
+        self.statistics['Optimal'] = result['statistics']
+        self.results['Optimal'] = result
+        optimal_allocation_report_df = self.create_allocation_report_df(result.get('allocation_report', {}), 'Optimal')
+        return {
+            'allocation_report': optimal_allocation_report_df,
+            'statistics': result['statistics']
+        }
+    
+    def run_stable_allocation(self):
+        result = self.allocate('Stable', stable_allocation, stable_allocation_columnar)
+        self.statistics['Stable'] = result['statistics']
+        self.results['Stable'] = result
+        stable_allocation_report_df = self.create_allocation_report_df(result.get('allocation_report', {}), 'Stable')
+        return {
+            'allocation_report': stable_allocation_report_df,
+            'statistics': result['statistics']
+        }
+    
+    def plot(self, method_name):
+        """
+        Figures of the last result of a method, as PNG bytes (drawn on request and cached by the figure service).
+        Running the allocations never draws anything.
+        """
+        with self.instrumentation.phase('plotting', method_name):
+            hotels_dict = self.hotels_dict_original if self.data is None else self.data.hotels_dict()
+            return get_figure_service().figures(method_name, self.results[method_name], hotels_dict)
+    
+    def create_allocation_report_df(self, allocation_report, method_name=None):
         """
         This helper method processes the allocation report and returns a DataFrame
         with the necessary hotel data (rooms, revenue, guests, etc.)
+        Numeric columns stay numeric (the revenue is a float, formatted when displayed) and the guests of each
+        hotel are a list (an Arrow list column for the columnar reports of the allocation methods, when pyarrow
+        is installed: they are converted column by column, see HotelReport.to_frame).
+        The method name is only used to record the time it takes ('report building' phase of that method).
         """
-        rows = []
-        for hotel, data in allocation_report.items():
-            row = {
-                'Hotel': hotel,
-                'Rooms Occupied': data.get('rooms_occupied', 0),
-                'Rooms Available': data.get('rooms_available', 0),
-                'Number of Guests Accommodated': data.get('number_of_guests_accommodated', 0),
-                'Revenue ($)': f"${data.get('revenue', 0):,.2f}",
-                'Guests': ', '.join(data.get('guests', []))  # Join guest list into a single string
-            }
-            rows.append(row)
-        return pd.DataFrame(rows) # Standardize every report into a structured dataframe
+        with self.instrumentation.phase('report building', method_name):
+            if isinstance(allocation_report, HotelReport):
+                report_df = allocation_report.to_frame()
+            else: # report dictionary (hotel_id -> details)
+                details = list(allocation_report.values())
+                report_df = pd.DataFrame({
+                    'hotel': list(allocation_report.keys()),
+                    'rooms_occupied': [data.get('rooms_occupied', 0) for data in details],
+                    'rooms_available': [data.get('rooms_available', 0) for data in details],
+                    'number_of_guests_accommodated': [data.get('number_of_guests_accommodated', 0) for data in details],
+                    'revenue': pd.Series([data.get('revenue', 0) for data in details], dtype=float),
+                    'guests': [data.get('guests', []) for data in details]
+                })
+            return report_df.rename(columns=REPORT_DF_COLUMNS) # Standardize every report into a structured dataframe
             
-    def run_allocations(self, method_name, method, report_function):
+    def run_allocations(self, method_name, method, report_function, columnar_method=None):
         """Helper method: it runs a singel function and stores the results in the HotelManager instance (self.results, self.times, self.statistics).
         Parameters are the name of the allocation to execute, the allocation function and a function that formats the allocation results 
-        (such as print_random_allocation_report).
+        (such as print_random_allocation_report), and optionally the columnar version of the allocation function (used when self.data is set).
         It is a generic function for all the individual methods."""
-        start_time = time.time()
-        result = method(self.guests_dict, self.hotels_dict)
-        elapsed_time = time.time() - start_time
+        result = self.allocate(method_name, method, columnar_method) # also stores the execution time
         
         self.results[method_name] = result
-        self.times[method_name] = elapsed_time
         self.statistics[method_name] = result['statistics']
         
         report = report_function(result)
         return {
                 'allocation_report': report,
-                'statistics': result['statistics'],
-                'plots': result.get('plots', []) # empty list if no plots exist
+                'statistics': result['statistics']
         }
 
-    def run_all_methods(self): # no input (uses all four methods)
+    def run_all_methods(self, parallel=False, max_workers=None, verbose=False): # no input (uses all methods)
         """runs all allocation methods in sequence and display their results (for each method). 
-        It relies on run_allocations to handle each method's execution."""
+        It relies on run_allocations to handle each method's execution.
+        With parallel=True, the methods run at the same time on a process pool instead (see run_all_parallel).
+        Only the statistics and execution time of each method are printed; verbose=True also prints the whole
+        allocation report (megabytes of output on large datasets)."""
         methods = {
-            "Random": (random_allocation, print_random_allocation_report),
-            "Reservation": (reservation_allocation, printed_reservation_allocation_report),
-            "Price": (price_allocation, printed_price_allocation_report),
-            "Availability": (availability_allocation, printed_availability_allocation_report)
+            "Random": (random_allocation, print_random_allocation_report, random_allocation_columnar),
+            "Reservation": (reservation_allocation, printed_reservation_allocation_report, reservation_allocation_columnar),
+            "Price": (price_allocation, printed_price_allocation_report, price_allocation_columnar),
+            "Availability": (availability_allocation, printed_availability_allocation_report, availability_allocation_columnar),
+            "Optimal": (optimal_allocation, printed_optimal_allocation_report, optimal_allocation_columnar),
+            "Stable": (stable_allocation, printed_stable_allocation_report, stable_allocation_columnar)
         }
+        if parallel:
+            self.run_all_parallel(methods, max_workers, verbose)
+            return
+        
         # calls run_allocation function for every method
-        for method_name, (method, report_function) in methods.items(): # iterates over the dictionary running each method with run_allocations
-            print(f"\nRunning {method_name} Allocation...")
+        for method_name, (method, report_function, columnar_method) in methods.items(): # iterates over the dictionary running each method with run_allocations
             self.reset_hotels() # after each allocation resets hotels data to ensure independence
-            print(self.run_allocations(method_name, method, report_function))
+            output = self.run_allocations(method_name, method, report_function, columnar_method)
+            self.print_method_result(method_name, output, verbose)
+
+    def print_method_result(self, method_name, output, verbose=False):
+        """Prints the statistics and execution time of a method (and its whole output, with verbose)."""
+        with self.instrumentation.phase('printing', method_name):
+            print(f"{method_name:<12} {self.times[method_name]:9.3f} s  {output['statistics']}")
+            if verbose:
+                print(output)
+
+    def run_all_parallel(self, methods, max_workers=None, verbose=False):
+        """
+        Runs the methods at the same time, one per worker process, and stores their results, execution times
+        and statistics as run_allocations does. The methods are independent, so Run All takes about as long as
+        the slowest one.
+        The columnar versions of the methods are used (on self.data, or on the columnar form of the dictionaries):
+        the dataset is published once in shared memory, and the workers map it instead of receiving a copy.
+        Results already in self.cache are not recomputed.
+        
+        Parameters:
+        methods (dict): method name -> (method, report function, columnar method), as in run_all_methods.
+        max_workers (int, optional): size of the process pool (default: one worker per method to compute).
+        verbose (bool): also print the allocation report of each method (see run_all_methods).
+        """
+        data = self.data if self.data is not None else AllocationData.from_dicts(self.guests_dict, self.hotels_dict_original)
+        outcomes = {} # method name -> (result, execution time)
+        for method_name in methods:
+            key = self.cache_key(method_name)
+            cached = self.cache.get(key) if key is not None else None
+            if cached is not None:
+                outcomes[method_name] = cached
+        pending = [method_name for method_name in methods if method_name not in outcomes]
+        
+        if pending:
+            instrument, trace_memory = self.instrumentation.enabled, self.instrumentation.trace_memory
+            with SharedAllocationData(data) as shared, ProcessPoolExecutor(max_workers or len(pending)) as pool:
+                futures = {method_name: pool.submit(run_shared_method, shared.spec, method_name, self.seed,
+                                                    instrument, trace_memory)
+                           for method_name in pending}
+                for method_name, future in futures.items():
+                    result, elapsed_time, records = future.result()
+                    outcomes[method_name] = (result, elapsed_time)
+                    if records is not None:
+                        self.instrumentation.merge(records) # phases recorded in the worker
+                    key = self.cache_key(method_name)
+                    if key is not None:
+                        self.cache.put(key, outcomes[method_name])
+        
+        for method_name, (method, report_function, columnar_method) in methods.items():
+            result, elapsed_time = outcomes[method_name]
+            self.results[method_name] = result
+            self.times[method_name] = elapsed_time
+            self.statistics[method_name] = result['statistics']
+            self.count_run(method_name, result, cached=method_name not in pending)
+            self.print_method_result(method_name, {
+                'allocation_report': report_function(result),
+                'statistics': result['statistics']
+            }, verbose)
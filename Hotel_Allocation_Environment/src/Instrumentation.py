@@ -0,0 +1,208 @@
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import nullcontext
+from contextvars import ContextVar
+
+"""
+Opt-in instrumentation of the hot paths: time (and optionally peak traced memory) of each phase of each allocation
+method, plus counters (runs, guests, assigned guests, cache hits, ...).
+The code marks its phases with `with phase('sorting'):` and HotelManager marks the method being run ('total' phase);
+the phases used are listed in PHASES, and they are never nested in one another.
+Disabled (the default), phase() returns one shared no-op context manager, so an instrumented block costs a function
+call and nothing is recorded.
+One instrumentation is shared by the whole process (get_instrumentation). Records can be exported as JSON or
+as a DataFrame (the breakdown panel of the Streamlit app).
+"""
+
+PHASES = ('loading', 'copying', 'partitioning', 'sorting', 'allocation loop', 'fallback', 'report building', 'statistics',
+          'plotting', 'printing')
+TOTAL = 'total' # phase recorded around a whole method run
+
+_NO_PHASE = nullcontext()
+_current_method = ContextVar('instrumented_method', default=None)
+
+
+class _Phase:
+    """Context manager that records one execution of a phase."""
+
+    def __init__(self, instrumentation, name, method):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.method = method
+        self.peak = 0
+
+    def __enter__(self):
+        stack = self.instrumentation._stack()
+        if self.instrumentation.trace_memory and tracemalloc.is_tracing():
+            # The peak of the enclosing phase so far is kept before the counter is reset for this one
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        stack = self.instrumentation._stack()
+        stack.pop()
+        peak = None
+        if self.instrumentation.trace_memory and tracemalloc.is_tracing():
+            peak = self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, peak)
+        self.instrumentation.record(self.method, self.name, elapsed, peak)
+        return False
+
+
+class Instrumentation:
+    def __init__(self, enabled=False, trace_memory=False):
+        """
+        Parameters:
+        enabled (bool): record phases and counters.
+        trace_memory (bool): also record the peak traced memory of each phase (tracemalloc, which slows down
+        every allocation of Python objects: timings are higher while it is on).
+        """
+        self.enabled = False
+        self.trace_memory = False
+        self._started_tracing = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+        if enabled:
+            self.enable(trace_memory)
+
+    def enable(self, trace_memory=False):
+        self.enabled = True
+        self.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def disable(self):
+        self.enabled = False
+        self.trace_memory = False
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def reset(self):
+        """Drops the records."""
+        with self._lock:
+            self.phases = {} # (method, phase) -> {'calls', 'seconds', 'max_seconds', 'peak_memory_mb'}
+            self.counters = {} # method -> {counter name -> value}
+
+    def _stack(self):
+        """Phases open in the current thread (innermost last)."""
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def phase(self, name, method=None):
+        """Context manager that records a phase of the current method (or of the given one)."""
+        if not self.enabled:
+            return _NO_PHASE
+        return _Phase(self, name, method or _current_method.get())
+
+    def method(self, method_name):
+        """Context manager around a method run: the phases inside are recorded for this method, plus its total."""
+        if not self.enabled:
+            return _NO_PHASE
+        return _MethodScope(self, method_name)
+
+    def count(self, name, value=1, method=None):
+        """Adds value to a counter of the current method (or of the given one)."""
+        if not self.enabled:
+            return
+        method = method or _current_method.get()
+        with self._lock:
+            counters = self.counters.setdefault(method, {})
+            counters[name] = counters.get(name, 0) + value
+
+    def record(self, method, name, seconds, peak_memory=None):
+        """Adds one execution of a phase (also used to merge the records of worker processes)."""
+        with self._lock:
+            entry = self.phases.setdefault((method, name), {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0,
+                                                            'peak_memory_mb': None})
+            entry['calls'] += 1
+            entry['seconds'] += seconds
+            entry['max_seconds'] = max(entry['max_seconds'], seconds)
+            if peak_memory is not None:
+                entry['peak_memory_mb'] = max(entry['peak_memory_mb'] or 0.0, peak_memory / 2**20)
+
+    def merge(self, records):
+        """Adds the records of another instrumentation, as returned by to_dict (e.g. from a worker process)."""
+        with self._lock:
+            for row in records['phases']:
+                entry = self.phases.setdefault((row['method'], row['phase']), {'calls': 0, 'seconds': 0.0,
+                                                                               'max_seconds': 0.0, 'peak_memory_mb': None})
+                entry['calls'] += row['calls']
+                entry['seconds'] += row['seconds']
+                entry['max_seconds'] = max(entry['max_seconds'], row['max_seconds'])
+                if row['peak_memory_mb'] is not None:
+                    entry['peak_memory_mb'] = max(entry['peak_memory_mb'] or 0.0, row['peak_memory_mb'])
+            for method, counters in records['counters'].items():
+                method = None if method == 'null' else method
+                merged = self.counters.setdefault(method, {})
+                for name, value in counters.items():
+                    merged[name] = merged.get(name, 0) + value
+
+    def to_dict(self):
+        """Records as plain data: {'phases': [one dict per (method, phase)], 'counters': {method: {name: value}}}."""
+        with self._lock:
+            phases = [{'method': method, 'phase': name, **entry} for (method, name), entry in self.phases.items()]
+            counters = {('null' if method is None else method): dict(values) for method, values in self.counters.items()}
+        return {'trace_memory': self.trace_memory, 'phases': phases, 'counters': counters}
+
+    def to_json(self, path=None):
+        """Records as a JSON string, also written to path if given."""
+        text = json.dumps(self.to_dict(), indent=2)
+        if path is not None:
+            with open(path, 'w') as json_file:
+                json_file.write(text)
+        return text
+
+    def to_frame(self):
+        """
+        Breakdown table: one row per (method, phase), with its calls, total and maximum time, peak traced memory
+        and share of the time recorded in the phases of the method (phases do not overlap, apart from 'total').
+        """
+        import pandas as pd
+        frame = pd.DataFrame(self.to_dict()['phases'],
+                             columns=['method', 'phase', 'calls', 'seconds', 'max_seconds', 'peak_memory_mb'])
+        frame['method'] = frame['method'].fillna('-')
+        phases = frame['phase'] != TOTAL
+        phase_seconds = frame['method'].map(frame[phases].groupby('method')['seconds'].sum())
+        frame['share'] = (frame['seconds'] / phase_seconds).where(phases)
+        order = {name: position for position, name in enumerate((TOTAL,) + PHASES)}
+        frame['_order'] = frame['phase'].map(order).fillna(len(order))
+        return frame.sort_values(['method', '_order']).drop(columns='_order').reset_index(drop=True)
+
+
+class _MethodScope(_Phase):
+    """Total phase of a method run, which also sets the method of the phases inside it."""
+
+    def __init__(self, instrumentation, method_name):
+        super().__init__(instrumentation, TOTAL, method_name)
+
+    def __enter__(self):
+        self.token = _current_method.set(self.method)
+        return super().__enter__()
+
+    def __exit__(self, *exc_info):
+        super().__exit__(*exc_info)
+        _current_method.reset(self.token)
+        return False
+
+
+_default_instrumentation = Instrumentation()
+
+def get_instrumentation():
+    """Instrumentation shared by the whole process (disabled until enabled)."""
+    return _default_instrumentation
+
+def phase(name):
+    """Marks a phase of the current method: `with phase('sorting'): ...` (no-op while instrumentation is disabled)."""
+    return _default_instrumentation.phase(name)
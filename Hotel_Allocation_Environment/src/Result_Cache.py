@@ -0,0 +1,69 @@
+import threading
+from collections import OrderedDict
+
+"""
+Bounded cache of computed objects (allocation results, indexes), with least-recently-used eviction.
+Keys are built by the callers, e.g. (dataset fingerprint, method name, seed) for allocation results:
+the same method on the same data with the same seed is only computed once, and revisiting it is instant.
+One cache is shared by the whole process (get_result_cache), so it survives Streamlit reruns.
+"""
+
+class ResultCache:
+    def __init__(self, max_entries=32):
+        """
+        Parameters:
+        max_entries (int): number of entries kept; the least recently used one is dropped beyond that.
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock() # Streamlit serves sessions from several threads
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        """Returns the cached value of key, or computes it with compute() and caches it."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_default_cache = None
+
+def get_result_cache():
+    """Cache shared by the whole process."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResultCache()
+    return _default_cache
@@ -0,0 +1,240 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from src.Batch_Runner import METHODS, columnar_methods, parse_methods
+from src.Columnar_Core.Allocation_Data import AllocationData
+
+"""
+What-if scenario engine: evaluates a batch of price, capacity and discount changes with the allocation methods,
+without editing hotels_dict_original and re-running HotelManager.run_all_methods for each scenario.
+A scenario is a name and a list of changes, each one a dictionary:
+    {'field': 'price' | 'rooms' | 'discount', 'ids': [hotel or guest IDs] (None: all of them),
+     'operation': 'set' | 'add' | 'scale', 'value': number}
+e.g. {'name': 'hotel_1 -10%', 'changes': [{'field': 'price', 'ids': ['hotel_1'], 'operation': 'scale', 'value': 0.9}]}.
+Rooms are rounded to whole rooms and never go below 0.
+
+Scenarios only differ from the base dataset by a few arrays, so:
+- the IDs of the changes are encoded once, in the main process;
+- a scenario dataset is the base AllocationData with only the changed arrays copied (price, rooms or discount):
+  the IDs, preference lists and reservation order are the base arrays themselves;
+- the indexes that do not depend on the changed arrays are built once and shared by all the scenarios: the
+  preference rank lookup (satisfaction scores), and the preferences re-ordered by price rank (price method,
+  reused by the scenarios that keep the base prices) and by room rank (availability method, reused by the scenarios
+  that keep the base rooms);
+- with several CPUs, scenarios are spread over worker processes; the base dataset is published once in shared
+  memory (Shared_Data.py) and each worker builds the shared indexes once.
+Results are a tidy table: one row per scenario and method, with the statistics and the execution time of the method.
+
+Usage (from Hotel_Allocation_Environment):
+    python -m src.Scenario_Engine --scenarios scenarios.json --methods Price,Availability --output scenarios.csv
+"""
+
+CHANGE_FIELDS = {'price': 'hotel', 'rooms': 'hotel', 'discount': 'guest'}
+OPERATIONS = ('set', 'add', 'scale')
+STATISTICS = ('assigned_guests_count', 'average_satisfaction_score', 'occupied_hotels_count', 'average_revenue')
+BASELINE = 'baseline'
+
+
+def resolve_scenarios(data, scenarios):
+    """
+    Interns the IDs of the scenario changes.
+
+    Parameters:
+    data (AllocationData): the base dataset.
+    scenarios (list): scenarios as described above.
+
+    Returns:
+    list: (name, changes) per scenario, each change a (field, codes or None, operation, value) tuple.
+    """
+    dictionaries = {'hotel': data.hotel_dictionary, 'guest': data.guest_dictionary}
+    resolved = []
+    for index, scenario in enumerate(scenarios):
+        name = scenario.get('name', f"scenario_{index + 1}")
+        changes = []
+        for change in scenario.get('changes', []):
+            field, operation = change['field'], change.get('operation', 'set')
+            if field not in CHANGE_FIELDS:
+                raise ValueError(f"{name}: field must be one of {tuple(CHANGE_FIELDS)}, not {field!r}")
+            if operation not in OPERATIONS:
+                raise ValueError(f"{name}: operation must be one of {OPERATIONS}, not {operation!r}")
+            ids = change.get('ids')
+            if ids is None:
+                change_codes = None
+            else:
+                change_codes = dictionaries[CHANGE_FIELDS[field]].encode(np.array(list(ids), dtype=object)).astype(np.int64)
+                if (change_codes < 0).any():
+                    unknown = [item_id for item_id, code in zip(ids, change_codes.tolist()) if code < 0]
+                    raise ValueError(f"{name}: unknown {CHANGE_FIELDS[field]} IDs {unknown[:5]}")
+            changes.append((field, change_codes, operation, float(change['value'])))
+        resolved.append((name, changes))
+    return resolved
+
+
+def apply_changes(data, changes):
+    """
+    Dataset of a scenario: the base dataset with the changes applied (only the changed arrays are copied).
+
+    Parameters:
+    data (AllocationData): the base dataset.
+    changes (list): (field, codes or None, operation, value) tuples, as returned by resolve_scenarios.
+    """
+    arrays = {'price': data.price, 'rooms': data.rooms, 'discount': data.discount}
+    changed = set()
+    for field, codes, operation, value in changes:
+        if field not in changed:
+            arrays[field] = arrays[field].astype(np.float64) # copy (rooms are rounded back below)
+            changed.add(field)
+        selection = slice(None) if codes is None else codes
+        if operation == 'set':
+            arrays[field][selection] = value
+        elif operation == 'add':
+            arrays[field][selection] += value
+        else:
+            arrays[field][selection] *= value
+    if 'rooms' in changed:
+        arrays['rooms'] = np.maximum(np.rint(arrays['rooms']), 0).astype(np.int64)
+
+    scenario = AllocationData(data.guest_dictionary, arrays['discount'], data.hotel_dictionary, arrays['rooms'],
+                              arrays['price'], data.pref_offsets, data.pref_hotels, reservation_order=data.reservation_order)
+    scenario.preference_rank = data.preference_rank # same preference lists: the base lookup (cached_property) is reused
+    return scenario, changed
+
+
+class SharedIndexes:
+    def __init__(self, data):
+        """
+        Indexes of the base dataset shared by all the scenarios (built on first use).
+
+        Parameters:
+        data (AllocationData): the base dataset.
+        """
+        self.data = data
+        self._ranked = {} # method -> (rank, ranked preferences) of the base dataset
+
+    def ranked(self, method):
+        """(rank, ranked preferences) of the base dataset for 'Price' or 'Availability'."""
+        if method not in self._ranked:
+            from src.Columnar_Core.Ranked_Allocation import hotel_rank, ranked_preferences
+            rank = hotel_rank(self.data.price) if method == 'Price' else hotel_rank(self.data.rooms, descending=True)
+            self._ranked[method] = (rank, ranked_preferences(self.data, rank))
+        return self._ranked[method]
+
+    def run(self, scenario, changed, method, seed=None):
+        """Result of a method on a scenario dataset (changed: the fields that differ from the base dataset)."""
+        if method in ('Price', 'Availability'):
+            from src.Allocation_Methods.Availability_Allocation import availability_allocation_result
+            from src.Allocation_Methods.Price_Allocation import price_allocation_result
+            from src.Columnar_Core.Ranked_Allocation import hotel_rank, ranked_allocation
+            key_field = 'price' if method == 'Price' else 'rooms'
+            if key_field in changed:
+                rank = hotel_rank(scenario.price) if method == 'Price' else hotel_rank(scenario.rooms, descending=True)
+                assignment, rooms_left = ranked_allocation(scenario, rank)
+            else:
+                rank, preferences = self.ranked(method)
+                assignment, rooms_left = ranked_allocation(scenario, rank, preferences=preferences)
+            result_function = price_allocation_result if method == 'Price' else availability_allocation_result
+            return result_function(scenario, assignment, rooms_left)
+        kwargs = {'seed': seed} if method == 'Random' else {}
+        return columnar_methods()[method](scenario, **kwargs)
+
+
+def evaluate_scenarios(indexes, scenarios, methods, seed=None):
+    """
+    Runs the methods on resolved scenarios.
+
+    Returns:
+    list: one record (dictionary) per scenario and method.
+    """
+    records = []
+    for name, changes in scenarios:
+        scenario, changed = apply_changes(indexes.data, changes)
+        for method in methods:
+            start_time = time.perf_counter()
+            result = indexes.run(scenario, changed, method, seed)
+            records.append({'scenario': name, 'method': method, **result['statistics'],
+                            'execution_time': time.perf_counter() - start_time})
+    return records
+
+
+# Shared indexes of the datasets attached by this process (a worker builds them once, whatever its number of tasks)
+_indexes = {}
+
+def run_shared_scenarios(spec, scenarios, methods, seed=None):
+    """Worker: runs scenarios on a base dataset published in shared memory (see Shared_Data.py)."""
+    from multiprocessing import util
+    from src.Columnar_Core.Shared_Data import attach_shared_data
+    if spec[0] not in _indexes:
+        if not _indexes:
+            # Dropped when the worker exits, before the shared mappings are closed (lower exit priority)
+            util.Finalize(None, _indexes.clear, exitpriority=1)
+        _indexes[spec[0]] = SharedIndexes(attach_shared_data(spec))
+    return evaluate_scenarios(_indexes[spec[0]], scenarios, methods, seed)
+
+
+def run_scenarios(data, scenarios, methods=None, seed=None, max_workers=None, include_baseline=True):
+    """
+    Evaluates a batch of what-if scenarios (see above).
+
+    Parameters:
+    data (AllocationData): the base dataset.
+    scenarios (list): scenarios as described above.
+    methods (list, optional): method names among METHODS (default: all of them).
+    seed (int, optional): seed of the random method (the same for every scenario).
+    max_workers (int, optional): worker processes (default: one per CPU; 1 runs in this process).
+    include_baseline (bool): also evaluate the base dataset, as the scenario 'baseline'.
+
+    Returns:
+    DataFrame: one row per scenario and method: 'scenario', 'method', the statistics and 'execution_time' (seconds).
+    """
+    import pandas as pd
+    methods = list(METHODS) if methods is None else list(methods)
+    resolved = ([(BASELINE, [])] if include_baseline else []) + resolve_scenarios(data, scenarios)
+    workers = min(max_workers or os.cpu_count() or 1, len(resolved))
+    if workers <= 1:
+        records = evaluate_scenarios(SharedIndexes(data), resolved, methods, seed)
+    else:
+        from src.Columnar_Core.Shared_Data import SharedAllocationData
+        size = -(-len(resolved) // (workers * 4)) # a few chunks per worker, to balance their load
+        chunks = [resolved[start:start + size] for start in range(0, len(resolved), size)]
+        with SharedAllocationData(data) as shared, ProcessPoolExecutor(workers) as pool:
+            parts = list(pool.map(run_shared_scenarios, [shared.spec] * len(chunks), chunks,
+                                  [methods] * len(chunks), [seed] * len(chunks)))
+        records = [record for part in parts for record in part]
+    return pd.DataFrame(records, columns=['scenario', 'method', *STATISTICS, 'execution_time'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluates what-if scenarios with the allocation methods.")
+    parser.add_argument('--scenarios', required=True, help="JSON file with the list of scenarios")
+    parser.add_argument('--methods', type=parse_methods, default=list(METHODS),
+                        help="comma-separated method names, or 'all' (default)")
+    parser.add_argument('--output', required=True, help="results table (.csv or .json)")
+    parser.add_argument('--data-dir', default=None, help="folder of the hotels, guests and preferences files")
+    parser.add_argument('--cache-dir', default=None)
+    parser.add_argument('--seed', type=int, default=None, help="seed of the random method")
+    parser.add_argument('--max-workers', type=int, default=None)
+    parser.add_argument('--no-baseline', action='store_true', help="do not evaluate the unchanged dataset")
+    args = parser.parse_args(argv)
+
+    from src.Data_loading import load_allocation_data
+    with open(args.scenarios) as json_file:
+        scenarios = json.load(json_file)
+    data = load_allocation_data(cache_dir=args.cache_dir, data_dir=args.data_dir)
+    start_time = time.perf_counter()
+    table = run_scenarios(data, scenarios, args.methods, args.seed, args.max_workers, not args.no_baseline)
+    print(f"Evaluated {len(table)} scenario runs in {time.perf_counter() - start_time:.3f} s")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    if args.output.endswith('.json'):
+        table.to_json(args.output, orient='records', indent=2)
+    else:
+        table.to_csv(args.output, index=False)
+    print(f"Written {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+"""
+Shared fixtures: small synthetic datasets, built in memory (no data files are read).
+Prices and room counts are drawn from a few values, so that many hotels tie on them.
+"""
+
+
+def synthetic_dicts(num_guests=2000, num_hotels=60, max_preferences=5, seed=0):
+    """
+    Guests and hotels dictionaries, as built by the Guests_Hotels_Dictionaries modules.
+
+    Returns:
+    tuple: (guests_dict, hotels_dict).
+    """
+    rng = np.random.default_rng(seed)
+    hotels_dict = {
+        f"hotel_{hotel + 1}": {'available_rooms': int(rng.choice([5, 10, 20])), 'price': float(rng.choice([50, 80, 120]))}
+        for hotel in range(num_hotels)
+    }
+    hotel_ids = list(hotels_dict)
+    guests_dict = {}
+    for guest in range(num_guests):
+        preferences = rng.choice(num_hotels, size=int(rng.integers(1, max_preferences + 1)), replace=False)
+        guests_dict[f"guest_{guest + 1}"] = {
+            'discount': float(rng.choice([0, 0.05, 0.1, 0.2])),
+            'preferences': [hotel_ids[hotel] for hotel in preferences.tolist()]
+        }
+    return guests_dict, hotels_dict
+
+
+@pytest.fixture
+def tight_dicts():
+    """More guests than rooms, with tied prices and room counts."""
+    return synthetic_dicts()
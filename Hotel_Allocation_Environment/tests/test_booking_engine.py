@@ -0,0 +1,106 @@
+import asyncio
+import json
+import threading
+
+import numpy as np
+import pytest
+
+from src.Allocation_Methods.Availability_Allocation import availability_allocation_columnar
+from src.Allocation_Methods.Price_Allocation import price_allocation_columnar
+from src.Allocation_Methods.Reservation_Allocation import reservation_allocation_columnar
+from src.Booking_Engine import POLICIES, BookingEngine, serve
+from src.Columnar_Core.Allocation_Data import AllocationData
+from tests.conftest import synthetic_dicts
+
+"""
+Booking engine: batch parity in reservation order, a consistent inventory under concurrent bookings and cancellations,
+and an answer to every server request.
+"""
+
+BATCH_METHODS = {'reservation': reservation_allocation_columnar, 'price': price_allocation_columnar,
+                 'availability': availability_allocation_columnar}
+
+
+@pytest.fixture
+def data(tight_dicts):
+    return AllocationData.from_dicts(*tight_dicts)
+
+
+@pytest.mark.parametrize('policy', POLICIES)
+def test_bookings_in_reservation_order_match_batch_method(data, policy):
+    engine = BookingEngine(data, policy)
+    for guest_id in data.guest_ids[data.reservation_order].tolist():
+        engine.book(guest_id)
+    assignment, _ = engine.snapshot()
+    assert assignment.tolist() == BATCH_METHODS[policy](data)['assignment'].tolist()
+
+
+@pytest.mark.parametrize('policy', POLICIES)
+def test_concurrent_book_and_cancel_keep_inventory(data, policy):
+    engine = BookingEngine(data, policy, num_shards=4) # few shards: threads contend for the same locks
+    guest_ids = data.guest_ids.tolist()
+    barrier = threading.Barrier(8)
+
+    def client(seed):
+        rng = np.random.default_rng(seed)
+        barrier.wait()
+        for _ in range(1500):
+            guest_id = guest_ids[int(rng.integers(len(guest_ids)))]
+            if rng.random() < 0.7:
+                engine.book(guest_id)
+            else:
+                engine.cancel(guest_id)
+
+    threads = [threading.Thread(target=client, args=(seed,)) for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assignment, rooms_left = engine.snapshot()
+    booked = np.bincount(assignment[assignment >= 0], minlength=data.num_hotels)
+    assert (rooms_left >= 0).all()
+    assert (rooms_left + booked).tolist() == data.rooms.tolist()
+
+
+def test_num_shards_must_be_positive(data):
+    with pytest.raises(ValueError):
+        BookingEngine(data, num_shards=0)
+
+
+def test_server_answers_invalid_requests(data):
+    async def exchange(lines):
+        server = await serve(BookingEngine(data))
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.sockets[0].getsockname()[1])
+        responses = []
+        for line in lines:
+            writer.write(line + b"\n")
+            await writer.drain()
+            responses.append(json.loads(await asyncio.wait_for(reader.readline(), 5)))
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return responses
+
+    guest_id = data.guest_ids[data.reservation_order[0]]
+    responses = asyncio.run(exchange([b"5", b"[]", b"not json", b'{"guest": []}', b'{"op": "move", "guest": "x"}',
+                                      json.dumps({'op': 'book', 'guest': guest_id}).encode()]))
+    assert all('error' in response for response in responses[:-1])
+    assert responses[-1]['guest'] == guest_id and responses[-1]['hotel'] is not None
+
+
+def test_async_booking_does_not_block_the_event_loop(data):
+    engine = BookingEngine(data, num_shards=1)
+    guest_id = data.guest_ids[data.reservation_order[0]]
+
+    async def book_while_locked():
+        lock = engine._guest_locks[0]
+        lock.acquire() # held by this thread: the booking, in a worker thread, waits for it
+        booking = asyncio.create_task(engine.book_async(guest_id))
+        await asyncio.sleep(0.05) # the loop keeps running meanwhile
+        assert not booking.done()
+        lock.release()
+        return await asyncio.wait_for(booking, 5)
+
+    assert asyncio.run(book_while_locked()) is not None
+    assert asyncio.run(engine.cancel_async(guest_id)) is not None
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from src.Allocation_Methods.Availability_Allocation import availability_allocation, availability_allocation_columnar
+from src.Allocation_Methods.Optimal_Allocation import optimal_allocation, optimal_allocation_columnar
+from src.Allocation_Methods.Price_Allocation import price_allocation, price_allocation_columnar
+from src.Allocation_Methods.Reservation_Allocation import reservation_allocation, reservation_allocation_columnar
+from src.Allocation_Methods.Stable_Allocation import stable_allocation, stable_allocation_columnar
+from src.Columnar_Core.Allocation_Data import AllocationData
+
+"""
+Parity between the dictionary-based methods and their columnar versions (used by the app, the result cache,
+the batch runner and the scenario engine): same allocation, report and statistics.
+"""
+
+METHODS = [
+    (reservation_allocation, reservation_allocation_columnar),
+    (price_allocation, price_allocation_columnar),
+    (availability_allocation, availability_allocation_columnar),
+    (stable_allocation, stable_allocation_columnar),
+    (optimal_allocation, optimal_allocation_columnar),
+]
+
+
+def hotels_of(allocation):
+    """guest_id -> hotel_id of an allocation dictionary (some methods also give the price paid and the discount)."""
+    return {guest_id: value['hotel'] if isinstance(value, dict) else value for guest_id, value in allocation.items()}
+
+
+def allocation_of(data, result):
+    """guest_id -> hotel_id of a columnar result."""
+    assigned = np.flatnonzero(result['assignment'] >= 0)
+    return dict(zip(data.guest_dictionary.decode(assigned).tolist(),
+                    data.hotel_dictionary.decode(result['assignment'][assigned]).tolist()))
+
+
+@pytest.mark.parametrize('dict_method, columnar_method', METHODS, ids=lambda method: method.__name__)
+def test_columnar_matches_dict_method(tight_dicts, dict_method, columnar_method):
+    if dict_method is optimal_allocation:
+        pytest.importorskip('scipy')
+    guests_dict, hotels_dict = tight_dicts
+    expected = dict_method(guests_dict, hotels_dict)
+    data = AllocationData.from_dicts(guests_dict, hotels_dict)
+    result = columnar_method(data)
+
+    assert result['statistics'] == expected['statistics']
+    assert allocation_of(data, result) == hotels_of(expected['allocation'])
+    assert dict(result['allocation_report'].items()) == dict(expected['allocation_report'].items())
+
+
+@pytest.mark.parametrize('dict_method, columnar_method', METHODS[1:3], ids=lambda method: method.__name__)
+def test_ranked_methods_break_ties_in_dataset_order(dict_method, columnar_method):
+    # Every hotel has the same price and rooms: hotels are offered in dataset order, not in a sort-dependent order
+    hotels_dict = {f"hotel_{hotel}": {'available_rooms': 1, 'price': 100.0} for hotel in range(1, 21)}
+    guests_dict = {f"guest_{guest}": {'discount': 0.0, 'preferences': ['hotel_999']} for guest in range(1, 21)}
+    expected = dict_method(guests_dict, hotels_dict)
+    data = AllocationData.from_dicts(guests_dict, hotels_dict)
+    result = columnar_method(data)
+
+    assert allocation_of(data, result) == hotels_of(expected['allocation'])
+    first_guest = sorted(guests_dict)[0]
+    assert hotels_of(expected['allocation'])[first_guest] == 'hotel_1'
@@ -0,0 +1,43 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.Data_loading import load_npz, read_cached, save_npz
+
+"""
+Binary cache of the parsed datasets: missing text values survive the round trip, and files with the same name in
+different folders keep their own cache.
+"""
+
+
+def test_npz_round_trip_keeps_missing_values(tmp_path):
+    df = pd.DataFrame({'guest': ['guest_1', None, 'guest_3'], 'hotel': [np.nan, 'hotel_2', 'hotel_3'],
+                       'discount': [0.1, 0.0, 0.2]})
+    path = str(tmp_path / "table.npz")
+    save_npz(df, path)
+    loaded = load_npz(path)
+
+    assert loaded['guest'].isna().tolist() == [False, True, False]
+    assert loaded['hotel'].isna().tolist() == [True, False, False]
+    assert loaded['guest'].dropna().tolist() == ['guest_1', 'guest_3']
+    assert loaded['discount'].tolist() == [0.1, 0.0, 0.2]
+
+
+def test_same_file_names_in_different_folders_keep_their_cache(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    paths = []
+    for folder, hotels in (('a', ['hotel_1', 'hotel_2']), ('b', ['hotel_3'])):
+        os.makedirs(tmp_path / folder)
+        paths.append(str(tmp_path / folder / "hotels.csv"))
+        pd.DataFrame({'hotel': hotels, 'rooms': range(len(hotels))}).to_csv(paths[-1], index=False)
+
+    for path in paths:
+        read_cached(path, cache_dir)
+    caches = sorted(name for name in os.listdir(cache_dir) if name.endswith('.npz'))
+    assert len(caches) == 2
+
+    # Both caches are still used: reading again parses nothing and writes nothing
+    assert read_cached(paths[0], cache_dir)['hotel'].tolist() == ['hotel_1', 'hotel_2']
+    assert read_cached(paths[1], cache_dir)['hotel'].tolist() == ['hotel_3']
+    assert sorted(name for name in os.listdir(cache_dir) if name.endswith('.npz')) == caches
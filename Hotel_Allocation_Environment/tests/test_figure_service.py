@@ -0,0 +1,35 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.Data_Visualization import Figure_Service
+from src.Data_Visualization.Figure_Service import FigureService
+
+"""
+Figure cache: keys hold the render version, and the PNG folder is bounded.
+"""
+
+pytest.importorskip('matplotlib')
+
+
+def satisfaction_result(seed):
+    scores = np.random.default_rng(seed).random(100)
+    return {'allocation_report': {}, 'guest_satisfaction': scores, 'assignment': np.zeros(100, dtype=np.int32)}
+
+
+def test_older_render_versions_are_not_served(tmp_path, monkeypatch):
+    service = FigureService(cache_dir=str(tmp_path))
+    service.render('Price', satisfaction_result(0), 'satisfaction_distribution')
+    monkeypatch.setattr(Figure_Service, 'RENDER_VERSION', Figure_Service.RENDER_VERSION + 1)
+    FigureService(cache_dir=str(tmp_path)).render('Price', satisfaction_result(0), 'satisfaction_distribution')
+
+    names = os.listdir(tmp_path)
+    assert len(names) == 1 and f"-v{Figure_Service.RENDER_VERSION}-" in names[0]
+
+
+def test_cache_folder_keeps_max_files(tmp_path):
+    service = FigureService(cache_dir=str(tmp_path), max_files=3)
+    for seed in range(5):
+        service.render('Price', satisfaction_result(seed), 'satisfaction_distribution')
+    assert len(os.listdir(tmp_path)) == 3
@@ -0,0 +1,19 @@
+from src.Hotel_Manager_class import HotelManager
+from tests.conftest import synthetic_dicts
+
+"""
+Run All prints one line of statistics per method, unless verbose.
+"""
+
+
+def test_run_all_methods_prints_statistics_only(capsys):
+    guests_dict, hotels_dict = synthetic_dicts(num_guests=300, num_hotels=20)
+    manager = HotelManager(guests_dict, hotels_dict, seed=1)
+    manager.run_all_methods()
+
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == len(manager.statistics) == 6
+    assert all('allocation_report' not in line for line in lines)
+
+    manager.run_all_methods(verbose=True)
+    assert 'allocation_report' in capsys.readouterr().out
@@ -0,0 +1,39 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from src.Columnar_Core.Allocation_Data import AllocationData
+from src.Columnar_Core.Id_Dictionary import IdDictionary
+from tests.conftest import synthetic_dicts
+
+"""
+ID dictionaries: compact forms, encode/decode round trips and storage.
+"""
+
+
+@pytest.mark.parametrize('ids, compact', [
+    (['guest_3', 'guest_10', 'guest_1', 'guest_2'], True),
+    ([7, 3, 12], True),
+    (['guest_3', 'guest_03', 'vip'], False), # leading zero and no number: kept as objects
+])
+def test_round_trip(ids, compact):
+    dictionary = IdDictionary(ids)
+    assert dictionary.compact == compact
+    assert dictionary.decode().tolist() == ids
+    assert dictionary.encode(ids).tolist() == list(range(len(ids)))
+    assert dictionary.encode(['missing', 10**20, None]).tolist() == [-1, -1, -1]
+    assert [ids[code] for code in dictionary.sort_order().tolist()] == sorted(ids)
+    assert pickle.loads(pickle.dumps(dictionary)).decode().tolist() == ids
+
+
+def test_dataset_save_and_load_keep_ids(tmp_path):
+    data = AllocationData.from_dicts(*synthetic_dicts(num_guests=50, num_hotels=5))
+    path = str(tmp_path / 'data.npz')
+    data.save(path)
+    loaded = AllocationData.load(path)
+
+    assert loaded.guest_dictionary.compact and loaded.hotel_dictionary.compact
+    assert loaded.guest_ids.tolist() == data.guest_ids.tolist()
+    assert loaded.reservation_order.tolist() == np.argsort(data.guest_ids.astype(str), kind='stable').tolist()
+    assert loaded.fingerprint == data.fingerprint
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from src.Allocation_Methods.Availability_Allocation import availability_allocation_columnar
+from src.Allocation_Methods.Incremental_Allocation import STRATEGIES, IncrementalAllocation
+from src.Allocation_Methods.Price_Allocation import price_allocation_columnar
+from src.Allocation_Methods.Reservation_Allocation import reservation_allocation_columnar
+from src.Columnar_Core.Allocation_Data import AllocationData
+from tests.conftest import synthetic_dicts
+
+"""
+The incremental allocator must always hold the allocation a full rerun of the strategy gives on the changed data.
+"""
+
+FULL_RUNS = {'reservation': reservation_allocation_columnar, 'price': price_allocation_columnar,
+             'availability': availability_allocation_columnar}
+
+
+def assert_matches_rerun(allocator):
+    data = allocator.data()
+    expected = FULL_RUNS[allocator.strategy](data)['assignment']
+    assert allocator.result()['assignment'].tolist() == expected.tolist()
+
+
+def test_rooms_cannot_go_below_zero():
+    guests_dict = {'guest_1': {'discount': 0, 'preferences': ['hotel_2']},
+                   'guest_2': {'discount': 0, 'preferences': ['hotel_2']}}
+    hotels_dict = {'hotel_1': {'available_rooms': 1, 'price': 50}, 'hotel_2': {'available_rooms': 1, 'price': 60}}
+    allocator = IncrementalAllocation(AllocationData.from_dicts(guests_dict, hotels_dict), 'price')
+    assert allocator.hotel_of('guest_2') == 'hotel_1' # fallback: the cheapest hotel with rooms
+
+    with pytest.raises(ValueError):
+        allocator.add_rooms('hotel_1', -2)
+    allocator.add_rooms('hotel_1', -1)
+    assert allocator.hotel_of('guest_2') is None
+    allocator.add_rooms('hotel_1', 1)
+    assert allocator.hotel_of('guest_2') == 'hotel_1'
+    assert_matches_rerun(allocator)
+
+
+@pytest.mark.parametrize('strategy', STRATEGIES)
+def test_random_changes_match_full_rerun(strategy):
+    rng = np.random.default_rng(1)
+    guests_dict, hotels_dict = synthetic_dicts(num_guests=300, num_hotels=20, seed=2)
+    hotel_ids = list(hotels_dict)
+    # A work limit this large never triggers the rerun fallback: every change is repaired
+    allocator = IncrementalAllocation(AllocationData.from_dicts(guests_dict, hotels_dict), strategy, work_limit=10**9)
+    late = 0
+    for _ in range(300):
+        operation = rng.choice(['cancel', 'book', 'rooms', 'price'])
+        if operation == 'cancel':
+            guests = sorted(allocator.assigned)
+            allocator.cancel(guests[int(rng.integers(len(guests)))])
+        elif operation == 'book':
+            late += 1
+            preferences = rng.choice(hotel_ids, size=int(rng.integers(1, 4)), replace=False).tolist()
+            allocator.book(f"guest_{int(rng.integers(1, 400))}_{late}", preferences, float(rng.choice([0, 0.1])))
+        elif operation == 'rooms':
+            hotel_id = hotel_ids[int(rng.integers(len(hotel_ids)))]
+            rooms = int(rng.integers(-3, 4))
+            if allocator.capacity[allocator.hotel_codes[hotel_id]] + rooms < 0:
+                with pytest.raises(ValueError):
+                    allocator.add_rooms(hotel_id, rooms)
+            else:
+                allocator.add_rooms(hotel_id, rooms)
+        else:
+            allocator.set_price(hotel_ids[int(rng.integers(len(hotel_ids)))], float(rng.choice([50, 80, 120])))
+        assert_matches_rerun(allocator)
@@ -0,0 +1,53 @@
+from src.Instrumentation import PHASES, TOTAL, Instrumentation
+
+"""
+Instrumentation: nothing is recorded while disabled; enabled, each phase is recorded under the method around it.
+"""
+
+
+def test_disabled_instrumentation_records_nothing():
+    instrumentation = Instrumentation()
+    with instrumentation.method('Price'):
+        with instrumentation.phase('sorting'):
+            pass
+    instrumentation.count('runs')
+
+    assert instrumentation.phase('sorting') is instrumentation.phase('statistics') # shared no-op
+    assert instrumentation.to_dict()['phases'] == [] and instrumentation.counters == {}
+
+
+def test_enabled_instrumentation_records_phases_by_method():
+    instrumentation = Instrumentation(enabled=True)
+    for _ in range(2):
+        with instrumentation.method('Price'):
+            with instrumentation.phase('sorting'):
+                pass
+            with instrumentation.phase('allocation loop'):
+                pass
+    instrumentation.count('runs', method='Price')
+
+    assert instrumentation.phases[('Price', TOTAL)]['calls'] == 2
+    assert instrumentation.phases[('Price', 'sorting')]['calls'] == 2
+    assert instrumentation.phases[('Price', 'allocation loop')]['seconds'] >= 0
+    assert instrumentation.counters == {'Price': {'runs': 1}}
+
+    instrumentation.disable()
+    with instrumentation.phase('sorting'):
+        pass
+    assert instrumentation.phases[('Price', 'sorting')]['calls'] == 2
+
+
+def test_worker_records_are_merged():
+    worker = Instrumentation(enabled=True)
+    with worker.method('Random'):
+        with worker.phase('allocation loop'):
+            pass
+        worker.count('runs')
+    parent = Instrumentation(enabled=True)
+    parent.merge(worker.to_dict())
+    parent.merge(worker.to_dict())
+
+    assert parent.phases[('Random', 'allocation loop')]['calls'] == 2
+    assert parent.counters == {'Random': {'runs': 2}}
+    frame = parent.to_frame()
+    assert frame['phase'].tolist() == [TOTAL, 'allocation loop'] and 'allocation loop' in PHASES
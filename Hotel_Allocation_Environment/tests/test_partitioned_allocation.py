@@ -0,0 +1,32 @@
+import pytest
+
+from src.Allocation_Methods.Partitioned_Allocation import partitioned_allocation
+from src.Allocation_Methods.Reservation_Allocation import reservation_allocation_columnar
+from src.Columnar_Core.Allocation_Data import AllocationData
+from src.Columnar_Core.Preference_Components import preference_components
+from tests.conftest import synthetic_dicts
+
+"""
+Partitioned allocation: the reservation method gives exactly the sequential result, whatever the number of shards.
+"""
+
+
+def test_components_never_share_hotels(tight_dicts):
+    data = AllocationData.from_dicts(*tight_dicts)
+    guest_component, hotel_component, _ = preference_components(data)
+    for guest in range(data.num_guests):
+        hotels = data.pref_hotels[data.pref_offsets[guest]:data.pref_offsets[guest + 1]]
+        assert set(hotel_component[hotels[hotels >= 0]].tolist()) <= {guest_component[guest]}
+
+
+@pytest.mark.parametrize('max_workers', [1, 3])
+def test_partitioned_reservation_matches_sequential(max_workers):
+    # Short preference lists over many hotels: the preference graph has several components
+    guests_dict, hotels_dict = synthetic_dicts(num_guests=400, num_hotels=300, max_preferences=1, seed=4)
+    data = AllocationData.from_dicts(guests_dict, hotels_dict)
+    result = partitioned_allocation(data, 'reservation', max_workers=max_workers)
+    expected = reservation_allocation_columnar(data)
+
+    assert result['components']['count'] > 1
+    assert result['assignment'].tolist() == expected['assignment'].tolist()
+    assert result['statistics'] == expected['statistics']
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from src.Allocation_Methods.Random_Allocation import draw_random_assignment
+from src.Columnar_Core.Allocation_Data import AllocationData
+from src.Columnar_Core.Room_Sampler import RoomSampler
+from tests.conftest import synthetic_dicts
+
+"""
+Random draws: reproducible for a seed, never over-filling a hotel, and stopping when the rooms run out.
+"""
+
+MODES = [('sampler', 'hotel'), ('sampler', 'room'), ('vectorized', 'room')]
+
+
+def draw(data, seed, mode, by):
+    return draw_random_assignment(data, np.random.default_rng(seed), mode, by)
+
+
+@pytest.mark.parametrize('by', ['hotel', 'room'])
+def test_sampler_never_overfills_and_tracks_rooms(by):
+    rooms = np.array([3, 0, 1, 5, 2])
+    sampler = RoomSampler(rooms, np.random.default_rng(0), by=by)
+    hotels = [sampler.draw() for _ in range(rooms.sum())]
+
+    assert sampler.draw() == -1 and len(sampler) == 0
+    assert np.bincount(hotels, minlength=len(rooms)).tolist() == rooms.tolist()
+    assert sampler.rooms_left().tolist() == [0] * len(rooms)
+
+
+def test_sampler_rejects_unknown_by():
+    with pytest.raises(ValueError):
+        RoomSampler(np.array([1, 2]), np.random.default_rng(0), by='guest')
+
+
+@pytest.mark.parametrize('mode, by', MODES)
+def test_draws_are_reproducible(tight_dicts, mode, by):
+    data = AllocationData.from_dicts(*tight_dicts)
+    first, second = draw(data, 7, mode, by), draw(data, 7, mode, by)
+    for a, b in zip(first, second):
+        assert np.array_equal(a, b)
+    assert not np.array_equal(first[1], draw(data, 8, mode, by)[1])
+
+
+@pytest.mark.parametrize('mode, by', MODES)
+def test_rooms_run_out(tight_dicts, mode, by):
+    data = AllocationData.from_dicts(*tight_dicts)
+    guest_order, assignment, served_count, rooms_left = draw(data, 1, mode, by)
+    occupied = np.bincount(assignment[assignment >= 0], minlength=data.num_hotels)
+
+    # More guests than rooms: every room is taken, and the guests after the last room are left unassigned
+    assert served_count == data.rooms.sum() < data.num_guests
+    assert (assignment[guest_order[:served_count]] >= 0).all()
+    assert (assignment[guest_order[served_count:]] == -1).all()
+    assert occupied.tolist() == data.rooms.tolist()
+    assert rooms_left.tolist() == [0] * data.num_hotels
+
+
+@pytest.mark.parametrize('mode, by', MODES)
+def test_every_guest_served_when_rooms_suffice(mode, by):
+    data = AllocationData.from_dicts(*synthetic_dicts(num_guests=300, seed=2))
+    guest_order, assignment, served_count, rooms_left = draw(data, 3, mode, by)
+    occupied = np.bincount(assignment[assignment >= 0], minlength=data.num_hotels)
+
+    assert served_count == data.num_guests
+    assert (assignment >= 0).all()
+    assert sorted(guest_order.tolist()) == list(range(data.num_guests))
+    assert (occupied <= data.rooms).all()
+    assert rooms_left.tolist() == (data.rooms - occupied).tolist()
+
+
+@pytest.mark.parametrize('mode, by', [('sampler', 'guest'), ('vectorized', 'hotel'), ('loop', None)])
+def test_invalid_mode_or_by(tight_dicts, mode, by):
+    data = AllocationData.from_dicts(*tight_dicts)
+    with pytest.raises(ValueError):
+        draw(data, 0, mode, by)
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from src.Allocation_Methods.Random_Allocation import random_allocation_columnar
+from src.Allocation_Methods.Random_Monte_Carlo import STATISTICS, draw_seeds, random_monte_carlo, summarize
+from src.Columnar_Core.Allocation_Data import AllocationData
+from tests.conftest import synthetic_dicts
+
+"""
+Monte Carlo mode: draw i has exactly the statistics of random_allocation_columnar with the i-th spawned seed.
+"""
+
+MODES = [('sampler', 'hotel'), ('sampler', 'room'), ('vectorized', None)]
+DRAWS = 4
+
+
+@pytest.mark.parametrize('num_guests', [300, 2000]) # rooms left over / rooms running out
+@pytest.mark.parametrize('mode, by', MODES)
+@pytest.mark.parametrize('seed', [0, 11, 2024])
+def test_draws_match_single_allocations(num_guests, mode, by, seed):
+    data = AllocationData.from_dicts(*synthetic_dicts(num_guests=num_guests, seed=seed))
+    samples = random_monte_carlo(data, draws=DRAWS, seed=seed, mode=mode, by=by, max_workers=1)['samples']
+    for i, child in enumerate(draw_seeds(DRAWS, seed)):
+        statistics = random_allocation_columnar(data, mode=mode, by=by, seed=child)['statistics']
+        assert {name: samples[name][i] for name in STATISTICS} == statistics
+
+
+def test_worker_processes_give_the_same_samples(tight_dicts):
+    data = AllocationData.from_dicts(*tight_dicts)
+    sequential = random_monte_carlo(data, draws=6, seed=5, max_workers=1)['samples']
+    parallel = random_monte_carlo(data, draws=6, seed=5, max_workers=2)['samples']
+    for name in STATISTICS:
+        assert np.array_equal(sequential[name], parallel[name])
+
+
+def test_summary_of_one_draw():
+    summary = summarize({'average_revenue': np.array([120.5])})['average_revenue']
+    assert summary['std'] == 0.0
+    assert {value for key, value in summary.items() if key != 'std'} == {120.5}
+
+
+def test_empty_run(tight_dicts):
+    data = AllocationData.from_dicts(*tight_dicts)
+    run = random_monte_carlo(data, draws=0, seed=0)
+    assert all(len(run['samples'][name]) == 0 for name in STATISTICS)
+    assert run['summary'] == {}
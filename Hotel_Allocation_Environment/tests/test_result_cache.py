@@ -0,0 +1,53 @@
+import numpy as np
+
+from src.Columnar_Core.Allocation_Data import AllocationData
+from src.Hotel_Manager_class import HotelManager
+from src.Result_Cache import ResultCache
+from tests.conftest import synthetic_dicts
+
+"""
+Result cache: least recently used entries are dropped first, and random results are kept apart by seed.
+"""
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1 # 'b' is now the least recently used
+    cache.put('c', 3)
+
+    assert 'b' not in cache and 'a' in cache and 'c' in cache
+    assert cache.get_or_compute('b', lambda: 4) == 4 # computed again, evicting 'a'
+    assert 'a' not in cache and len(cache) == 2
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_get_or_compute_computes_once():
+    cache = ResultCache()
+    calls = []
+    for _ in range(3):
+        assert cache.get_or_compute('key', lambda: calls.append(1) or 'value') == 'value'
+    assert len(calls) == 1 and cache.hits == 2
+
+
+def test_random_results_are_keyed_by_seed():
+    data = AllocationData.from_dicts(*synthetic_dicts(num_guests=300, num_hotels=20))
+    cache = ResultCache()
+    first = HotelManager.from_data(data, seed=1, cache=cache)
+    first.run_random_allocation()
+    other_seed = HotelManager.from_data(data, seed=2, cache=cache)
+    other_seed.run_random_allocation()
+    same_seed = HotelManager.from_data(data, seed=1, cache=cache)
+    same_seed.run_random_allocation()
+
+    assert len(cache) == 2
+    assert same_seed.results['Random'] is first.results['Random']
+    assert not np.array_equal(other_seed.results['Random']['assignment'], first.results['Random']['assignment'])
+
+
+def test_unseeded_random_results_are_not_cached():
+    data = AllocationData.from_dicts(*synthetic_dicts(num_guests=300, num_hotels=20))
+    cache = ResultCache()
+    HotelManager.from_data(data, cache=cache).run_random_allocation()
+    assert len(cache) == 0
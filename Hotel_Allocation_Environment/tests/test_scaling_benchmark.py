@@ -0,0 +1,20 @@
+from src.Benchmarks import Scaling_Benchmark
+
+"""
+A strategy that fails is recorded with its error and stops; the other strategies go on.
+"""
+
+
+def failing_allocation(*args, **kwargs):
+    raise RuntimeError("solver failed")
+
+
+def test_failing_strategy_does_not_abort_benchmark(monkeypatch):
+    monkeypatch.setitem(Scaling_Benchmark.STRATEGIES, 'Failing', (failing_allocation, failing_allocation))
+    records = Scaling_Benchmark.run_benchmark(sizes=[(200, 20), (400, 30)], strategies=('Failing', 'Reservation'),
+                                              variants=('columnar',), repeats=1, verbose=False)
+
+    by_key = {(record['strategy'], record['num_guests']): record for record in records}
+    assert by_key[('Failing', 200)]['error'] == repr(RuntimeError("solver failed"))
+    assert by_key[('Failing', 400)]['skipped'] == "failed at a smaller size"
+    assert 'median' in by_key[('Reservation', 200)] and 'median' in by_key[('Reservation', 400)]
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from src.Batch_Runner import METHODS, columnar_methods
+from src.Columnar_Core.Allocation_Data import AllocationData
+from src.Scenario_Engine import STATISTICS, run_scenarios
+
+"""
+What-if scenarios give the statistics of the methods re-run on the changed dataset.
+"""
+
+pytest.importorskip('pandas')
+
+
+def test_scenarios_match_rebuilt_datasets(tight_dicts):
+    data = AllocationData.from_dicts(*tight_dicts)
+    scenarios = [{'name': 'cheaper', 'changes': [{'field': 'price', 'ids': ['hotel_1', 'hotel_2'], 'operation': 'scale', 'value': 0.5}]},
+                 {'name': 'fewer rooms', 'changes': [{'field': 'rooms', 'ids': None, 'operation': 'add', 'value': -2}]}]
+    methods = [method for method in METHODS if method != 'Optimal'] # the optimal solver is covered by the parity tests
+    table = run_scenarios(data, scenarios, methods, seed=1, max_workers=1)
+
+    price = data.price.astype(np.float64)
+    price[data.hotel_codes(['hotel_1', 'hotel_2'])] *= 0.5
+    rebuilt = {'baseline': data,
+               'cheaper': AllocationData(data.guest_ids, data.discount, data.hotel_ids, data.rooms, price,
+                                         data.pref_offsets, data.pref_hotels),
+               'fewer rooms': AllocationData(data.guest_ids, data.discount, data.hotel_ids, np.maximum(data.rooms - 2, 0),
+                                             data.price, data.pref_offsets, data.pref_hotels)}
+    for row in table.to_dict('records'):
+        kwargs = {'seed': 1} if row['method'] == 'Random' else {}
+        expected = columnar_methods()[row['method']](rebuilt[row['scenario']], **kwargs)['statistics']
+        assert {statistic: row[statistic] for statistic in STATISTICS} == expected
+    assert len(table) == 3 * len(methods)
+
+
+def test_unknown_ids_are_rejected(tight_dicts):
+    data = AllocationData.from_dicts(*tight_dicts)
+    with pytest.raises(ValueError):
+        run_scenarios(data, [{'changes': [{'field': 'price', 'ids': ['hotel_0'], 'value': 1}]}], ['Price'], max_workers=1)
@@ -0,0 +1,37 @@
+import numpy as np
+
+from src.Allocation_Methods.Reservation_Allocation import reservation_allocation_columnar
+from src.Columnar_Core import Shared_Data
+from src.Columnar_Core.Allocation_Data import AllocationData
+from src.Columnar_Core.Shared_Data import SharedAllocationData, attach_shared_data, detach_shared_data
+from tests.conftest import synthetic_dicts
+
+"""
+Shared memory: a published dataset is mapped back unchanged and read-only, once per process, and closed on detach.
+"""
+
+
+def test_shared_memory_round_trip(tight_dicts):
+    data = AllocationData.from_dicts(*tight_dicts)
+    with SharedAllocationData(data) as shared:
+        attached = attach_shared_data(shared.spec)
+        assert attach_shared_data(shared.spec) is attached
+
+        for field, array in data.to_arrays().items():
+            assert np.array_equal(attached.to_arrays()[field], array)
+        assert not attached.rooms.flags.writeable
+        assert attached.fingerprint == data.fingerprint
+        assert reservation_allocation_columnar(attached)['statistics'] == reservation_allocation_columnar(data)['statistics']
+
+        shm = Shared_Data._attached[shared.spec[0]][0]
+        del attached
+        detach_shared_data()
+        assert shm.buf is None and not Shared_Data._attached
+
+
+def test_detach_leaves_referenced_mappings_open():
+    data = AllocationData.from_dicts(*synthetic_dicts(num_guests=50, num_hotels=5))
+    with SharedAllocationData(data) as shared:
+        rooms = attach_shared_data(shared.spec).rooms[1:] # a view of the mapping, still in use after detach
+        detach_shared_data()
+        assert rooms.tolist() == data.rooms[1:].tolist()
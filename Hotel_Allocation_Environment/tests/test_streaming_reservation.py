@@ -0,0 +1,78 @@
+import os
+
+import pandas as pd
+import pytest
+
+from src.Allocation_Methods import Streaming_Reservation_Allocation
+from src.Allocation_Methods.Reservation_Allocation import reservation_allocation_columnar
+from src.Allocation_Methods.Streaming_Reservation_Allocation import (read_guest_batches, sort_guest_files,
+                                                                     streaming_reservation_allocation)
+from src.Columnar_Core.Allocation_Data import AllocationData
+from src.Data_generation import generate_dataset
+
+"""
+The streaming reservation allocation of the generator's files, once sorted, matches the batch method.
+"""
+
+
+@pytest.fixture(params=['csv', 'parquet'])
+def dataset(request, tmp_path):
+    if request.param == 'parquet':
+        pytest.importorskip('pyarrow')
+    return generate_dataset(str(tmp_path / 'source'), num_guests=2500, num_hotels=40, seed=3,
+                            file_format=request.param, chunk_size=700)
+
+
+def test_generated_files_are_not_in_reservation_order(dataset):
+    hotels_df = pd.read_csv(dataset['hotels']) if dataset['hotels'].endswith('.csv') else pd.read_parquet(dataset['hotels'])
+    with pytest.raises(ValueError):
+        streaming_reservation_allocation(hotels_df, read_guest_batches(dataset['guests'], dataset['preferences'], 300),
+                                         check_order=True)
+
+
+def test_sorted_stream_matches_batch_method(dataset, tmp_path):
+    extension = dataset['guests'].rsplit('.', 1)[1]
+    read = pd.read_csv if extension == 'csv' else pd.read_parquet
+    sorted_guests, sorted_preferences = str(tmp_path / f"guests.{extension}"), str(tmp_path / f"preferences.{extension}")
+    sort_guest_files(dataset['guests'], dataset['preferences'], sorted_guests, sorted_preferences, batch_size=300)
+
+    hotels_df = read(dataset['hotels'])
+    streamed = streaming_reservation_allocation(hotels_df, read_guest_batches(sorted_guests, sorted_preferences, 256),
+                                                check_order=True)
+    data = AllocationData.from_dataframes(hotels_df, read(dataset['guests']), read(dataset['preferences']))
+    expected = reservation_allocation_columnar(data)
+
+    assert streamed['statistics'] == expected['statistics']
+    assert streamed['allocation_report'].rooms_occupied.tolist() == expected['allocation_report'].rooms_occupied.tolist()
+    assert streamed['allocation_report'].revenue.tolist() == expected['allocation_report'].revenue.tolist()
+    assert sorted(read(sorted_guests)['guest']) == read(sorted_guests)['guest'].tolist()
+    assert len(read(sorted_preferences)) == len(read(dataset['preferences']))
+
+
+def test_sort_reads_runs_in_blocks(dataset, tmp_path, monkeypatch):
+    # Every batch read (source batches and run blocks) and every merged batch, by number of guests
+    source = os.path.dirname(dataset['guests'])
+    run_reads, merged = [], []
+    read = Streaming_Reservation_Allocation.read_guest_batches
+    merge = Streaming_Reservation_Allocation.merge_sorted_runs
+
+    def recording_read(guests_path, preferences_path, batch_size):
+        for guests_df, preferences_df in read(guests_path, preferences_path, batch_size):
+            if os.path.dirname(guests_path) != source:
+                run_reads.append(len(guests_df))
+            yield guests_df, preferences_df
+
+    def recording_merge(runs, batch_size):
+        for guests_df, preferences_df in merge(runs, batch_size):
+            merged.append(len(guests_df))
+            yield guests_df, preferences_df
+
+    monkeypatch.setattr(Streaming_Reservation_Allocation, 'read_guest_batches', recording_read)
+    monkeypatch.setattr(Streaming_Reservation_Allocation, 'merge_sorted_runs', recording_merge)
+    extension = dataset['guests'].rsplit('.', 1)[1]
+    sort_guest_files(dataset['guests'], dataset['preferences'], str(tmp_path / f"guests.{extension}"),
+                     str(tmp_path / f"preferences.{extension}"), batch_size=300)
+
+    # 2500 guests in runs of 300: 9 runs, read in blocks of 300 // 9 = 33 guests
+    assert max(run_reads) == 33
+    assert max(merged) <= 300 and sum(merged) == 2500